@@ -2,5 +2,6 @@ from setuptools import find_packages, setup
 
 setup(
     name="src",
-    packages=find_packages(),
+    package_dir={"": "src"},
+    packages=find_packages("src"),
 )
@@ -0,0 +1,50 @@
+"""
+Animal feed model: population, slaughter and feed simulation for US livestock.
+
+Importing the package does no file or network I/O and does not import Dash,
+plotly or matplotlib.
+"""
+
+from .batch import (
+    batch_result_frame,
+    calculate_feed_and_animals_batch,
+    simulate_batch,
+)
+from .cohort import simulate_cohorts
+from .farm import FarmRun, run_farm
+from .incremental import IncrementalModel
+from .instrumentation import LoggingHook, MetricsHook, ModelHook
+from .inputs import (
+    ModelAnimalInputs,
+    ModelSliderInputs,
+    ModelSlidersDefaults,
+    load_animal_inputs,
+    load_slider_defaults,
+)
+from .longrun import iter_long_run
+from .montecarlo import iter_monte_carlo, run_monte_carlo
+from .model import METRIC_NAMES, SLIDER_NAMES, calculate_feed_and_animals
+
+__all__ = [
+    "METRIC_NAMES",
+    "SLIDER_NAMES",
+    "FarmRun",
+    "IncrementalModel",
+    "LoggingHook",
+    "MetricsHook",
+    "ModelAnimalInputs",
+    "ModelHook",
+    "ModelSliderInputs",
+    "ModelSlidersDefaults",
+    "batch_result_frame",
+    "calculate_feed_and_animals",
+    "calculate_feed_and_animals_batch",
+    "iter_long_run",
+    "iter_monte_carlo",
+    "load_animal_inputs",
+    "load_slider_defaults",
+    "run_farm",
+    "run_monte_carlo",
+    "simulate_batch",
+    "simulate_cohorts",
+]
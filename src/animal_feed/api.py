@@ -0,0 +1,247 @@
+"""
+HTTP API serving model results as JSON or NumPy arrays, without the dashboard.
+
+The blueprint is registered on the Dash app's Flask server under /api/v1.
+POST /api/v1/model takes one slider set or many as JSON, GET /api/v1/model
+takes one as query parameters. Every slider set of a request runs together in
+one batch. Responses carry an ETag derived from the request and the model
+inputs, and a GET whose If-None-Match matches it gets an empty 304.
+
+JSON responses are columnar, with one list per metric for each slider set and
+non-finite values as null. With format=npy the body is a single
+(sets, months, metrics) float64 .npy array, NaN past each set's months.
+"""
+
+import hashlib
+import io
+import json
+import math
+
+import numpy as np
+from flask import Blueprint, Response, jsonify, request
+
+from .batch import calculate_feed_and_animals_batch
+from .inputs import inputs_digest, load_animal_inputs
+from .model import METRIC_INDEX, METRIC_NAMES, SLIDER_BOUNDS, SLIDER_NAMES
+
+api = Blueprint("model_api", __name__, url_prefix="/api/v1")
+
+# most slider sets one request may run
+MAX_SLIDER_SETS = 10000
+# the API allows longer runs than the dashboard's months slider
+MAX_MONTHS = 1200
+# most slider sets times the longest months of one request, as the results of
+# every set are held for the longest months, 250000 is about 58 MB of float64
+MAX_SCENARIO_MONTHS = 250000
+FORMATS = ("json", "npy")
+
+
+class RequestError(ValueError):
+    """
+    Raised for a request the API cannot run, answered with a 400.
+    """
+
+
+def _slider_row(values):
+    # one slider set, as a mapping of SLIDER_NAMES or a list in their order
+    if isinstance(values, dict):
+        missing = [name for name in SLIDER_NAMES if name not in values]
+        unknown = sorted(set(values) - set(SLIDER_NAMES))
+        if missing or unknown:
+            raise RequestError(f"missing sliders {missing}, unknown sliders {unknown}")
+        values = [values[name] for name in SLIDER_NAMES]
+    if not isinstance(values, list) or len(values) != len(SLIDER_NAMES):
+        raise RequestError(f"a slider set needs the {len(SLIDER_NAMES)} sliders")
+    try:
+        row = [float(value) for value in values]
+    except (TypeError, ValueError):
+        raise RequestError(f"slider values must be numbers, got {values}")
+    for name, value in zip(SLIDER_NAMES, row):
+        low, high = (0, MAX_MONTHS) if name == "months" else SLIDER_BOUNDS[name]
+        if not low <= value <= high:
+            raise RequestError(f"{name} must be within {low} to {high}, got {value}")
+    if not row[SLIDER_NAMES.index("months")].is_integer():
+        raise RequestError("months must be a whole number")
+    return row
+
+
+def parse_model_request(body):
+    """
+    Validates the slider sets, metrics and format of a model request.
+
+    Arguments:
+        body (dict): "sliders" as one set or a list of sets, each a mapping of
+            SLIDER_NAMES or a list in their order, and optionally "metrics", a
+            list of METRIC_NAMES to return, and "format", one of FORMATS
+
+    Returns:
+        tuple: (N, 9) slider array, the metric names and the format
+
+    Raises:
+        RequestError: if the request is malformed
+    """
+    if not isinstance(body, dict) or "sliders" not in body:
+        raise RequestError('the request needs "sliders"')
+    sets = body["sliders"]
+    if isinstance(sets, dict) or (
+        isinstance(sets, list) and sets and not isinstance(sets[0], (dict, list))
+    ):
+        sets = [sets]
+    if not isinstance(sets, list) or not sets:
+        raise RequestError('"sliders" must be one slider set or a list of them')
+    if len(sets) > MAX_SLIDER_SETS:
+        raise RequestError(f"at most {MAX_SLIDER_SETS} slider sets per request")
+    metrics = body.get("metrics") or list(METRIC_NAMES)
+    if not isinstance(metrics, list) or not all(
+        isinstance(name, str) for name in metrics
+    ):
+        raise RequestError('"metrics" must be a list of metric names')
+    unknown = sorted(set(metrics) - set(METRIC_NAMES))
+    if unknown:
+        raise RequestError(f"unknown metrics {unknown}")
+    output_format = body.get("format", "json")
+    if output_format not in FORMATS:
+        raise RequestError(f"format must be one of {list(FORMATS)}")
+    sliders = np.array([_slider_row(values) for values in sets])
+    longest = int(sliders[:, SLIDER_NAMES.index("months")].max())
+    if len(sliders) * longest > MAX_SCENARIO_MONTHS:
+        raise RequestError(
+            f"slider sets times their longest months must be at most "
+            f"{MAX_SCENARIO_MONTHS}, got {len(sliders)} x {longest}"
+        )
+    return sliders, list(metrics), output_format
+
+
+def request_etag(sliders, metrics, output_format, animal_inputs):
+    """
+    Derives the ETag of a model request, the model being deterministic.
+
+    Arguments:
+        sliders (np.ndarray): (N, 9) slider values
+        metrics (list): the metric names returned
+        output_format (str): one of FORMATS
+        animal_inputs (ModelAnimalInputs): the inputs the model runs on
+
+    Returns:
+        str: the sha256 hex digest of the request and the inputs
+    """
+    text = json.dumps(
+        [sliders.tolist(), metrics, output_format, inputs_digest(animal_inputs)]
+    )
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _columns(values, months, metrics):
+    # one scenario's results as metric name to list, non-finite as None
+    block = values[:months, [METRIC_INDEX[name] for name in metrics]]
+    columns = block.T.tolist()
+    if not np.isfinite(block).all():
+        columns = [
+            [value if math.isfinite(value) else None for value in column]
+            for column in columns
+        ]
+    return dict(zip(metrics, columns))
+
+
+def model_response(sliders, metrics, output_format, animal_inputs=None):
+    """
+    Runs the slider sets as one batch and builds the response.
+
+    Arguments:
+        sliders (np.ndarray): (N, 9) slider values
+        metrics (list): the metric names returned
+        output_format (str): one of FORMATS
+        animal_inputs (ModelAnimalInputs): loaded from the data folder by default
+
+    Returns:
+        flask.Response: the results, with their ETag
+    """
+    animal_inputs = animal_inputs or load_animal_inputs()
+    etag = request_etag(sliders, metrics, output_format, animal_inputs)
+    if request.method in ("GET", "HEAD") and etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    results = calculate_feed_and_animals_batch(sliders, animal_inputs)
+    months = sliders[:, SLIDER_NAMES.index("months")].astype(int)
+    if output_format == "npy":
+        buffer = io.BytesIO()
+        np.save(buffer, results[:, :, [METRIC_INDEX[name] for name in metrics]])
+        response = Response(buffer.getvalue(), mimetype="application/octet-stream")
+        response.headers["X-Metrics"] = ",".join(metrics)
+    else:
+        response = jsonify(
+            {
+                "metrics": metrics,
+                "results": [
+                    {
+                        "sliders": dict(zip(SLIDER_NAMES, row.tolist())),
+                        "months": int(horizon),
+                        "values": _columns(values, horizon, metrics),
+                    }
+                    for row, horizon, values in zip(sliders, months, results)
+                ],
+            }
+        )
+    response.set_etag(etag)
+    return response
+
+
+@api.errorhandler(RequestError)
+def request_error(error):
+    """
+    Answers a malformed request.
+
+    Arguments:
+        error (RequestError): what is wrong with the request
+
+    Returns:
+        tuple: the JSON error message and the 400 status
+    """
+    return jsonify({"error": str(error)}), 400
+
+
+@api.route("/model", methods=["GET", "POST"])
+def model():
+    """
+    Runs the model for the slider sets of a request.
+
+    A GET takes one slider set as query parameters named as SLIDER_NAMES, with
+    optional comma separated metrics and a format. A POST takes the JSON body
+    described in parse_model_request.
+
+    Returns:
+        flask.Response: the results
+    """
+    if request.method == "POST":
+        body = request.get_json(silent=True)
+    else:
+        args = request.args
+        body = {
+            "sliders": {name: args[name] for name in args if name in SLIDER_NAMES},
+            "format": args.get("format", "json"),
+        }
+        if "metrics" in args:
+            body["metrics"] = args["metrics"].split(",")
+        unknown = sorted(set(args) - set(SLIDER_NAMES) - {"metrics", "format"})
+        if unknown:
+            raise RequestError(f"unknown parameters {unknown}")
+    return model_response(*parse_model_request(body))
+
+
+@api.route("/metadata")
+def metadata():
+    """
+    Describes the sliders and metrics the model API takes and returns.
+
+    Returns:
+        dict: slider names and ranges, metric names and the request limits
+    """
+    bounds = dict(SLIDER_BOUNDS, months=(0, MAX_MONTHS))
+    return {
+        "sliders": {name: list(bounds[name]) for name in SLIDER_NAMES},
+        "metrics": list(METRIC_NAMES),
+        "formats": list(FORMATS),
+        "max_slider_sets": MAX_SLIDER_SETS,
+        "max_scenario_months": MAX_SCENARIO_MONTHS,
+    }
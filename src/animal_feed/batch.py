@@ -0,0 +1,489 @@
+"""
+Vectorised batch engine for the animal feed model.
+
+Runs the same month-by-month recurrence as calculate_feed_and_animals, but
+advances many slider scenarios together as NumPy arrays instead of looping over
+them one at a time in Python.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .constants import (
+    BEEF_COW_FEED_PM_PER_COW,
+    CALVES_PER_MOTHER,
+    COW_SLAUGHTER_HOURS,
+    DAIRY_COW_FEED_PM_PER_COW,
+    DAIRY_LIFE_EXPECTANCY,
+    FEED_UNIT_ADJUST,
+    OTHER_COW_DEATH_RATE,
+    OTHER_PIG_DEATH_RATE,
+    OTHER_POULTRY_DEATH_RATE,
+    PIG_FEED_PM_PER_PIG,
+    PIG_SLAUGHTER_HOURS,
+    POULTRY_FEED_PM_PER_BIRD,
+    POULTRY_SLAUGHTER_HOURS,
+)
+from .model import METRIC_INDEX, METRIC_NAMES, SLIDER_NAMES, results_frame
+
+# rows of InputDataAndSources.csv used by the model, keyed by parameter name
+INPUT_ROWS = {
+    "total_pigs": "TotalPigs",
+    "piglets_pm": "PigletsPerMonth",
+    "pigs_slaughter_pm": "SlaughterPerMonth",
+    "pig_gestation": "pigGestation",
+    "piglets_per_litter": "PigsPerLitter",
+    "total_poultry": "Broiler Population",
+    "poultry_slaughter_pm": "poultry_slaughter_pm",
+    "poultry_gestation": "Chicken Gestation",
+    "total_calves": "Calves under 500 pounds",
+    "dairy_cows": "Milk cows",
+    "beef_cows": "Beef cows",
+    "beef_steers": "Steers 500 pounds and over",
+    "heifers": "Heifers 500 pounds and over",
+    "new_calves_per_year": "Calf crop",
+    "cow_slaughter_pm": "CowSlaughter",
+    "cow_gestation": "cowGestation",
+}
+
+
+def batch_parameters(animal_inputs):
+    """
+    Extracts the model input quantities from the animal inputs.
+
+    Arguments:
+        animal_inputs (ModelAnimalInputs): the validated input quantities
+
+    Returns:
+        dict: parameter name to quantity, keyed as in INPUT_ROWS
+    """
+    return {name: getattr(animal_inputs, name) for name in INPUT_ROWS}
+
+
+def slider_array(sliders):
+    """
+    Normalises slider input to a float array with one row per scenario.
+
+    Arguments:
+        sliders (array-like or pd.DataFrame): (N, 9) slider values in SLIDER_NAMES
+            order, or a DataFrame with SLIDER_NAMES columns
+
+    Returns:
+        np.ndarray: (N, 9) float array of slider values
+    """
+    if isinstance(sliders, pd.DataFrame):
+        sliders = sliders.loc[:, list(SLIDER_NAMES)].to_numpy()
+    sliders = np.atleast_2d(np.asarray(sliders, dtype=float))
+    if sliders.ndim != 2 or sliders.shape[1] != len(SLIDER_NAMES):
+        raise ValueError(
+            f"sliders must have shape (N, {len(SLIDER_NAMES)}), got {sliders.shape}"
+        )
+    return sliders
+
+
+def slider_months(sliders):
+    """
+    Reads the months slider of every scenario as a number of whole months.
+
+    Arguments:
+        sliders (np.ndarray): (N, 9) slider values, as returned by slider_array
+
+    Returns:
+        np.ndarray: (N,) int months
+
+    Raises:
+        ValueError: if a months slider is not a whole number of at least 0, as
+            the scalar model cannot run part of a month either
+    """
+    months = sliders[:, SLIDER_NAMES.index("months")]
+    if not np.all((months >= 0) & (months == np.round(months))):
+        raise ValueError(f"months sliders must be whole numbers >= 0, got {months}")
+    return months.astype(int)
+
+
+def cattle_tracks(params):
+    """
+    Splits the cattle inventory into the beef and dairy tracks.
+
+    Calves and heifers are split in the ratio of dairy to beef cows. Dairy bull
+    calves are raised for beef, so they join the beef track.
+
+    Arguments:
+        params (dict): model input quantities, keyed as in INPUT_ROWS
+
+    Returns:
+        tuple: calves born per year into the beef and dairy tracks, then the
+            head count of the beef and dairy tracks
+    """
+    p = params
+    dairy_beef_mother_ratio = p["dairy_cows"] / p["beef_cows"]
+    dairy_heifers = p["heifers"] * dairy_beef_mother_ratio
+    beef_heifers = p["heifers"] - dairy_heifers
+    dairy_calves = dairy_beef_mother_ratio * p["total_calves"]
+    beef_calves = p["total_calves"] - dairy_calves
+    dairy_calf_steers = dairy_calves / 2
+    dairy_calf_girls = dairy_calves / 2
+    calves_destined_for_beef_ratio = (beef_calves + dairy_calf_steers) / p[
+        "total_calves"
+    ]
+    new_beef_calfs = calves_destined_for_beef_ratio * p["new_calves_per_year"]
+    new_dairy_calfs = p["new_calves_per_year"] - new_beef_calfs
+    cattle_in_beef_track = (
+        dairy_calf_steers
+        + beef_calves
+        + p["beef_steers"]
+        + p["beef_cows"]
+        + beef_heifers
+    )
+    cattle_in_dairy_track = dairy_calf_girls + p["dairy_cows"] + dairy_heifers
+    return new_beef_calfs, new_dairy_calfs, cattle_in_beef_track, cattle_in_dairy_track
+
+
+def simulate_batch(sliders, params, months=None, capacity_sharing=None):
+    """
+    Advances every slider scenario through the monthly recurrence together.
+
+    Each entry of params may be a scalar shared by all scenarios or an array of
+    length N giving a per-scenario value. With capacity_sharing the scenarios
+    are regions of one country, and cow slaughter capacity a region cannot use
+    is lent each month to linked regions with more cattle than capacity.
+
+    Arguments:
+        sliders (array-like): (N, 9) slider values in SLIDER_NAMES order, the
+            months slider a whole number
+        params (dict): model input quantities, keyed as in INPUT_ROWS
+        months (int): number of months to simulate, defaults to the largest
+            months slider. Months past a scenario's own months slider are NaN
+        capacity_sharing (np.ndarray): (N, N) 0/1 matrix of the scenarios that
+            may lend each other spare cow slaughter capacity, None for no
+            sharing
+
+    Returns:
+        np.ndarray: (N, months, len(METRIC_NAMES)) array of results
+
+    Raises:
+        ValueError: if a months slider is not a whole number of at least 0
+    """
+    sliders = slider_array(sliders)
+    horizon = slider_months(sliders)
+    if months is None:
+        months = int(horizon.max()) if len(sliders) else 0
+    out = np.empty((len(sliders), months, len(METRIC_NAMES)))
+    # a single chunk holds every month
+    for out in iter_batch(
+        sliders,
+        params,
+        months,
+        capacity_sharing=capacity_sharing,
+        chunk_steps=max(months, 1),
+    ):
+        pass
+    # months beyond each scenario's own horizon are not part of its run
+    out[np.arange(months)[None, :] >= horizon[:, None]] = np.nan
+    return out
+
+
+def iter_batch(
+    sliders, params, steps, step=1.0, capacity_sharing=None, chunk_steps=1024
+):
+    """
+    Advances slider scenarios through the recurrence, yielding chunks of steps.
+
+    The recurrence runs on monthly rates, a step of a fraction of a month
+    moves each flow by that fraction of its monthly rate. Births, slaughter,
+    deaths, slaughter hours and feed are reported per step, populations at the
+    start of each step. The months slider is ignored, the run lasts steps.
+    Only one chunk is held at a time, so memory does not grow with steps.
+
+    Arguments:
+        sliders (array-like): (N, 9) slider values in SLIDER_NAMES order
+        params (dict): model input quantities, keyed as in INPUT_ROWS
+        steps (int): number of time steps to simulate
+        step (float): length of a time step in months, see TIME_STEPS
+        capacity_sharing (np.ndarray): (N, N) 0/1 matrix of the scenarios that
+            may lend each other spare cow slaughter capacity, None for no
+            sharing
+        chunk_steps (int): number of steps in each yielded chunk
+
+    Yields:
+        np.ndarray: (N, chunk_steps or fewer, len(METRIC_NAMES)) results, the
+            Month column holding the months elapsed at the start of each step
+    """
+    sliders = slider_array(sliders)
+    n = sliders.shape[0]
+    dt = float(step)
+
+    def per_scenario(value):
+        return np.broadcast_to(np.asarray(value, dtype=float), (n,)).copy()
+
+    p = {name: np.asarray(params[name], dtype=float) for name in INPUT_ROWS}
+
+    new_beef_calfs, new_dairy_calfs, cattle_in_beef_track, cattle_in_dairy_track = (
+        cattle_tracks(p)
+    )
+
+    # interventions, sliders from % to decimal
+    reduction_in_beef_calves = sliders[:, 0] * 0.01
+    reduction_in_dairy_calves = sliders[:, 1] * 0.01
+    increase_in_slaughter = sliders[:, 2] * 0.01
+    reduction_in_pig_breeding = sliders[:, 3] * 0.01
+    reduction_in_poultry_breeding = sliders[:, 4] * 0.01
+    discount_rate = sliders[:, 6]
+    mother_slaughter = sliders[:, 7]
+    use_grass_and_residues_for_dairy = sliders[:, 8]
+
+    # flows are tracked per step, monthly rates times the step length
+    new_dairy_calfs_step = per_scenario(new_dairy_calfs / 12 * dt)
+    new_poultry_step = per_scenario(p["poultry_slaughter_pm"] * dt)
+    piglets_per_step = p["piglets_per_litter"] * dt
+    calves_per_step = CALVES_PER_MOTHER * dt
+    current_pregnant_sows = per_scenario(p["piglets_pm"] / p["piglets_per_litter"])
+    current_pregnant_cows = per_scenario(new_beef_calfs / 12 / CALVES_PER_MOTHER)
+
+    # slaughter capacity, scaled by the slaughter slider
+    total_slaughter_cap_hours = (
+        (
+            p["cow_slaughter_pm"] * COW_SLAUGHTER_HOURS
+            + p["pigs_slaughter_pm"] * PIG_SLAUGHTER_HOURS
+            + p["poultry_slaughter_pm"] * POULTRY_SLAUGHTER_HOURS
+        )
+        * increase_in_slaughter
+        * dt
+    )
+    skill_transfer_discount = (100 - discount_rate) / 100
+    current_cow_slaughter = per_scenario(
+        p["cow_slaughter_pm"] * increase_in_slaughter * dt
+    )
+    current_poultry_slaughter = per_scenario(
+        p["poultry_slaughter_pm"] * increase_in_slaughter * dt
+    )
+    current_pig_slaughter = per_scenario(
+        p["pigs_slaughter_pm"] * increase_in_slaughter * dt
+    )
+    dairy_slaughter_months = DAIRY_LIFE_EXPECTANCY * 12 / dt
+    cow_death_rate = OTHER_COW_DEATH_RATE * dt
+    pig_death_rate = OTHER_PIG_DEATH_RATE * dt
+    poultry_death_rate = OTHER_POULTRY_DEATH_RATE * dt
+
+    current_beef_cattle = per_scenario(cattle_in_beef_track)
+    current_dairy_cattle = per_scenario(cattle_in_dairy_track)
+    current_total_pigs = per_scenario(p["total_pigs"])
+    current_total_poultry = per_scenario(p["total_poultry"])
+
+    beef_cow_feed = BEEF_COW_FEED_PM_PER_COW * dt
+    dairy_cow_feed = (
+        np.where(use_grass_and_residues_for_dairy != 0, 0.0, DAIRY_COW_FEED_PM_PER_COW)
+        * dt
+    )
+    pig_feed_per_pig = PIG_FEED_PM_PER_PIG * dt
+    poultry_feed_per_bird = POULTRY_FEED_PM_PER_BIRD * dt
+    baseline_feed = (
+        current_total_poultry * poultry_feed_per_bird
+        + current_total_pigs * pig_feed_per_pig
+        + current_beef_cattle * beef_cow_feed
+        + current_dairy_cattle * dairy_cow_feed
+    )
+
+    # interventions take effect at the steps within half a step of a gestation
+    gate = dt / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start in range(0, steps, chunk_steps):
+            out = np.empty((n, min(chunk_steps, steps - start), len(METRIC_NAMES)))
+            for j in range(out.shape[1]):
+                t = (start + j) * dt
+                new_pigs = current_pregnant_sows * piglets_per_step
+                new_beef_calfs = current_pregnant_cows * calves_per_step
+
+                # birth rate interventions take effect one gestation after month 0
+                cow_gate = np.abs(t - p["cow_gestation"]) <= gate
+                new_beef_calfs = np.where(
+                    cow_gate,
+                    new_beef_calfs * (1 - reduction_in_beef_calves),
+                    new_beef_calfs,
+                )
+                new_dairy_calfs_step = np.where(
+                    cow_gate,
+                    new_dairy_calfs_step * (1 - reduction_in_dairy_calves),
+                    new_dairy_calfs_step,
+                )
+                current_pregnant_cows = np.where(
+                    cow_gate,
+                    current_pregnant_cows * (1 - reduction_in_beef_calves),
+                    current_pregnant_cows,
+                )
+                pig_gate = np.abs(t - p["pig_gestation"]) <= gate
+                new_pigs = np.where(
+                    pig_gate, new_pigs * (1 - reduction_in_pig_breeding), new_pigs
+                )
+                current_pregnant_sows = np.where(
+                    pig_gate,
+                    current_pregnant_sows * (1 - reduction_in_pig_breeding),
+                    current_pregnant_sows,
+                )
+                poultry_gate = np.abs(t - p["poultry_gestation"]) <= gate
+                new_poultry_step = np.where(
+                    poultry_gate,
+                    new_poultry_step * (1 - reduction_in_poultry_breeding),
+                    new_poultry_step,
+                )
+                new_pigs = np.where(new_pigs < 0, 0.0, new_pigs)
+                new_beef_calfs = np.where(new_beef_calfs < 0, 0.0, new_beef_calfs)
+
+                # spare slaughter capacity spills over poultry -> pig -> cow
+                spill = current_total_poultry < current_poultry_slaughter
+                spare_slaughter_hours = (
+                    current_poultry_slaughter - current_total_poultry
+                ) * POULTRY_SLAUGHTER_HOURS
+                current_poultry_slaughter = np.where(
+                    spill, current_total_poultry, current_poultry_slaughter
+                )
+                current_pig_slaughter = np.where(
+                    spill,
+                    current_pig_slaughter
+                    + spare_slaughter_hours
+                    * skill_transfer_discount
+                    / PIG_SLAUGHTER_HOURS,
+                    current_pig_slaughter,
+                )
+                spill = current_total_pigs < current_pig_slaughter
+                spare_slaughter_hours = (
+                    current_pig_slaughter - current_total_pigs
+                ) * PIG_SLAUGHTER_HOURS
+                current_pig_slaughter = np.where(
+                    spill, current_total_pigs, current_pig_slaughter
+                )
+                current_cow_slaughter = np.where(
+                    spill,
+                    current_cow_slaughter
+                    + spare_slaughter_hours
+                    * skill_transfer_discount
+                    / COW_SLAUGHTER_HOURS,
+                    current_cow_slaughter,
+                )
+
+                # dairy cows are only slaughtered at the end of their life
+                current_dairy_slaughter = current_dairy_cattle / dairy_slaughter_months
+                current_beef_slaughter = current_cow_slaughter - current_dairy_slaughter
+                if capacity_sharing is not None:
+                    # spare capacity is split between linked regions by unmet need
+                    spare = np.maximum(current_beef_slaughter - current_beef_cattle, 0)
+                    unmet = np.maximum(current_beef_cattle - current_beef_slaughter, 0)
+                    offered = np.where(
+                        spare > 0, spare / (capacity_sharing @ unmet), 0.0
+                    )
+                    borrowed = np.minimum(
+                        unmet * np.nan_to_num(capacity_sharing @ offered), unmet
+                    )
+                    current_beef_slaughter = current_beef_slaughter + borrowed
+                actual_beef_slaughter = np.where(
+                    current_beef_cattle < current_beef_slaughter,
+                    current_beef_cattle,
+                    current_beef_slaughter,
+                )
+
+                other_beef_death = cow_death_rate * current_beef_cattle
+                other_dairy_death = cow_death_rate * current_dairy_cattle
+                other_pig_death = current_total_pigs * pig_death_rate
+                other_poultry_death = current_total_poultry * poultry_death_rate
+
+                current_beef_feed = current_beef_cattle * beef_cow_feed
+                current_dairy_feed = current_dairy_cattle * dairy_cow_feed
+                current_pig_feed = current_total_pigs * pig_feed_per_pig
+                current_poultry_feed = current_total_poultry * poultry_feed_per_bird
+                current_feed_combined = (
+                    current_beef_feed
+                    + current_dairy_feed
+                    + current_pig_feed
+                    + current_poultry_feed
+                )
+
+                row = out[:, j]
+                row[:, 0] = current_beef_cattle
+                row[:, 1] = new_beef_calfs
+                row[:, 2] = actual_beef_slaughter
+                row[:, 3] = actual_beef_slaughter * COW_SLAUGHTER_HOURS
+                row[:, 4] = row[:, 3] / total_slaughter_cap_hours
+                row[:, 5] = other_beef_death
+                row[:, 6] = current_beef_feed * FEED_UNIT_ADJUST
+                row[:, 7] = current_dairy_cattle
+                row[:, 8] = new_dairy_calfs_step
+                row[:, 9] = current_dairy_slaughter
+                row[:, 10] = current_dairy_slaughter * COW_SLAUGHTER_HOURS
+                row[:, 11] = row[:, 10] / total_slaughter_cap_hours
+                row[:, 12] = other_dairy_death
+                row[:, 13] = current_dairy_feed * FEED_UNIT_ADJUST
+                row[:, 14] = current_total_pigs
+                row[:, 15] = new_pigs
+                row[:, 16] = current_pig_slaughter
+                row[:, 17] = current_pig_slaughter * PIG_SLAUGHTER_HOURS
+                row[:, 18] = row[:, 17] / total_slaughter_cap_hours
+                row[:, 19] = current_pig_feed * FEED_UNIT_ADJUST
+                row[:, 20] = current_total_poultry
+                row[:, 21] = new_poultry_step
+                row[:, 22] = current_poultry_slaughter
+                row[:, 23] = current_poultry_slaughter * POULTRY_SLAUGHTER_HOURS
+                row[:, 24] = row[:, 23] / total_slaughter_cap_hours
+                row[:, 25] = current_poultry_feed * FEED_UNIT_ADJUST
+                row[:, 26] = current_feed_combined * FEED_UNIT_ADJUST
+                row[:, 27] = (baseline_feed - current_feed_combined) * FEED_UNIT_ADJUST
+                row[:, 28] = t
+
+                # sum up new totals
+                current_beef_cattle = current_beef_cattle + (
+                    new_beef_calfs - current_beef_slaughter - other_beef_death
+                )
+                current_dairy_cattle = current_dairy_cattle + (
+                    new_dairy_calfs_step - current_dairy_slaughter - other_dairy_death
+                )
+                current_total_poultry = current_total_poultry + (
+                    new_poultry_step - current_poultry_slaughter - other_poultry_death
+                )
+                current_total_pigs = current_total_pigs + (
+                    new_pigs - current_pig_slaughter - other_pig_death
+                )
+                current_pregnant_sows = current_pregnant_sows - mother_slaughter * (
+                    current_pig_slaughter + other_pig_death
+                )
+                current_pregnant_cows = current_pregnant_cows - mother_slaughter * (
+                    current_beef_slaughter + other_beef_death
+                )
+                current_beef_cattle = np.where(
+                    current_beef_cattle < 0, 0.0, current_beef_cattle
+                )
+                current_dairy_cattle = np.where(
+                    current_dairy_cattle < 0, 0.0, current_dairy_cattle
+                )
+            yield out
+
+
+def calculate_feed_and_animals_batch(sliders, animal_inputs, months=None):
+    """
+    Runs the animal feed model for many slider scenarios at once.
+
+    Arguments:
+        sliders (array-like or pd.DataFrame): (N, 9) slider values in
+            SLIDER_NAMES order, or a DataFrame with SLIDER_NAMES columns
+        animal_inputs (ModelAnimalInputs): wraps the InputDataAndSources dataframe
+        months (int): number of months to simulate, defaults to the largest
+            months slider
+
+    Returns:
+        np.ndarray: (N, months, len(METRIC_NAMES)) array of results, NaN past
+            each scenario's own months slider
+    """
+    return simulate_batch(sliders, batch_parameters(animal_inputs), months=months)
+
+
+def batch_result_frame(results, scenario):
+    """
+    Converts one scenario of a batch result to the model's DataFrame layout.
+
+    Arguments:
+        results (np.ndarray): (N, months, len(METRIC_NAMES)) batch results
+        scenario (int): index of the scenario to convert
+
+    Returns:
+        pd.DataFrame: one row per simulated month, columns as METRIC_NAMES
+    """
+    values = results[scenario]
+    return results_frame(values[~np.isnan(values[:, METRIC_INDEX["Month"]])])
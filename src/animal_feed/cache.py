@@ -0,0 +1,109 @@
+"""
+Bounded LRU cache of model results, keyed on the slider values.
+"""
+
+import threading
+from collections import OrderedDict
+
+# sliders are rounded to this many decimals so 100 and 100.0 share an entry
+SLIDER_KEY_DECIMALS = 6
+
+
+def slider_cache_key(sliders, animal_inputs):
+    """
+    Builds the cache key for one model run.
+
+    Arguments:
+        sliders (iterable): the nine slider values, in SLIDER_NAMES order
+        animal_inputs (ModelAnimalInputs): the animal inputs the model ran on
+
+    Returns:
+        tuple: normalised slider tuple followed by the identity of animal_inputs
+    """
+    normalised = tuple(round(float(value), SLIDER_KEY_DECIMALS) for value in sliders)
+    return normalised + (id(animal_inputs),)
+
+
+class ResultCache:
+    """
+    Thread safe least recently used cache with hit and miss counters.
+
+    Arguments:
+        maxsize (int): the maximum number of entries held, 0 disables caching
+    """
+
+    def __init__(self, maxsize=128):
+        if maxsize < 0:
+            raise ValueError(f"maxsize must be >= 0, got {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Looks up a key, marking it as most recently used.
+
+        Arguments:
+            key (hashable): the cache key
+
+        Returns:
+            object: the cached value, or None on a miss
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Stores a value, evicting the least recently used entry when full.
+
+        Arguments:
+            key (hashable): the cache key
+            value (object): the value to store
+
+        Returns:
+            object: the stored value
+        """
+        if self.maxsize == 0:
+            return value
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Reports the cache counters.
+
+        Returns:
+            dict: hits, misses, current size and maxsize
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,44 @@
+"""
+Inputs for the in-browser copy of the model in src/assets/animal_feed_model.js.
+
+The dashboard sends this payload once with the page when it runs clientside,
+so the browser holds the same input quantities and constants as the server.
+"""
+
+from . import batch
+from .model import METRIC_NAMES
+
+# batch module constants the javascript model reads from the payload
+CLIENTSIDE_CONSTANTS = (
+    "FEED_UNIT_ADJUST",
+    "CALVES_PER_MOTHER",
+    "DAIRY_LIFE_EXPECTANCY",
+    "OTHER_COW_DEATH_RATE",
+    "OTHER_PIG_DEATH_RATE",
+    "OTHER_POULTRY_DEATH_RATE",
+    "COW_SLAUGHTER_HOURS",
+    "PIG_SLAUGHTER_HOURS",
+    "POULTRY_SLAUGHTER_HOURS",
+    "BEEF_COW_FEED_PM_PER_COW",
+    "DAIRY_COW_FEED_PM_PER_COW",
+    "POULTRY_FEED_PM_PER_BIRD",
+    "PIG_FEED_PM_PER_PIG",
+)
+
+
+def model_payload(animal_inputs):
+    """
+    Collects everything the javascript model needs, as JSON friendly values.
+
+    Arguments:
+        animal_inputs (ModelAnimalInputs): wraps the InputDataAndSources dataframe
+
+    Returns:
+        dict: "params" keyed as in INPUT_ROWS, "constants" keyed as in
+            CLIENTSIDE_CONSTANTS and "metrics", the METRIC_NAMES column order
+    """
+    return {
+        "params": batch.batch_parameters(animal_inputs),
+        "constants": {name: getattr(batch, name) for name in CLIENTSIDE_CONSTANTS},
+        "metrics": list(METRIC_NAMES),
+    }
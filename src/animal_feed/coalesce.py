@@ -0,0 +1,122 @@
+"""
+Latest-wins scheduling of callback work per browser session.
+
+While a user drags a slider, each session queues many renders of which only
+the newest matters. Requests of one session run one at a time, and a request
+that was superseded while it waited is dropped without running. A result that
+was superseded while it ran is discarded too.
+
+This needs a server that handles several requests of a process at once, such
+as gunicorn with --threads (the Procfile runs four). A sync worker serves one
+request at a time, so no newer request can arrive while one waits and only the
+debounce delay would remain.
+"""
+
+import threading
+import time
+
+
+class Superseded(Exception):
+    """
+    Raised when a newer request of the same session replaced this one.
+    """
+
+
+class _Session:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latest = 0
+        self.pending = 0
+
+
+class LatestWins:
+    """
+    Runs callback work so that only the latest request of a session completes.
+
+    Sessions only coalesce within one process, so a session should stick to
+    one worker process for the best effect.
+
+    Arguments:
+        debounce (float): seconds a request waits before starting, giving newer
+            requests the chance to replace it
+    """
+
+    def __init__(self, debounce=0.0):
+        if debounce < 0:
+            raise ValueError(f"debounce must be >= 0, got {debounce}")
+        self.debounce = debounce
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.dropped = 0
+        self.discarded = 0
+
+    def run(self, session, func, *args, droppable=True):
+        """
+        Runs func for a session unless a newer request replaces it first.
+
+        Arguments:
+            session (hashable): identifies the browser session
+            func (callable): the work to run
+            *args: passed on to func
+            droppable (bool): False for work that must run even if superseded,
+                such as the first render of a page
+
+        Returns:
+            object: what func returns
+
+        Raises:
+            Superseded: if a newer request of the session replaced this one
+        """
+        with self._lock:
+            entry = self._sessions.setdefault(session, _Session())
+            entry.latest += 1
+            entry.pending += 1
+            ticket = entry.latest
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        started = False
+        try:
+            if self.debounce:
+                time.sleep(self.debounce)
+            with entry.lock:
+                with self._lock:
+                    self.waiting -= 1
+                    started = True
+                    if droppable and entry.latest != ticket:
+                        self.dropped += 1
+                        raise Superseded(session)
+                result = func(*args)
+                with self._lock:
+                    if droppable and entry.latest != ticket:
+                        self.discarded += 1
+                        raise Superseded(session)
+                    self.completed += 1
+            return result
+        finally:
+            with self._lock:
+                if not started:
+                    self.waiting -= 1
+                entry.pending -= 1
+                if entry.pending == 0:
+                    del self._sessions[session]
+
+    def stats(self):
+        """
+        Reports the scheduling counters.
+
+        Returns:
+            dict: requests waiting now and at most, completed runs, requests
+                dropped before running and results discarded after running
+        """
+        with self._lock:
+            return {
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "sessions": len(self._sessions),
+                "completed": self.completed,
+                "dropped": self.dropped,
+                "discarded": self.discarded,
+            }
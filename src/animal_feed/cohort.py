@@ -0,0 +1,444 @@
+"""
+Age structured version of the animal feed model.
+
+Instead of one head count per animal class, every class is held as cohorts
+indexed by age in time steps, in a fixed size ring buffer per species. Aging
+moves the start of the ring rather than the data, births enter at age zero
+and pregnancies run through a ring of their own, so births follow the breeding
+herd one gestation later. Slaughter takes the oldest animals that reached
+slaughter age first, and dairy cows leave the herd at the end of their
+productive life instead of at a fixed share of the herd per month.
+
+Every update is an array operation over the cohorts of all scenarios, so a
+step costs O(cohorts) and no Python loop runs over animals or ages.
+"""
+
+import numpy as np
+
+from .batch import (
+    INPUT_ROWS,
+    batch_parameters,
+    cattle_tracks,
+    slider_array,
+    slider_months,
+)
+from .constants import (
+    BEEF_COW_FEED_PM_PER_COW,
+    COW_SLAUGHTER_HOURS,
+    DAIRY_COW_FEED_PM_PER_COW,
+    DAIRY_LIFE_EXPECTANCY,
+    FEED_UNIT_ADJUST,
+    OTHER_COW_DEATH_RATE,
+    OTHER_PIG_DEATH_RATE,
+    OTHER_POULTRY_DEATH_RATE,
+    PIG_FEED_PM_PER_PIG,
+    PIG_SLAUGHTER_HOURS,
+    POULTRY_FEED_PM_PER_BIRD,
+    POULTRY_SLAUGHTER_HOURS,
+)
+from .inputs import load_animal_inputs
+from .model import METRIC_INDEX, METRIC_NAMES
+
+# age in months at which growing animals reach slaughter weight
+READY_AGE_MONTHS = {"beef": 18, "pig": 6, "poultry": 1.5}
+# oldest age class of growing animals, older ones stay in the last class
+MAX_AGE_MONTHS = {"beef": 30, "pig": 9, "poultry": 3}
+# dairy heifers join the milking herd at their first calving
+DAIRY_FIRST_CALVING_MONTHS = 24
+
+
+class CohortRing:
+    """
+    Head counts by age for many scenarios, in a fixed size ring buffer.
+
+    Age a of every scenario is stored in column (start + a) % ages, so aging
+    all cohorts by one step only moves start.
+
+    Arguments:
+        counts (np.ndarray): (N, ages) head count of each age class, youngest
+            first
+    """
+
+    def __init__(self, counts):
+        self.counts = np.array(counts, dtype=float)
+        self.ages = self.counts.shape[1]
+        self.start = 0
+
+    def columns(self, youngest=0):
+        """
+        Locates age classes in the buffer.
+
+        Arguments:
+            youngest (int): the first age class to locate
+
+        Returns:
+            np.ndarray: the buffer column of each age from youngest up
+        """
+        return (self.start + np.arange(youngest, self.ages)) % self.ages
+
+    def by_age(self):
+        """
+        np.ndarray: (N, ages) copy of the head counts, youngest first
+        """
+        return self.counts[:, self.columns()]
+
+    def total(self, youngest=0):
+        """
+        Counts the animals of some age or older.
+
+        Arguments:
+            youngest (int): the youngest age class to count
+
+        Returns:
+            np.ndarray: head count of every scenario
+        """
+        if youngest == 0:
+            return self.counts.sum(axis=1)
+        return self.counts[:, self.columns(youngest)].sum(axis=1)
+
+    def take_oldest(self, amount, youngest=0):
+        """
+        Removes animals oldest first, from the age classes of youngest or older.
+
+        Arguments:
+            amount (np.ndarray): head to remove from every scenario
+            youngest (int): the youngest age class to take from
+
+        Returns:
+            np.ndarray: head removed, less than amount where too few are old
+                enough
+        """
+        columns = self.columns(youngest)[::-1]
+        available = self.counts[:, columns]
+        before = np.cumsum(available, axis=1) - available
+        taken = np.clip(np.asarray(amount)[:, None] - before, 0, available)
+        self.counts[:, columns] = available - taken
+        return taken.sum(axis=1)
+
+    def advance(self, newborn, keep_oldest=True):
+        """
+        Ages every cohort by one step and adds the newborn at age zero.
+
+        Arguments:
+            newborn (np.ndarray): head entering age zero in every scenario
+            keep_oldest (bool): keep the oldest class in the buffer, merged
+                into the new oldest class, instead of letting it leave
+
+        Returns:
+            np.ndarray: head aged out of the buffer, zero with keep_oldest
+        """
+        column = (self.start - 1) % self.ages
+        leaving = self.counts[:, column].copy()
+        if keep_oldest and self.ages > 1:
+            self.counts[:, (self.start - 2) % self.ages] += leaving
+            leaving[:] = 0
+        self.counts[:, column] = newborn
+        self.start = column
+        return leaving
+
+
+def _age_steps(months, step):
+    return max(1, int(round(months / step)))
+
+
+def _steady_state(births, survival, ages, inventory, ready=None):
+    # cohorts of constant births thinned by deaths, younger than ready. The
+    # profile is scaled to the inventory, or only down to it with ready
+    profile = births[:, None] * survival ** np.arange(ages)
+    if ready is not None:
+        profile[:, ready:] = 0
+    scale = inventory / profile.sum(axis=1)
+    if ready is not None:
+        scale = np.minimum(scale, 1.0)
+    return profile * scale[:, None]
+
+
+def _share(value, baseline):
+    # value relative to its start, 1 where there was nothing to start with
+    return np.divide(value, baseline, out=np.ones_like(value), where=baseline > 0)
+
+
+def iter_cohorts(sliders, params, steps, step=1.0, chunk_steps=1024):
+    """
+    Advances slider scenarios through the age structured model in chunks.
+
+    Growing animals start in the steady state of the csv birth rates, the rest
+    of each inventory is the adult herd. Conceptions follow the breeding herd
+    and the breeding sliders cut them from the first step, so births fall one
+    gestation later. Unused slaughter capacity spills over poultry -> pig ->
+    cow within each step, and mother_slaughter is the percentage of pig and
+    beef slaughter taken from the breeding herd. Gestation parameters must be
+    scalars.
+
+    Arguments:
+        sliders (array-like): (N, 9) slider values in SLIDER_NAMES order, the
+            months slider is ignored
+        params (dict): model input quantities, keyed as in INPUT_ROWS
+        steps (int): number of time steps to simulate
+        step (float): length of a time step in months
+        chunk_steps (int): number of steps in each yielded chunk
+
+    Yields:
+        np.ndarray: (N, chunk_steps or fewer, len(METRIC_NAMES)) results, with
+            flows per step and populations at the start of each step
+    """
+    sliders = slider_array(sliders)
+    n = sliders.shape[0]
+    dt = float(step)
+
+    def per_scenario(value):
+        return np.broadcast_to(np.asarray(value, dtype=float), (n,)).copy()
+
+    p = {name: np.asarray(params[name], dtype=float) for name in INPUT_ROWS}
+    new_beef_calfs, new_dairy_calfs, cattle_in_beef_track, cattle_in_dairy_track = (
+        cattle_tracks(p)
+    )
+
+    # interventions, sliders from % to decimal
+    beef_breeding = 1 - sliders[:, 0] * 0.01
+    dairy_breeding = 1 - sliders[:, 1] * 0.01
+    increase_in_slaughter = sliders[:, 2] * 0.01
+    pig_breeding = 1 - sliders[:, 3] * 0.01
+    poultry_breeding = 1 - sliders[:, 4] * 0.01
+    skill_transfer_discount = (100 - sliders[:, 6]) / 100
+    mother_share = np.clip(sliders[:, 7] * 0.01, 0, 1)
+    use_grass_and_residues_for_dairy = sliders[:, 8]
+
+    # births per step before any intervention
+    beef_births = per_scenario(new_beef_calfs / 12 * dt)
+    dairy_births = per_scenario(new_dairy_calfs / 12 * dt)
+    pig_births = per_scenario(p["piglets_pm"] * dt)
+    poultry_births = per_scenario(p["poultry_slaughter_pm"] * dt)
+    cow_survival = 1 - OTHER_COW_DEATH_RATE * dt
+    pig_survival = 1 - OTHER_PIG_DEATH_RATE * dt
+    poultry_survival = 1 - OTHER_POULTRY_DEATH_RATE * dt
+
+    beef_ready = _age_steps(READY_AGE_MONTHS["beef"], dt)
+    pig_ready = _age_steps(READY_AGE_MONTHS["pig"], dt)
+    poultry_ready = _age_steps(READY_AGE_MONTHS["poultry"], dt)
+    dairy_calving = _age_steps(DAIRY_FIRST_CALVING_MONTHS, dt)
+    beef = CohortRing(
+        _steady_state(
+            beef_births,
+            cow_survival,
+            _age_steps(MAX_AGE_MONTHS["beef"], dt),
+            per_scenario(cattle_in_beef_track),
+            beef_ready,
+        )
+    )
+    pigs = CohortRing(
+        _steady_state(
+            pig_births,
+            pig_survival,
+            _age_steps(MAX_AGE_MONTHS["pig"], dt),
+            per_scenario(p["total_pigs"]),
+            pig_ready,
+        )
+    )
+    poultry = CohortRing(
+        _steady_state(
+            poultry_births,
+            poultry_survival,
+            _age_steps(MAX_AGE_MONTHS["poultry"], dt),
+            per_scenario(p["total_poultry"]),
+            poultry_ready,
+        )
+    )
+    # dairy females from birth to culling, the milking herd from first calving
+    dairy = CohortRing(
+        _steady_state(
+            dairy_births,
+            cow_survival,
+            _age_steps(DAIRY_FIRST_CALVING_MONTHS + DAIRY_LIFE_EXPECTANCY * 12, dt),
+            per_scenario(cattle_in_dairy_track),
+        )
+    )
+    # adults not raised for slaughter: beef cows and bulls, sows, breeder flocks
+    beef_herd = cattle_in_beef_track - beef.total()
+    pig_herd = p["total_pigs"] - pigs.total()
+    poultry_flock = p["total_poultry"] - poultry.total()
+    beef_herd_start = beef_herd.copy()
+    pig_herd_start = pig_herd.copy()
+    dairy_cows_start = dairy.total(dairy_calving)
+
+    # pregnancies under way, conceived at the csv birth rates
+    def pregnancies(births, gestation):
+        ages = _age_steps(float(gestation), dt)
+        return CohortRing(np.repeat(births[:, None], ages, axis=1))
+
+    beef_pregnancies = pregnancies(beef_births, p["cow_gestation"])
+    dairy_pregnancies = pregnancies(dairy_births, p["cow_gestation"])
+    pig_pregnancies = pregnancies(pig_births, p["pig_gestation"])
+    poultry_pregnancies = pregnancies(poultry_births, p["poultry_gestation"])
+
+    # slaughter capacity per step, scaled by the slaughter slider
+    cow_capacity = p["cow_slaughter_pm"] * increase_in_slaughter * dt
+    pig_capacity = p["pigs_slaughter_pm"] * increase_in_slaughter * dt
+    poultry_capacity = p["poultry_slaughter_pm"] * increase_in_slaughter * dt
+    total_slaughter_cap_hours = (
+        cow_capacity * COW_SLAUGHTER_HOURS
+        + pig_capacity * PIG_SLAUGHTER_HOURS
+        + poultry_capacity * POULTRY_SLAUGHTER_HOURS
+    )
+
+    beef_cow_feed = BEEF_COW_FEED_PM_PER_COW * dt
+    dairy_cow_feed = (
+        np.where(use_grass_and_residues_for_dairy != 0, 0.0, DAIRY_COW_FEED_PM_PER_COW)
+        * dt
+    )
+    pig_feed_per_pig = PIG_FEED_PM_PER_PIG * dt
+    poultry_feed_per_bird = POULTRY_FEED_PM_PER_BIRD * dt
+    baseline_feed = (
+        (poultry.total() + poultry_flock) * poultry_feed_per_bird
+        + (pigs.total() + pig_herd) * pig_feed_per_pig
+        + (beef.total() + beef_herd) * beef_cow_feed
+        + dairy.total() * dairy_cow_feed
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start in range(0, steps, chunk_steps):
+            out = np.empty((n, min(chunk_steps, steps - start), len(METRIC_NAMES)))
+            for j in range(out.shape[1]):
+                beef_pop = beef.total() + beef_herd
+                dairy_pop = dairy.total()
+                pig_pop = pigs.total() + pig_herd
+                poultry_pop = poultry.total() + poultry_flock
+
+                # conceptions follow the breeding herd, births come a gestation later
+                beef_born = beef_pregnancies.advance(
+                    beef_births * _share(beef_herd, beef_herd_start) * beef_breeding,
+                    keep_oldest=False,
+                )
+                dairy_born = dairy_pregnancies.advance(
+                    dairy_births
+                    * _share(dairy.total(dairy_calving), dairy_cows_start)
+                    * dairy_breeding,
+                    keep_oldest=False,
+                )
+                pig_born = pig_pregnancies.advance(
+                    pig_births * _share(pig_herd, pig_herd_start) * pig_breeding,
+                    keep_oldest=False,
+                )
+                poultry_born = poultry_pregnancies.advance(
+                    poultry_births * poultry_breeding, keep_oldest=False
+                )
+
+                # deaths, then every cohort ages a step and the newborn arrive
+                beef_death = (beef.total() + beef_herd) * (1 - cow_survival)
+                dairy_death = dairy.total() * (1 - cow_survival)
+                beef.counts *= cow_survival
+                beef_herd = beef_herd * cow_survival
+                dairy.counts *= cow_survival
+                pigs.counts *= pig_survival
+                pig_herd = pig_herd * pig_survival
+                poultry.counts *= poultry_survival
+                poultry_flock = poultry_flock * poultry_survival
+                beef.advance(beef_born)
+                pigs.advance(pig_born)
+                poultry.advance(poultry_born)
+                # dairy cows aging out of the ring reached the end of their life
+                dairy_slaughtered = dairy.advance(dairy_born, keep_oldest=False)
+
+                # animals that reached slaughter age go oldest first, unused
+                # slaughter capacity spills over poultry -> pig -> cow
+                poultry_slaughtered = poultry.take_oldest(
+                    poultry_capacity, poultry_ready
+                )
+                spare_slaughter_hours = (
+                    poultry_capacity - poultry_slaughtered
+                ) * POULTRY_SLAUGHTER_HOURS
+                capacity = (
+                    pig_capacity
+                    + spare_slaughter_hours
+                    * skill_transfer_discount
+                    / PIG_SLAUGHTER_HOURS
+                )
+                sows_slaughtered = np.minimum(capacity * mother_share, pig_herd)
+                pig_herd = pig_herd - sows_slaughtered
+                pig_slaughtered = sows_slaughtered + pigs.take_oldest(
+                    capacity - sows_slaughtered, pig_ready
+                )
+                spare_slaughter_hours = (
+                    capacity - pig_slaughtered
+                ) * PIG_SLAUGHTER_HOURS
+                capacity = (
+                    cow_capacity
+                    + spare_slaughter_hours
+                    * skill_transfer_discount
+                    / COW_SLAUGHTER_HOURS
+                )
+                # culled dairy cows use cow capacity first
+                capacity = np.maximum(capacity - dairy_slaughtered, 0)
+                mothers_slaughtered = np.minimum(capacity * mother_share, beef_herd)
+                beef_herd = beef_herd - mothers_slaughtered
+                beef_slaughtered = mothers_slaughtered + beef.take_oldest(
+                    capacity - mothers_slaughtered, beef_ready
+                )
+
+                beef_feed = beef_pop * beef_cow_feed
+                dairy_feed = dairy_pop * dairy_cow_feed
+                pig_feed = pig_pop * pig_feed_per_pig
+                poultry_feed = poultry_pop * poultry_feed_per_bird
+                feed_combined = beef_feed + dairy_feed + pig_feed + poultry_feed
+
+                row = out[:, j]
+                row[:, 0] = beef_pop
+                row[:, 1] = beef_born
+                row[:, 2] = beef_slaughtered
+                row[:, 3] = beef_slaughtered * COW_SLAUGHTER_HOURS
+                row[:, 4] = row[:, 3] / total_slaughter_cap_hours
+                row[:, 5] = beef_death
+                row[:, 6] = beef_feed * FEED_UNIT_ADJUST
+                row[:, 7] = dairy_pop
+                row[:, 8] = dairy_born
+                row[:, 9] = dairy_slaughtered
+                row[:, 10] = dairy_slaughtered * COW_SLAUGHTER_HOURS
+                row[:, 11] = row[:, 10] / total_slaughter_cap_hours
+                row[:, 12] = dairy_death
+                row[:, 13] = dairy_feed * FEED_UNIT_ADJUST
+                row[:, 14] = pig_pop
+                row[:, 15] = pig_born
+                row[:, 16] = pig_slaughtered
+                row[:, 17] = pig_slaughtered * PIG_SLAUGHTER_HOURS
+                row[:, 18] = row[:, 17] / total_slaughter_cap_hours
+                row[:, 19] = pig_feed * FEED_UNIT_ADJUST
+                row[:, 20] = poultry_pop
+                row[:, 21] = poultry_born
+                row[:, 22] = poultry_slaughtered
+                row[:, 23] = poultry_slaughtered * POULTRY_SLAUGHTER_HOURS
+                row[:, 24] = row[:, 23] / total_slaughter_cap_hours
+                row[:, 25] = poultry_feed * FEED_UNIT_ADJUST
+                row[:, 26] = feed_combined * FEED_UNIT_ADJUST
+                row[:, 27] = (baseline_feed - feed_combined) * FEED_UNIT_ADJUST
+                row[:, 28] = (start + j) * dt
+            yield out
+
+
+def simulate_cohorts(sliders, animal_inputs=None, months=None):
+    """
+    Runs the age structured model for slider scenarios, in monthly steps.
+
+    Arguments:
+        sliders (array-like): (N, 9) slider values in SLIDER_NAMES order
+        animal_inputs (ModelAnimalInputs): loaded from the data folder by default
+        months (int): number of months to simulate, defaults to the largest
+            months slider. Months past a scenario's own months slider are NaN
+
+    Returns:
+        np.ndarray: (N, months, len(METRIC_NAMES)) array of results
+
+    Raises:
+        ValueError: if a months slider is not a whole number of at least 0
+    """
+    sliders = slider_array(sliders)
+    horizon = slider_months(sliders)
+    if months is None:
+        months = int(horizon.max()) if len(sliders) else 0
+    params = batch_parameters(animal_inputs or load_animal_inputs())
+    out = np.empty((len(sliders), months, len(METRIC_NAMES)))
+    # a single chunk holds every month
+    for out in iter_cohorts(sliders, params, months, chunk_steps=max(months, 1)):
+        pass
+    out[:, :, METRIC_INDEX["Month"]] = np.arange(months)
+    out[np.arange(months)[None, :] >= horizon[:, None]] = np.nan
+    return out
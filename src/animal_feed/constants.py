@@ -0,0 +1,33 @@
+"""
+Hardcoded constants of the animal feed model.
+
+calculate_feed_and_animals, the batch engine and the derived inputs of
+ModelAnimalInputs all read them from here, so they cannot drift apart.
+"""
+
+# convert tons to kcals (ASSUME CALORIC DENSITY IS HALF MAIZE, HALF SOYBEAN)
+TONS_TO_KCALS = (3560 + 3350) / 2 * 1000
+KCALS_TO_BILLION_KCALS = 1e-9
+# convert pounds to tonnes to billions of kcals
+FEED_UNIT_ADJUST = 0.000453592 * TONS_TO_KCALS * KCALS_TO_BILLION_KCALS
+
+CALVES_PER_MOTHER = 1
+DAIRY_LIFE_EXPECTANCY = 5  # years
+
+# per month values
+OTHER_COW_DEATH_RATE = 0.005  # from USDA
+OTHER_PIG_DEATH_RATE = 0.005  # from USDA
+OTHER_POULTRY_DEATH_RATE = 0.005
+
+# resources/hours of single person hours for slaughter of one animal
+COW_SLAUGHTER_HOURS = 4
+PIG_SLAUGHTER_HOURS = 4
+POULTRY_SLAUGHTER_HOURS = 0.08
+
+# these feed numbers are top down, calculations in google sheet, working
+# backwards from total feed used and dividing it evenly amongst the animal
+# populations, in lbs per month
+BEEF_COW_FEED_PM_PER_COW = 137.3117552
+DAIRY_COW_FEED_PM_PER_COW = 448.3820431
+POULTRY_FEED_PM_PER_BIRD = 4.763762808
+PIG_FEED_PM_PER_PIG = 141.8361586
@@ -0,0 +1,262 @@
+"""
+Columnar cache of the raw USDA csv exports in data/usda_other_data.
+
+Each csv is parsed once into typed columns: thousands separators are stripped,
+withheld values such as (D) become NaN and date columns become datetime64. Each
+build saves the columns as .npy files in a fresh directory of the entry and
+then atomically replaces the entry's manifest.json to point at it, so
+processes building the same entry at once never see each other's partial
+files. Later loads memory map the columns instead of parsing the csv again. An
+entry is rebuilt when the source file's size or modification time changes and
+its content hash no longer matches the manifest.
+
+Run `python -m animal_feed.datacache` to build every entry ahead of time.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .inputs import DATA_PATH
+
+USDA_PATH = DATA_PATH.joinpath("usda_other_data")
+CACHE_PATH = pathlib.Path(
+    os.environ.get("ANIMAL_FEED_DATA_CACHE", DATA_PATH.joinpath(".cache"))
+)
+# bump when the normalisation changes so existing entries are rebuilt
+FORMAT_VERSION = 3
+MANIFEST = "manifest.json"
+# the date formats of the USDA exports, tried in turn for each date column
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y")
+
+
+def file_digest(path):
+    """
+    Hashes a file's content.
+
+    Arguments:
+        path (pathlib.Path): the file to hash
+
+    Returns:
+        str: the sha256 hex digest
+    """
+    return hashlib.sha256(pathlib.Path(path).read_bytes()).hexdigest()
+
+
+def _is_quickstats(columns):
+    # USDA QuickStats exports share this fixed header
+    return {"Program", "Year", "Period", "Data Item", "Value"} <= set(columns)
+
+
+def read_normalised_csv(path):
+    """
+    Parses a raw USDA csv into typed columns.
+
+    QuickStats exports have their empty columns dropped and Value and CV (%)
+    parsed as numbers. Other files have thousands separators stripped from
+    numeric columns. Columns with "date" in their name are parsed as dates with
+    the first of DATE_FORMATS every value parses with.
+
+    Arguments:
+        path (pathlib.Path): the csv file
+
+    Returns:
+        pd.DataFrame: the normalised table
+    """
+    frame = pd.read_csv(path, thousands=",", encoding="utf-8-sig")
+    if _is_quickstats(frame.columns):
+        text = frame.select_dtypes(exclude="number").columns
+        frame[text] = frame[text].apply(lambda column: column.str.strip())
+        frame = frame.replace("", np.nan).dropna(axis=1, how="all")
+        for column in ("Value", "CV (%)"):
+            if column in frame:
+                text = frame[column].astype(str).str.replace(",", "").str.strip()
+                frame[column] = pd.to_numeric(text, errors="coerce")
+    for column in frame.columns:
+        if "date" in column.lower() and not pd.api.types.is_numeric_dtype(
+            frame[column]
+        ):
+            for date_format in DATE_FORMATS:
+                parsed = pd.to_datetime(
+                    frame[column], errors="coerce", format=date_format
+                )
+                if parsed.notna().sum() == frame[column].notna().sum():
+                    frame[column] = parsed
+                    break
+    return frame
+
+
+def _column_array(values):
+    # object and string columns become fixed width unicode so they can be mapped
+    if values.dtype.kind in "biufcM":
+        return np.asarray(values)
+    return np.asarray(values.astype(object).where(values.notna(), "")).astype(str)
+
+
+def _save_entry(frame, directory, source, digest):
+    directory.mkdir(parents=True, exist_ok=True)
+    # a directory of its own, so concurrent builds never share a file
+    build = pathlib.Path(tempfile.mkdtemp(prefix="build-", dir=directory))
+    columns = []
+    for index, name in enumerate(frame.columns):
+        filename = f"column_{index:03d}.npy"
+        array = _column_array(frame[name])
+        np.save(build.joinpath(filename), array)
+        columns.append({"name": name, "file": filename, "dtype": array.dtype.str})
+    stat = source.stat()
+    manifest = {
+        "format": FORMAT_VERSION,
+        "source": source.name,
+        "sha256": digest,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "rows": len(frame),
+        "build": build.name,
+        "columns": columns,
+    }
+    _write_manifest(directory, manifest)
+    return manifest
+
+
+def _write_manifest(directory, manifest):
+    # written under a unique name and swapped in, readers see the old or new one
+    handle, temporary = tempfile.mkstemp(prefix=MANIFEST, suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(handle, "w") as file:
+            json.dump(manifest, file, indent=1)
+        os.replace(temporary, directory.joinpath(MANIFEST))
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def _read_manifest(directory):
+    try:
+        return json.loads(directory.joinpath(MANIFEST).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def source_entry_dir(source, cache_dir):
+    """
+    Locates the cache entry of a source file.
+
+    Arguments:
+        source (pathlib.Path): the csv file
+        cache_dir (pathlib.Path): the cache root, CACHE_PATH by default
+
+    Returns:
+        pathlib.Path: the directory holding the entry's manifest and columns
+    """
+    return pathlib.Path(cache_dir or CACHE_PATH).joinpath(pathlib.Path(source).name)
+
+
+def _is_fresh(manifest, source, directory):
+    if manifest is None or manifest.get("format") != FORMAT_VERSION:
+        return False
+    stat = source.stat()
+    if (manifest["size"], manifest["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+        return True
+    if manifest["size"] != stat.st_size or manifest["sha256"] != file_digest(source):
+        return False
+    # touched but unchanged, remember the new mtime so the hash is skipped
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    _write_manifest(directory, manifest)
+    return True
+
+
+def build_entry(source, cache_dir=None, force=False):
+    """
+    Makes sure the cache entry of a source file is up to date.
+
+    Arguments:
+        source (pathlib.Path): the csv file
+        cache_dir (pathlib.Path): the cache root, CACHE_PATH by default
+        force (bool): rebuild even if the entry is fresh
+
+    Returns:
+        tuple: (manifest dict, whether the entry was rebuilt)
+    """
+    source = pathlib.Path(source)
+    directory = source_entry_dir(source, cache_dir)
+    manifest = _read_manifest(directory)
+    if not force and _is_fresh(manifest, source, directory):
+        return manifest, False
+    frame = read_normalised_csv(source)
+    rebuilt = _save_entry(frame, directory, source, file_digest(source))
+    if manifest is not None and manifest.get("build"):
+        # the build this one replaced. Builds left by a concurrent rebuild are
+        # kept, as another process may still be loading them
+        shutil.rmtree(directory.joinpath(manifest["build"]), ignore_errors=True)
+    return rebuilt, True
+
+
+def load_table(source, cache_dir=None):
+    """
+    Loads a csv through the columnar cache, building the entry if needed.
+
+    Numeric and date columns are memory mapped read only, missing text loads as
+    an empty string. If the cache cannot be written or read, for instance as a
+    rebuild in another process removed the columns, the csv is parsed directly.
+
+    Arguments:
+        source (pathlib.Path): the csv file
+        cache_dir (pathlib.Path): the cache root, CACHE_PATH by default
+
+    Returns:
+        pd.DataFrame: the normalised table
+    """
+    try:
+        manifest, _ = build_entry(source, cache_dir)
+        build = source_entry_dir(source, cache_dir).joinpath(manifest["build"])
+        columns = {
+            column["name"]: np.load(build.joinpath(column["file"]), mmap_mode="r")
+            for column in manifest["columns"]
+        }
+    except OSError:
+        return read_normalised_csv(source)
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_usda_table(filename, cache_dir=None):
+    """
+    Loads one of the csv files in data/usda_other_data through the cache.
+
+    Arguments:
+        filename (str): name of the file in data/usda_other_data
+        cache_dir (pathlib.Path): the cache root, CACHE_PATH by default
+
+    Returns:
+        pd.DataFrame: the normalised table
+    """
+    return load_table(USDA_PATH.joinpath(filename), cache_dir)
+
+
+def ingest(directory=USDA_PATH, cache_dir=None, force=False):
+    """
+    Builds the cache entry of every csv in a directory.
+
+    Arguments:
+        directory (pathlib.Path): the folder of csv files
+        cache_dir (pathlib.Path): the cache root, CACHE_PATH by default
+        force (bool): rebuild entries even if they are fresh
+
+    Returns:
+        dict: file name to whether its entry was rebuilt
+    """
+    return {
+        source.name: build_entry(source, cache_dir, force)[1]
+        for source in sorted(pathlib.Path(directory).glob("*.csv"))
+    }
+
+
+if __name__ == "__main__":
+    for name, rebuilt in ingest(force="--force" in sys.argv).items():
+        print(f"{'built' if rebuilt else 'fresh'}  {name}")
@@ -0,0 +1,138 @@
+"""
+Process pool scenario farm sharing its inputs and results through memory.
+
+The slider scenarios, the model input quantities and a preallocated results
+array are placed in multiprocessing.shared_memory blocks. Workers attach to
+the blocks once when they start, then receive only (start, stop) index ranges
+and write each range's results in place, so nothing but the ranges crosses
+between processes and no worker reads InputDataAndSources.csv.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .batch import INPUT_ROWS, batch_parameters, simulate_batch, slider_array
+from .inputs import load_animal_inputs
+from .model import METRIC_NAMES
+
+# the worker's views of the shared blocks, set by _attach
+_shared = {}
+
+
+@dataclass
+class FarmRun:
+    """
+    The results and throughput of a run_farm call.
+
+    Arguments:
+        results (np.ndarray): (N, months, len(METRIC_NAMES)) results, NaN past
+            each scenario's own months slider
+        workers (int): worker processes used, 0 when run in this process
+        elapsed (float): wall time of the run in seconds, without the set up
+    """
+
+    results: np.ndarray
+    workers: int
+    elapsed: float
+
+    @property
+    def scenarios_per_second(self):
+        """
+        float: scenarios completed per second of wall time
+        """
+        return len(self.results) / self.elapsed if self.elapsed else float("inf")
+
+
+def _create_block(shape, blocks, values=None):
+    # makes a zero filled shared float64 block, keeping it for clean up
+    block = shared_memory.SharedMemory(
+        create=True, size=max(int(np.prod(shape)) * 8, 1)
+    )
+    blocks.append(block)
+    if values is not None:
+        np.ndarray(shape, np.float64, buffer=block.buf)[...] = values
+    return block.name, shape
+
+
+def _attach(layout):
+    # worker initializer, maps every shared block once per process
+    for key, (name, shape) in layout.items():
+        block = shared_memory.SharedMemory(name=name)
+        _shared[key] = (block, np.ndarray(shape, np.float64, buffer=block.buf))
+
+
+def _run_range(bounds, sliders, params, results):
+    start, stop = bounds
+    results[start:stop] = simulate_batch(sliders[start:stop], params, results.shape[1])
+    return stop - start
+
+
+def _run_shared_range(bounds):
+    # worker entry point, writes the results of one range in place
+    params = dict(zip(INPUT_ROWS, _shared["inputs"][1].tolist()))
+    return _run_range(bounds, _shared["sliders"][1], params, _shared["results"][1])
+
+
+def run_farm(sliders, animal_inputs=None, months=None, workers=None, chunk_size=2048):
+    """
+    Runs slider scenarios on a process pool sharing memory with this process.
+
+    Arguments:
+        sliders (array-like): (N, 9) slider values in SLIDER_NAMES order
+        animal_inputs (ModelAnimalInputs): loaded from the data folder by default
+        months (int): number of months to simulate, defaults to the largest
+            months slider
+        workers (int): worker processes, defaults to the CPU count, 0 runs every
+            range in this process
+        chunk_size (int): scenarios in each index range given to a worker
+
+    Returns:
+        FarmRun: the results, which stay valid after the shared blocks are
+            released, and the throughput
+    """
+    sliders = slider_array(sliders)
+    params = batch_parameters(animal_inputs or load_animal_inputs())
+    if months is None:
+        months = int(sliders[:, 5].max()) if len(sliders) else 0
+    ranges = [
+        (start, min(start + chunk_size, len(sliders)))
+        for start in range(0, len(sliders), chunk_size)
+    ]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(ranges))
+    if workers == 0:
+        results = np.empty((len(sliders), months, len(METRIC_NAMES)))
+        start_time = time.perf_counter()
+        for bounds in ranges:
+            _run_range(bounds, sliders, params, results)
+        return FarmRun(results, 0, time.perf_counter() - start_time)
+
+    blocks = []
+    try:
+        inputs = [params[name] for name in INPUT_ROWS]
+        layout = {
+            "inputs": _create_block((len(inputs),), blocks, inputs),
+            "sliders": _create_block(sliders.shape, blocks, sliders),
+            "results": _create_block((len(sliders), months, len(METRIC_NAMES)), blocks),
+        }
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_attach, initargs=(layout,)
+        ) as executor:
+            # start the workers before timing, so attaching is mostly not counted
+            list(executor.map(_run_shared_range, [(0, 0)] * workers))
+            start_time = time.perf_counter()
+            list(executor.map(_run_shared_range, ranges))
+            elapsed = time.perf_counter() - start_time
+        shape = layout["results"][1]
+        results = np.ndarray(shape, np.float64, buffer=blocks[-1].buf).copy()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return FarmRun(results, workers, elapsed)
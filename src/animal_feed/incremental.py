@@ -0,0 +1,271 @@
+"""
+Incremental model runs that resume a trajectory instead of starting over.
+
+An IncrementalModel keeps the results of its last run and the state the
+recurrence carried into every month. Each slider is first used by the
+recurrence at a month worked out by first_affected_month: the calf and
+breeding reductions at their animal's gestation month, the discount rate at
+the first month spare slaughter capacity moves between animals, and the other
+sliders from month 0. A run with new slider values keeps the months before the
+earliest change takes effect and resumes kernel.month_recurrence from the
+state recorded there, and a longer months slider only extends the trajectory.
+The results are identical to calculate_feed_and_animals with the kernel
+backend.
+"""
+
+import math
+import threading
+
+import numpy as np
+
+from . import kernel
+from .constants import (
+    BEEF_COW_FEED_PM_PER_COW,
+    CALVES_PER_MOTHER,
+    COW_SLAUGHTER_HOURS,
+    DAIRY_COW_FEED_PM_PER_COW,
+    DAIRY_LIFE_EXPECTANCY,
+    FEED_UNIT_ADJUST,
+    OTHER_COW_DEATH_RATE,
+    OTHER_PIG_DEATH_RATE,
+    OTHER_POULTRY_DEATH_RATE,
+    PIG_FEED_PM_PER_PIG,
+    PIG_SLAUGHTER_HOURS,
+    POULTRY_FEED_PM_PER_BIRD,
+    POULTRY_SLAUGHTER_HOURS,
+)
+from .inputs import load_animal_inputs
+from .model import METRIC_NAMES, RESULT_DTYPE, SLIDER_NAMES, results_frame
+
+
+def gestation_month(gestation):
+    """
+    Finds the first month the recurrence applies a reduction at a gestation.
+
+    Arguments:
+        gestation (float): the gestation length in months
+
+    Returns:
+        int: the first month i with abs(i - gestation) <= 0.5, or 0 if there is
+            none
+    """
+    month = max(math.floor(gestation - 0.5), 0)
+    while abs(month - gestation) > 0.5 and month <= gestation:
+        month += 1
+    return month
+
+
+def first_affected_month(name, animal_inputs, first_spillover):
+    """
+    Finds the first month of the recurrence a slider is used in.
+
+    Arguments:
+        name (str): one of SLIDER_NAMES other than months
+        animal_inputs (ModelAnimalInputs): the inputs the model runs on
+        first_spillover (int): the first month spare slaughter capacity moved
+            to another animal in the trajectory being resumed
+
+    Returns:
+        int: the month, every earlier month is the same whatever the slider
+    """
+    if name in ("reduction_in_beef_calves", "reduction_in_dairy_calves"):
+        return gestation_month(animal_inputs.cow_gestation)
+    if name == "reduction_in_pig_breeding":
+        return gestation_month(animal_inputs.pig_gestation)
+    if name == "reduction_in_poultry_breeding":
+        return gestation_month(animal_inputs.poultry_gestation)
+    if name == "discount_rate":
+        return first_spillover
+    # slaughter capacity, mother slaughter and dairy feed are used every month
+    return 0
+
+
+def recurrence_arguments(sliders, animal_inputs):
+    """
+    Works out the month_recurrence arguments of a run from month 0.
+
+    Arguments:
+        sliders (iterable): the nine slider values, in SLIDER_NAMES order
+        animal_inputs (ModelAnimalInputs): the inputs the model runs on
+
+    Returns:
+        np.ndarray: the float64 arguments between step and results, as
+            calculate_feed_and_animals passes them
+    """
+    (
+        reduction_in_beef_calves,
+        reduction_in_dairy_calves,
+        increase_in_slaughter,
+        reduction_in_pig_breeding,
+        reduction_in_poultry_breeding,
+        _,
+        discount_rate,
+        mother_slaughter,
+        use_grass_and_residues_for_dairy,
+    ) = sliders
+    increase_in_slaughter *= 0.01
+    if use_grass_and_residues_for_dairy:
+        dairy_cow_feed_pm_per_cow = 0
+    else:
+        dairy_cow_feed_pm_per_cow = DAIRY_COW_FEED_PM_PER_COW
+    skill_transfer_discount = (100 - discount_rate) / 100
+    return np.array(
+        [
+            reduction_in_beef_calves * 0.01,
+            reduction_in_dairy_calves * 0.01,
+            reduction_in_pig_breeding * 0.01,
+            reduction_in_poultry_breeding * 0.01,
+            animal_inputs.cow_gestation,
+            animal_inputs.pig_gestation,
+            animal_inputs.poultry_gestation,
+            animal_inputs.piglets_per_litter,
+            CALVES_PER_MOTHER,
+            animal_inputs.new_dairy_calfs_pm,
+            animal_inputs.poultry_slaughter_pm,
+            animal_inputs.pregnant_sows,
+            animal_inputs.pregnant_cows,
+            animal_inputs.cattle_in_beef_track,
+            animal_inputs.cattle_in_dairy_track,
+            animal_inputs.total_pigs,
+            animal_inputs.total_poultry,
+            animal_inputs.cow_slaughter_pm * increase_in_slaughter,
+            animal_inputs.pigs_slaughter_pm * increase_in_slaughter,
+            animal_inputs.poultry_slaughter_pm * increase_in_slaughter,
+            animal_inputs.slaughter_cap_hours * increase_in_slaughter,
+            COW_SLAUGHTER_HOURS,
+            PIG_SLAUGHTER_HOURS,
+            POULTRY_SLAUGHTER_HOURS,
+            skill_transfer_discount,
+            skill_transfer_discount,
+            mother_slaughter,
+            mother_slaughter,
+            DAIRY_LIFE_EXPECTANCY,
+            OTHER_COW_DEATH_RATE,
+            OTHER_PIG_DEATH_RATE,
+            OTHER_POULTRY_DEATH_RATE,
+            BEEF_COW_FEED_PM_PER_COW,
+            dairy_cow_feed_pm_per_cow,
+            PIG_FEED_PM_PER_PIG,
+            POULTRY_FEED_PM_PER_BIRD,
+            animal_inputs.baseline_feed_without_dairy
+            + animal_inputs.cattle_in_dairy_track * dairy_cow_feed_pm_per_cow,
+            FEED_UNIT_ADJUST,
+        ],
+        dtype=float,
+    )
+
+
+class IncrementalModel:
+    """
+    One scenario's trajectory, rerun from the first month a change affects.
+
+    Runs use kernel.month_recurrence, compiled when numba is installed, and
+    take no hooks. Safe to share between threads, runs are serialised.
+
+    Arguments:
+        animal_inputs (ModelAnimalInputs): loaded from the data folder by default
+    """
+
+    def __init__(self, animal_inputs=None):
+        self.animal_inputs = animal_inputs or load_animal_inputs()
+        self.sliders = None
+        self.months_computed = 0
+        self.months_reused = 0
+        # months of the buffers holding the trajectory of self.sliders
+        self._valid = 0
+        self._first_spillover = 0
+        self._results = np.empty((0, len(METRIC_NAMES)))
+        self._states = np.empty((1, len(kernel.STATE_NAMES)))
+        self._lock = threading.Lock()
+
+    def resume_month(self, sliders):
+        """
+        Finds the first month a run with new slider values has to recompute.
+
+        Arguments:
+            sliders (iterable): the nine slider values, in SLIDER_NAMES order
+
+        Returns:
+            int: the number of months of the kept trajectory still valid
+        """
+        if self.sliders is None:
+            return 0
+        month = self._valid
+        for name, old, new in zip(SLIDER_NAMES, self.sliders, sliders):
+            if name != "months" and old != float(new):
+                month = min(
+                    month,
+                    first_affected_month(
+                        name, self.animal_inputs, self._first_spillover
+                    ),
+                )
+        return month
+
+    def _reserve(self, months):
+        # grows the buffers to hold months, doubling, and keeps the valid rows
+        if months <= len(self._results):
+            return
+        size = max(months, 2 * len(self._results))
+        results = np.empty((size, len(METRIC_NAMES)))
+        results[: self._valid] = self._results[: self._valid]
+        states = np.empty((size + 1, len(kernel.STATE_NAMES)))
+        states[: self._valid + 1] = self._states[: self._valid + 1]
+        self._results, self._states = results, states
+
+    def run(self, sliders, as_frame=True):
+        """
+        Simulates a slider state, reusing the months it leaves unchanged.
+
+        Arguments:
+            sliders (iterable): the nine slider values, in SLIDER_NAMES order
+            as_frame (bool): return a DataFrame, or the raw record array when
+                False
+
+        Returns:
+            pd.DataFrame or np.ndarray: one row per month, columns as
+                METRIC_NAMES, as calculate_feed_and_animals returns them
+        """
+        sliders = tuple(float(value) for value in sliders)
+        months = int(sliders[SLIDER_NAMES.index("months")])
+        with self._lock:
+            start = self.resume_month(sliders)
+            if months > start:
+                self._reserve(months)
+                arguments = recurrence_arguments(sliders, self.animal_inputs)
+                if start > 0:
+                    arguments[kernel.STATE_ARGUMENTS] = self._states[start]
+                first_spillover = kernel.month_recurrence(
+                    start,
+                    months,
+                    1.0,
+                    *arguments,
+                    self._results[start:],
+                    self._states[start:],
+                )
+                if self._first_spillover >= start:
+                    self._first_spillover = first_spillover
+                self._valid = months
+            else:
+                # months past start may have changed, and are not kept
+                self._valid = start
+                self._first_spillover = min(self._first_spillover, start)
+            self.months_computed += max(months - start, 0)
+            self.months_reused += min(months, start)
+            self.sliders = sliders
+            results = self._results[:months].copy()
+        if not as_frame:
+            return results.view(RESULT_DTYPE)[:, 0]
+        return results_frame(results)
+
+    def stats(self):
+        """
+        Reports how much of the trajectory runs have recomputed.
+
+        Returns:
+            dict: months simulated and months reused over every run
+        """
+        with self._lock:
+            return {
+                "months_computed": self.months_computed,
+                "months_reused": self.months_reused,
+            }
@@ -0,0 +1,309 @@
+"""
+Model input classes and loaders for the CSVs in the data folder.
+
+Files are read on first use and cached, so importing the package does no I/O.
+"""
+
+import functools
+import hashlib
+import json
+import pathlib
+import re
+
+import numpy as np
+import pandas as pd
+
+from .batch import INPUT_ROWS, cattle_tracks
+from .constants import (
+    BEEF_COW_FEED_PM_PER_COW,
+    CALVES_PER_MOTHER,
+    COW_SLAUGHTER_HOURS,
+    PIG_FEED_PM_PER_PIG,
+    PIG_SLAUGHTER_HOURS,
+    POULTRY_FEED_PM_PER_BIRD,
+    POULTRY_SLAUGHTER_HOURS,
+)
+from .model import SLIDER_NAMES
+
+DATA_PATH = pathlib.Path(__file__).parent.joinpath("../../data").resolve()
+
+# named slider scenarios, each a csv in the default_slider_values.csv format.
+# Any other <name>_slider_values.csv in the data folder is picked up as <name>
+SCENARIO_FILES = {
+    "baseline": "default_slider_values.csv",
+    "optimistic": "optimistic_slider_values.csv",
+    "scenario1": "scneario1_slider_values.csv",
+}
+SCENARIO_SUFFIX = "_slider_values.csv"
+# names save_slider_scenario accepts, so a name cannot leave the data folder
+SCENARIO_NAME = re.compile(r"[A-Za-z0-9_-]+")
+
+# unit and inclusive (low, high) range of the InputDataAndSources.csv rows the
+# model reads, keyed as in INPUT_ROWS. Other rows are head counts
+HEAD_LIMITS = ("Head", 1, 1e11)
+INPUT_LIMITS = {
+    "pig_gestation": ("Months", 1, 12),
+    "poultry_gestation": ("Months", 0.5, 12),
+    "cow_gestation": ("Months", 1, 12),
+    "piglets_per_litter": ("Head/Sow", 1, 30),
+}
+# quantities derived from the inputs once, for calculate_feed_and_animals
+DERIVED_INPUTS = (
+    "new_beef_calfs",
+    "new_dairy_calfs",
+    "cattle_in_beef_track",
+    "cattle_in_dairy_track",
+    "new_beef_calfs_pm",
+    "new_dairy_calfs_pm",
+    "pregnant_sows",
+    "pregnant_cows",
+    "slaughter_cap_hours",
+    "baseline_feed_without_dairy",
+)
+
+
+def validate_animal_inputs(dataframe):
+    """
+    Checks the rows of InputDataAndSources.csv the model reads.
+
+    Every row must be present once, in its expected unit and range.
+
+    Arguments:
+        dataframe (pd.DataFrame): InputDataAndSources.csv indexed by Variable
+
+    Returns:
+        dict: parameter name to quantity, keyed as in INPUT_ROWS
+
+    Raises:
+        ValueError: listing every problem found
+    """
+    problems = []
+    missing = [row for row in INPUT_ROWS.values() if row not in dataframe.index]
+    if missing:
+        problems.append(f"missing rows {missing}")
+    duplicated = sorted(set(dataframe.index[dataframe.index.duplicated()]))
+    if duplicated:
+        problems.append(f"duplicated rows {duplicated}")
+    params = {}
+    for name, row in INPUT_ROWS.items():
+        if row in missing or row in duplicated:
+            continue
+        unit, low, high = INPUT_LIMITS.get(name, HEAD_LIMITS)
+        if "Units" in dataframe and dataframe.loc[row, "Units"] != unit:
+            problems.append(
+                f"{row} is in {dataframe.loc[row, 'Units']!r}, expected {unit!r}"
+            )
+        value = pd.to_numeric(dataframe.loc[row, "Qty"], errors="coerce")
+        if not np.isfinite(value) or not low <= value <= high:
+            problems.append(
+                f"{row} is {dataframe.loc[row, 'Qty']!r}, outside {low} to {high}"
+            )
+        # numpy floats, so the model divides by zero to inf or nan, not an error
+        params[name] = np.float64(value)
+    if problems:
+        raise ValueError("invalid animal inputs: " + "; ".join(problems))
+    return params
+
+
+class ModelAnimalInputs:
+    """
+    Read only model input quantities, validated and with derived constants.
+
+    Every INPUT_ROWS quantity and DERIVED_INPUTS constant is an attribute, so
+    a model run reads them without any dataframe lookups.
+
+    Arguments:
+        dataframe (pd.DataFrame): InputDataAndSources.csv indexed by Variable,
+            kept as the dataframe attribute
+
+    Raises:
+        ValueError: if a row the model reads is missing or out of range
+    """
+
+    __slots__ = ("dataframe",) + tuple(INPUT_ROWS) + DERIVED_INPUTS
+
+    def __init__(self, dataframe):
+        params = validate_animal_inputs(dataframe)
+        new_beef_calfs, new_dairy_calfs, beef_track, dairy_track = cattle_tracks(params)
+        new_beef_calfs_pm = new_beef_calfs / 12
+        values = dict(
+            params,
+            dataframe=dataframe,
+            new_beef_calfs=new_beef_calfs,
+            new_dairy_calfs=new_dairy_calfs,
+            cattle_in_beef_track=beef_track,
+            cattle_in_dairy_track=dairy_track,
+            new_beef_calfs_pm=new_beef_calfs_pm,
+            new_dairy_calfs_pm=new_dairy_calfs / 12,
+            pregnant_sows=params["piglets_pm"] / params["piglets_per_litter"],
+            pregnant_cows=new_beef_calfs_pm / CALVES_PER_MOTHER,
+            # slaughter capacity before the slaughter slider scales it
+            slaughter_cap_hours=params["cow_slaughter_pm"] * COW_SLAUGHTER_HOURS
+            + params["pigs_slaughter_pm"] * PIG_SLAUGHTER_HOURS
+            + params["poultry_slaughter_pm"] * POULTRY_SLAUGHTER_HOURS,
+            # the dairy share depends on the grass and residues slider
+            baseline_feed_without_dairy=params["total_poultry"]
+            * POULTRY_FEED_PM_PER_BIRD
+            + params["total_pigs"] * PIG_FEED_PM_PER_PIG
+            + beef_track * BEEF_COW_FEED_PM_PER_COW,
+        )
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"ModelAnimalInputs is read only, cannot set {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"ModelAnimalInputs is read only, cannot delete {name}")
+
+    def __reduce__(self):
+        # rebuilt from the dataframe, since the attributes cannot be set
+        return (type(self), (self.dataframe,))
+
+
+class ModelSlidersDefaults:
+    def __init__(self, dataframe):
+        self.reduction_in_beef_calves = dataframe.loc["reduction_in_beef_calves", "Qty"]
+        self.reduction_in_dairy_calves = dataframe.loc[
+            "reduction_in_dairy_calves", "Qty"
+        ]
+        self.change_to_baseline_slaughter = dataframe.loc[
+            "change_to_baseline_slaughter", "Qty"
+        ]
+        self.reduction_in_pig_breeding = dataframe.loc[
+            "reduction_in_pig_breeding", "Qty"
+        ]
+        self.reduction_in_poultry_breeding = dataframe.loc[
+            "reduction_in_poultry_breeding", "Qty"
+        ]
+        self.months = dataframe.loc["months", "Qty"]
+        self.discount_rate = dataframe.loc["discount_rate", "Qty"]
+        self.mother_slaughter = dataframe.loc["mother_slaughter", "Qty"]
+        self.use_grass_and_residues_for_dairy = dataframe.loc[
+            "use_grass_and_residues_for_dairy", "Qty"
+        ]
+
+
+class ModelSliderInputs:
+    def __init__(self, dataframe):
+        self.reduction_in_beef_calves = dataframe.loc["reduction_in_beef_calves", "Qty"]
+        self.reduction_in_dairy_calves = dataframe.loc[
+            "reduction_in_dairy_calves", "Qty"
+        ]
+        self.change_to_baseline_slaughter = dataframe.loc[
+            "change_to_baseline_slaughter", "Qty"
+        ]
+        self.reduction_in_pig_breeding = dataframe.loc[
+            "reduction_in_pig_breeding", "Qty"
+        ]
+        self.reduction_in_poultry_breeding = dataframe.loc[
+            "reduction_in_poultry_breeding", "Qty"
+        ]
+        self.months = dataframe.loc["months", "Qty"]
+        self.discount_rate = dataframe.loc["discount_rate", "Qty"]
+        self.mother_slaughter = dataframe.loc["mother_slaughter", "Qty"]
+        self.use_grass_and_residues_for_dairy = dataframe.loc[
+            "use_grass_and_residues_for_dairy", "Qty"
+        ]
+
+
+def inputs_digest(animal_inputs):
+    """
+    Fingerprints the model input quantities, for keys of stored results.
+
+    Arguments:
+        animal_inputs (ModelAnimalInputs): the animal inputs
+
+    Returns:
+        str: the sha256 hex digest of the INPUT_ROWS quantities
+    """
+    text = json.dumps(
+        {name: float(getattr(animal_inputs, name)) for name in INPUT_ROWS}
+    )
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def read_input_csv(filename):
+    """
+    Reads one of the Variable/Qty csv files from the data folder.
+
+    Arguments:
+        filename (str): name of the file in the data folder
+
+    Returns:
+        pd.DataFrame: the file indexed by Variable
+    """
+    return pd.read_csv(DATA_PATH.joinpath(filename), index_col="Variable")
+
+
+@functools.lru_cache(maxsize=None)
+def load_animal_inputs():
+    """
+    Loads InputDataAndSources.csv once per process.
+
+    Returns:
+        ModelAnimalInputs: the shared animal inputs
+    """
+    return ModelAnimalInputs(read_input_csv("InputDataAndSources.csv"))
+
+
+def available_scenarios():
+    """
+    Lists the named slider scenarios in the data folder.
+
+    Returns:
+        dict: scenario name to csv file name, SCENARIO_FILES first
+    """
+    scenarios = dict(SCENARIO_FILES)
+    known = set(scenarios.values())
+    for path in sorted(DATA_PATH.glob("*" + SCENARIO_SUFFIX)):
+        if path.name not in known:
+            scenarios[path.name[: -len(SCENARIO_SUFFIX)]] = path.name
+    return scenarios
+
+
+@functools.lru_cache(maxsize=None)
+def load_slider_defaults(scenario="baseline"):
+    """
+    Loads the slider values of a named scenario once per process.
+
+    Arguments:
+        scenario (str): a key of available_scenarios()
+
+    Returns:
+        ModelSlidersDefaults: the scenario's slider values
+    """
+    filename = SCENARIO_FILES.get(scenario) or available_scenarios()[scenario]
+    return ModelSlidersDefaults(read_input_csv(filename))
+
+
+def save_slider_scenario(name, sliders):
+    """
+    Writes slider values as a named scenario next to the shipped scenarios.
+
+    Arguments:
+        name (str): the scenario name, saved as <name>_slider_values.csv
+        sliders (dict): slider name to value, for every name in SLIDER_NAMES
+
+    Returns:
+        pathlib.Path: the written file
+
+    Raises:
+        ValueError: if the name is not made of letters, digits, _ and -, or
+            names a shipped scenario or its file
+    """
+    if not isinstance(name, str) or not SCENARIO_NAME.fullmatch(name):
+        raise ValueError(
+            f"scenario names may only hold letters, digits, _ and -, got {name!r}"
+        )
+    filename = name + SCENARIO_SUFFIX
+    if name in SCENARIO_FILES or filename in SCENARIO_FILES.values():
+        raise ValueError(f"{name} is a shipped scenario and cannot be overwritten")
+    path = DATA_PATH.joinpath(filename)
+    frame = pd.DataFrame(
+        {"Qty": [sliders[slider] for slider in SLIDER_NAMES]},
+        index=pd.Index(SLIDER_NAMES, name="Variable"),
+    )
+    frame.to_csv(path)
+    load_slider_defaults.cache_clear()
+    return path
@@ -0,0 +1,129 @@
+"""
+Optional instrumentation hooks for calculate_feed_and_animals.
+
+The model calls a hook only when one is passed in, so runs without a hook pay
+nothing beyond an `is None` check per month.
+"""
+
+import logging
+import threading
+from collections import Counter
+
+from .model import METRIC_INDEX
+
+logger = logging.getLogger(__name__)
+
+
+class ModelHook:
+    """
+    Base class for model instrumentation, every callback does nothing.
+
+    Subclass it and override the callbacks of interest.
+    """
+
+    def on_run_start(self, months):
+        """
+        Called before the first month is simulated.
+
+        Arguments:
+            months (int): the number of months that will be simulated
+        """
+
+    def on_month(self, month, row):
+        """
+        Called after each month's results are written.
+
+        Arguments:
+            month (int): the month just simulated
+            row (np.ndarray): the month's results in METRIC_NAMES order, only
+                valid during the call
+        """
+
+    def on_spillover(self, month, source, target, spare_hours):
+        """
+        Called when spare slaughter capacity moves to the next species.
+
+        Arguments:
+            month (int): the month the spillover happened in
+            source (str): the species with spare capacity, "poultry" or "pig"
+            target (str): the species receiving it, "pig" or "cow"
+            spare_hours (float): the spare slaughter hours before the skill
+                transfer discount
+        """
+
+    def on_run_end(self, months, elapsed):
+        """
+        Called after the last month is simulated.
+
+        Arguments:
+            months (int): the number of months simulated
+            elapsed (float): wall time of the run in seconds
+        """
+
+
+class MetricsHook(ModelHook):
+    """
+    Collects run counts, timings and spillover counters across many runs.
+
+    Safe to share between the threads of one worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Sets every counter back to zero.
+        """
+        with self._lock:
+            self.runs = 0
+            self.months = 0
+            self.total_seconds = 0.0
+            self.max_seconds = 0.0
+            self.spillovers = Counter()
+
+    def on_spillover(self, month, source, target, spare_hours):
+        with self._lock:
+            self.spillovers[f"{source}->{target}"] += 1
+
+    def on_run_end(self, months, elapsed):
+        with self._lock:
+            self.runs += 1
+            self.months += months
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+    def summary(self):
+        """
+        Reports the counters collected so far.
+
+        Returns:
+            dict: runs, months, total/mean/max run seconds and spillover counts
+        """
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "months": self.months,
+                "total_seconds": self.total_seconds,
+                "mean_seconds": self.total_seconds / self.runs if self.runs else 0.0,
+                "max_seconds": self.max_seconds,
+                "spillovers": dict(self.spillovers),
+            }
+
+
+class LoggingHook(ModelHook):
+    """
+    Logs the poultry and combined feed of every month at DEBUG level.
+
+    Replaces the per-month prints the model used to make.
+    """
+
+    def on_month(self, month, row):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "month %d: poultry feed %s, combined feed %s",
+                month,
+                row[METRIC_INDEX["Poultry Feed"]],
+                row[METRIC_INDEX["Combined Feed"]],
+            )
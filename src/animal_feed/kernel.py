@@ -0,0 +1,283 @@
+"""
+Compiled backend for the month by month recurrence of the model.
+
+month_recurrence runs the same recurrence as the loop in
+calculate_feed_and_animals, operation for operation, over float64 scalars and a
+results array. When numba is installed it is compiled on first use and the
+model selects it automatically for runs without a hook. Without numba it stays
+plain Python, which the tests compare against the reference loop.
+
+It also records the state carried from month to month, STATE_NAMES, and can
+start from any month given the state at that month, which is how
+animal_feed.incremental resumes a trajectory and animal_feed.longrun runs one
+scenario in chunks. With a step other than 1 the arguments are rates per step
+of that many months, as in batch.iter_batch.
+"""
+
+try:
+    import numba
+except ImportError:  # numba is optional
+    numba = None
+
+# whether month_recurrence is compiled, so the model picks it by default
+COMPILED = numba is not None
+
+# the values month_recurrence carries from one month to the next, in the order
+# of its arguments and of the columns of its states array
+STATE_NAMES = (
+    "new_dairy_calfs_pm",
+    "new_poultry_pm",
+    "current_pregnant_sows",
+    "current_pregnant_cows",
+    "current_beef_cattle",
+    "current_dairy_cattle",
+    "current_total_pigs",
+    "current_total_poultry",
+    "current_cow_slaughter",
+    "current_pig_slaughter",
+    "current_poultry_slaughter",
+)
+# where the STATE_NAMES values sit among the arguments between step and results
+STATE_ARGUMENTS = slice(9, 9 + len(STATE_NAMES))
+
+
+def _compile(func):
+    if numba is None:
+        return func
+    # numpy semantics make a zero slaughter capacity give inf or nan, as in the
+    # reference loop, rather than raise
+    return numba.njit(cache=True, error_model="numpy")(func)
+
+
+@_compile
+def month_recurrence(
+    start,
+    months,
+    step,
+    reduction_in_beef_calves,
+    reduction_in_dairy_calves,
+    reduction_in_pig_breeding,
+    reduction_in_poultry_breeding,
+    cow_gestation,
+    pig_gestation,
+    poultry_gestation,
+    piglets_per_litter,
+    calves_per_mother,
+    new_dairy_calfs_pm,
+    new_poultry_pm,
+    current_pregnant_sows,
+    current_pregnant_cows,
+    current_beef_cattle,
+    current_dairy_cattle,
+    current_total_pigs,
+    current_total_poultry,
+    current_cow_slaughter,
+    current_pig_slaughter,
+    current_poultry_slaughter,
+    total_slaughter_cap_hours,
+    cow_slaughter_hours,
+    pig_slaughter_hours,
+    poultry_slaughter_hours,
+    skill_transfer_discount_chickens_to_pigs,
+    skill_transfer_discount_pigs_to_cows,
+    sow_slaughter_percent,
+    mother_cow_slaughter_percent,
+    dairy_life_expectancy,
+    other_cow_death_rate,
+    other_pig_death_rate,
+    other_poultry_death_rate,
+    beef_cow_feed_pm_per_cow,
+    dairy_cow_feed_pm_per_cow,
+    pig_feed_pm_per_pig,
+    poultry_feed_pm_per_bird,
+    baseline_feed,
+    feed_unit_adjust,
+    results,
+    states,
+):
+    """
+    Simulates the months, or steps, of one scenario into a results array.
+
+    The arguments are the values calculate_feed_and_animals holds just before
+    its loop, with the intervention sliders already scaled to fractions, or
+    when resuming, with the STATE_NAMES values of month start.
+
+    Arguments:
+        start (int): the first step to simulate
+        months (int): the step to stop before
+        step (float): length of a step in months, 1.0 for the monthly model.
+            Interventions take effect at the steps within half a step of a
+            gestation, and the Month column holds step times the step number
+        results (np.ndarray): (months - start, len(METRIC_NAMES)) float64 array,
+            row i - start is set to the results of step i
+        states (np.ndarray): (months - start + 1, len(STATE_NAMES)) float64
+            array, row i - start is set to the state step i starts from, for i
+            from start to months
+
+    Returns:
+        int: the first month from start on where spare slaughter capacity moved
+            to another animal, which is the first the discount rate matters in,
+            or months if there was none
+    """
+    first_spillover = months
+    for i in range(start, months):
+        states[i - start, 0] = new_dairy_calfs_pm
+        states[i - start, 1] = new_poultry_pm
+        states[i - start, 2] = current_pregnant_sows
+        states[i - start, 3] = current_pregnant_cows
+        states[i - start, 4] = current_beef_cattle
+        states[i - start, 5] = current_dairy_cattle
+        states[i - start, 6] = current_total_pigs
+        states[i - start, 7] = current_total_poultry
+        states[i - start, 8] = current_cow_slaughter
+        states[i - start, 9] = current_pig_slaughter
+        states[i - start, 10] = current_poultry_slaughter
+
+        new_pigs_pm = current_pregnant_sows * piglets_per_litter
+        new_beef_calfs_pm = current_pregnant_cows * calves_per_mother
+
+        # determine birth rates
+        if abs(i * step - cow_gestation) <= step / 2:
+            new_beef_calfs_pm *= 1 - reduction_in_beef_calves
+            new_dairy_calfs_pm *= 1 - reduction_in_dairy_calves
+            current_pregnant_cows *= 1 - reduction_in_beef_calves
+
+        if abs(i * step - pig_gestation) <= step / 2:
+            new_pigs_pm *= 1 - reduction_in_pig_breeding
+            current_pregnant_sows *= 1 - reduction_in_pig_breeding
+
+        if abs(i * step - poultry_gestation) <= step / 2:
+            new_poultry_pm *= 1 - reduction_in_poultry_breeding
+
+        if new_pigs_pm < 0:
+            new_pigs_pm = 0.0
+
+        if new_beef_calfs_pm < 0:
+            new_beef_calfs_pm = 0.0
+
+        # spare slaughter capacity moves poultry -> pig -> cow
+        if first_spillover == months and (
+            current_total_poultry < current_poultry_slaughter
+            or current_total_pigs < current_pig_slaughter
+        ):
+            first_spillover = i
+        if current_total_poultry < current_poultry_slaughter:
+            spare_slaughter_hours = (
+                current_poultry_slaughter - current_total_poultry
+            ) * poultry_slaughter_hours
+            current_poultry_slaughter = current_total_poultry
+            current_pig_slaughter += (
+                spare_slaughter_hours
+                * skill_transfer_discount_chickens_to_pigs
+                / pig_slaughter_hours
+            )
+        if current_total_pigs < current_pig_slaughter:
+            spare_slaughter_hours = (
+                current_pig_slaughter - current_total_pigs
+            ) * pig_slaughter_hours
+            current_pig_slaughter = current_total_pigs
+            current_cow_slaughter += (
+                spare_slaughter_hours
+                * skill_transfer_discount_pigs_to_cows
+                / cow_slaughter_hours
+            )
+
+        # dairy cows are only killed when getting to the end of their life
+        current_dairy_slaughter = current_dairy_cattle / (dairy_life_expectancy * 12)
+        current_beef_slaughter = current_cow_slaughter - current_dairy_slaughter
+        if current_beef_cattle < current_beef_slaughter:
+            actual_beef_slaughter = current_beef_cattle
+        else:
+            actual_beef_slaughter = current_beef_slaughter
+
+        other_beef_death = other_cow_death_rate * current_beef_cattle
+        other_dairy_death = other_cow_death_rate * current_dairy_cattle
+        other_pig_death = current_total_pigs * other_pig_death_rate
+        other_poultry_death = current_total_poultry * other_poultry_death_rate
+
+        current_beef_feed = current_beef_cattle * beef_cow_feed_pm_per_cow
+        current_dairy_feed = current_dairy_cattle * dairy_cow_feed_pm_per_cow
+        current_pig_feed = current_total_pigs * pig_feed_pm_per_pig
+        current_poultry_feed = current_total_poultry * poultry_feed_pm_per_bird
+
+        current_feed_combined = (
+            current_beef_feed
+            + current_dairy_feed
+            + current_pig_feed
+            + current_poultry_feed
+        )
+
+        # this month's row, in METRIC_NAMES order, before the new totals
+        beef_slaughtered_hours = actual_beef_slaughter * cow_slaughter_hours
+        dairy_slaughtered_hours = current_dairy_slaughter * cow_slaughter_hours
+        pig_slaughtered_hours = current_pig_slaughter * pig_slaughter_hours
+        poultry_slaughtered_hours = current_poultry_slaughter * poultry_slaughter_hours
+        results[i - start, 0] = current_beef_cattle
+        results[i - start, 1] = new_beef_calfs_pm
+        results[i - start, 2] = actual_beef_slaughter
+        results[i - start, 3] = beef_slaughtered_hours
+        results[i - start, 4] = beef_slaughtered_hours / total_slaughter_cap_hours
+        results[i - start, 5] = other_beef_death
+        results[i - start, 6] = current_beef_feed * feed_unit_adjust
+        results[i - start, 7] = current_dairy_cattle
+        results[i - start, 8] = new_dairy_calfs_pm
+        results[i - start, 9] = current_dairy_slaughter
+        results[i - start, 10] = dairy_slaughtered_hours
+        results[i - start, 11] = dairy_slaughtered_hours / total_slaughter_cap_hours
+        results[i - start, 12] = other_dairy_death
+        results[i - start, 13] = current_dairy_feed * feed_unit_adjust
+        results[i - start, 14] = current_total_pigs
+        results[i - start, 15] = new_pigs_pm
+        results[i - start, 16] = current_pig_slaughter
+        results[i - start, 17] = pig_slaughtered_hours
+        results[i - start, 18] = pig_slaughtered_hours / total_slaughter_cap_hours
+        results[i - start, 19] = current_pig_feed * feed_unit_adjust
+        results[i - start, 20] = current_total_poultry
+        results[i - start, 21] = new_poultry_pm
+        results[i - start, 22] = current_poultry_slaughter
+        results[i - start, 23] = poultry_slaughtered_hours
+        results[i - start, 24] = poultry_slaughtered_hours / total_slaughter_cap_hours
+        results[i - start, 25] = current_poultry_feed * feed_unit_adjust
+        results[i - start, 26] = current_feed_combined * feed_unit_adjust
+        results[i - start, 27] = (
+            baseline_feed - current_feed_combined
+        ) * feed_unit_adjust
+        results[i - start, 28] = i * step
+
+        # sum up new totals
+        current_beef_cattle += (
+            new_beef_calfs_pm - current_beef_slaughter - other_beef_death
+        )
+        current_dairy_cattle += (
+            new_dairy_calfs_pm - current_dairy_slaughter - other_dairy_death
+        )
+        current_total_poultry += (
+            new_poultry_pm - current_poultry_slaughter - other_poultry_death
+        )
+        current_total_pigs += new_pigs_pm - current_pig_slaughter - other_pig_death
+
+        current_pregnant_sows -= sow_slaughter_percent * (
+            current_pig_slaughter + other_pig_death
+        )
+        current_pregnant_cows -= mother_cow_slaughter_percent * (
+            current_beef_slaughter + other_beef_death
+        )
+
+        if current_beef_cattle < 0:
+            current_beef_cattle = 0.0
+        if current_dairy_cattle < 0:
+            current_dairy_cattle = 0.0
+
+    if start < months:
+        states[months - start, 0] = new_dairy_calfs_pm
+        states[months - start, 1] = new_poultry_pm
+        states[months - start, 2] = current_pregnant_sows
+        states[months - start, 3] = current_pregnant_cows
+        states[months - start, 4] = current_beef_cattle
+        states[months - start, 5] = current_dairy_cattle
+        states[months - start, 6] = current_total_pigs
+        states[months - start, 7] = current_total_poultry
+        states[months - start, 8] = current_cow_slaughter
+        states[months - start, 9] = current_pig_slaughter
+        states[months - start, 10] = current_poultry_slaughter
+    return first_spillover
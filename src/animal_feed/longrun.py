@@ -0,0 +1,206 @@
+"""
+Long horizon runs of the batch engine with weekly or daily time steps.
+
+The dashboard runs up to 24 monthly steps. Here a run lasts any number of
+years, with steps of a month, a week or a day, and results come out in chunks
+of steps, so memory stays the same however long the run. Flows are reported
+per step, populations at the start of each step.
+
+Several scenarios advance together through batch.iter_batch. A single scenario
+runs through kernel.month_recurrence at the same step length, which with numba
+installed makes a 50 year daily run about 3 ms, over 20 million animal class
+steps a second. Without numba it is plain Python, around 400 thousand a second.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from . import kernel
+from .batch import (
+    INPUT_ROWS,
+    batch_parameters,
+    cattle_tracks,
+    iter_batch,
+    slider_array,
+)
+from .constants import (
+    BEEF_COW_FEED_PM_PER_COW,
+    CALVES_PER_MOTHER,
+    COW_SLAUGHTER_HOURS,
+    DAIRY_COW_FEED_PM_PER_COW,
+    DAIRY_LIFE_EXPECTANCY,
+    FEED_UNIT_ADJUST,
+    OTHER_COW_DEATH_RATE,
+    OTHER_PIG_DEATH_RATE,
+    OTHER_POULTRY_DEATH_RATE,
+    PIG_FEED_PM_PER_PIG,
+    PIG_SLAUGHTER_HOURS,
+    POULTRY_FEED_PM_PER_BIRD,
+    POULTRY_SLAUGHTER_HOURS,
+)
+from .inputs import load_animal_inputs
+from .model import METRIC_NAMES
+
+DAYS_PER_MONTH = 365.25 / 12
+# length of each time step in months
+TIME_STEPS = {"month": 1.0, "week": 7 / DAYS_PER_MONTH, "day": 1 / DAYS_PER_MONTH}
+# unrounded gestation lengths in days, InputDataAndSources.csv rounds them to
+# whole months
+GESTATION_DAYS = {"cow_gestation": 283, "pig_gestation": 114, "poultry_gestation": 21}
+
+
+def iter_long_run(
+    sliders,
+    years,
+    step="week",
+    animal_inputs=None,
+    gestation_days=GESTATION_DAYS,
+    chunk_steps=4096,
+):
+    """
+    Runs slider scenarios for many years, yielding the results in chunks.
+
+    A single scenario runs through the kernel, several through the batch
+    engine, with the same results.
+
+    Arguments:
+        sliders (array-like): (N, 9) slider values in SLIDER_NAMES order, the
+            months slider is ignored
+        years (float): length of the run
+        step (str): a key of TIME_STEPS
+        animal_inputs (ModelAnimalInputs): loaded from the data folder by default
+        gestation_days (dict): gestation lengths in days keyed as in INPUT_ROWS,
+            None to use the rounded months of InputDataAndSources.csv
+        chunk_steps (int): number of steps in each yielded chunk
+
+    Yields:
+        np.ndarray: (N, chunk_steps or fewer, len(METRIC_NAMES)) results, the
+            Month column holding the months elapsed at the start of each step
+    """
+    if step not in TIME_STEPS:
+        raise ValueError(f"step must be one of {sorted(TIME_STEPS)}, got {step!r}")
+    dt = TIME_STEPS[step]
+    params = batch_parameters(animal_inputs or load_animal_inputs())
+    for name, days in (gestation_days or {}).items():
+        if name not in INPUT_ROWS:
+            raise ValueError(f"unknown gestation parameter {name!r}")
+        params[name] = days / DAYS_PER_MONTH
+    steps = math.ceil(round(years * 12 / dt, 9))
+    sliders = slider_array(sliders)
+    if len(sliders) == 1:
+        return _iter_single_run(sliders[0], params, steps, dt, chunk_steps)
+    return iter_batch(sliders, params, steps, dt, chunk_steps=chunk_steps)
+
+
+def _step_arguments(sliders, params, dt):
+    # the month_recurrence arguments of one scenario at steps of dt months,
+    # the rates scaled as iter_batch scales them
+    new_beef_calfs, new_dairy_calfs, cattle_in_beef_track, cattle_in_dairy_track = (
+        cattle_tracks(params)
+    )
+    increase_in_slaughter = sliders[2] * 0.01
+    skill_transfer_discount = (100 - sliders[6]) / 100
+    dairy_cow_feed = (0.0 if sliders[8] != 0 else DAIRY_COW_FEED_PM_PER_COW) * dt
+    beef_cow_feed = BEEF_COW_FEED_PM_PER_COW * dt
+    pig_feed_per_pig = PIG_FEED_PM_PER_PIG * dt
+    poultry_feed_per_bird = POULTRY_FEED_PM_PER_BIRD * dt
+    total_slaughter_cap_hours = (
+        (
+            params["cow_slaughter_pm"] * COW_SLAUGHTER_HOURS
+            + params["pigs_slaughter_pm"] * PIG_SLAUGHTER_HOURS
+            + params["poultry_slaughter_pm"] * POULTRY_SLAUGHTER_HOURS
+        )
+        * increase_in_slaughter
+        * dt
+    )
+    baseline_feed = (
+        params["total_poultry"] * poultry_feed_per_bird
+        + params["total_pigs"] * pig_feed_per_pig
+        + cattle_in_beef_track * beef_cow_feed
+        + cattle_in_dairy_track * dairy_cow_feed
+    )
+    return np.array(
+        [
+            sliders[0] * 0.01,
+            sliders[1] * 0.01,
+            sliders[3] * 0.01,
+            sliders[4] * 0.01,
+            params["cow_gestation"],
+            params["pig_gestation"],
+            params["poultry_gestation"],
+            params["piglets_per_litter"] * dt,
+            CALVES_PER_MOTHER * dt,
+            new_dairy_calfs / 12 * dt,
+            params["poultry_slaughter_pm"] * dt,
+            params["piglets_pm"] / params["piglets_per_litter"],
+            new_beef_calfs / 12 / CALVES_PER_MOTHER,
+            cattle_in_beef_track,
+            cattle_in_dairy_track,
+            params["total_pigs"],
+            params["total_poultry"],
+            params["cow_slaughter_pm"] * increase_in_slaughter * dt,
+            params["pigs_slaughter_pm"] * increase_in_slaughter * dt,
+            params["poultry_slaughter_pm"] * increase_in_slaughter * dt,
+            total_slaughter_cap_hours,
+            COW_SLAUGHTER_HOURS,
+            PIG_SLAUGHTER_HOURS,
+            POULTRY_SLAUGHTER_HOURS,
+            skill_transfer_discount,
+            skill_transfer_discount,
+            sliders[7],
+            sliders[7],
+            # the kernel slaughters dairy cattle over dairy_life_expectancy * 12 steps
+            DAIRY_LIFE_EXPECTANCY / dt,
+            OTHER_COW_DEATH_RATE * dt,
+            OTHER_PIG_DEATH_RATE * dt,
+            OTHER_POULTRY_DEATH_RATE * dt,
+            beef_cow_feed,
+            dairy_cow_feed,
+            pig_feed_per_pig,
+            poultry_feed_per_bird,
+            baseline_feed,
+            FEED_UNIT_ADJUST,
+        ],
+        dtype=float,
+    )
+
+
+def _iter_single_run(sliders, params, steps, dt, chunk_steps):
+    # one scenario through kernel.month_recurrence, carrying the state from
+    # each chunk to the next
+    arguments = _step_arguments(sliders, params, dt)
+    states = np.empty((chunk_steps + 1, len(kernel.STATE_NAMES)))
+    for start in range(0, steps, chunk_steps):
+        stop = min(start + chunk_steps, steps)
+        out = np.empty((1, stop - start, len(METRIC_NAMES)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            kernel.month_recurrence(start, stop, dt, *arguments, out[0], states)
+        arguments[kernel.STATE_ARGUMENTS] = states[stop - start]
+        yield out
+
+
+def write_long_run_csv(chunks, path):
+    """
+    Streams the chunks of a long run into one csv file.
+
+    Arguments:
+        chunks (iterable): (N, steps, len(METRIC_NAMES)) arrays, as yielded by
+            iter_long_run
+        path (pathlib.Path): the csv file to write
+
+    Returns:
+        int: the number of rows written, one per scenario and step
+    """
+    rows = 0
+    with open(path, "w", newline="") as handle:
+        for chunk in chunks:
+            n, steps, _ = chunk.shape
+            frame = pd.DataFrame(
+                chunk.reshape(n * steps, len(METRIC_NAMES)), columns=list(METRIC_NAMES)
+            )
+            frame.insert(0, "Scenario", np.repeat(np.arange(n), steps))
+            frame.to_csv(handle, header=rows == 0, index=False)
+            rows += len(frame)
+    return rows
@@ -0,0 +1,464 @@
+"""
+Month by month simulation of US livestock populations, slaughter and feed use.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import kernel
+from .constants import (
+    BEEF_COW_FEED_PM_PER_COW,
+    CALVES_PER_MOTHER,
+    COW_SLAUGHTER_HOURS,
+    DAIRY_COW_FEED_PM_PER_COW,
+    DAIRY_LIFE_EXPECTANCY,
+    FEED_UNIT_ADJUST,
+    OTHER_COW_DEATH_RATE,
+    OTHER_PIG_DEATH_RATE,
+    OTHER_POULTRY_DEATH_RATE,
+    PIG_FEED_PM_PER_PIG,
+    PIG_SLAUGHTER_HOURS,
+    POULTRY_FEED_PM_PER_BIRD,
+    POULTRY_SLAUGHTER_HOURS,
+)
+
+# order of the slider columns, matches the arguments of calculate_feed_and_animals
+SLIDER_NAMES = (
+    "reduction_in_beef_calves",
+    "reduction_in_dairy_calves",
+    "change_to_baseline_slaughter",
+    "reduction_in_pig_breeding",
+    "reduction_in_poultry_breeding",
+    "months",
+    "discount_rate",
+    "mother_slaughter",
+    "use_grass_and_residues_for_dairy",
+)
+
+# (low, high) range of every slider on the dashboard
+SLIDER_BOUNDS = {
+    "reduction_in_beef_calves": (0, 100),
+    "reduction_in_dairy_calves": (0, 100),
+    "change_to_baseline_slaughter": (0, 600),
+    "reduction_in_pig_breeding": (0, 100),
+    "reduction_in_poultry_breeding": (0, 100),
+    "months": (0, 24),
+    "discount_rate": (0, 100),
+    "mother_slaughter": (0, 100),
+    "use_grass_and_residues_for_dairy": (0, 1),
+}
+
+# bump when a change to the model alters its results, so results stored by
+# earlier versions are not served
+MODEL_VERSION = 1
+
+# columns of the model results, in order
+METRIC_NAMES = (
+    "Beef Pop",
+    "Beef Born",
+    "Beef Slaughtered",
+    "Beef Slaughtered Hours",
+    "Beef Hours %",
+    "Beef Other Death",
+    "Beef Feed",
+    "Dairy Pop",
+    "Dairy Born",
+    "Dairy Slaughtered",
+    "Dairy Slaughtered Hours",
+    "Dairy Hours %",
+    "Dairy Other Death",
+    "Dairy Feed",
+    "Pigs Pop",
+    "Pig Born",
+    "Pig Slaughtered",
+    "Pig Slaughtered Hours",
+    "Pig Hours %",
+    "Pigs Feed",
+    "Poultry Pop",
+    "Poultry Born",
+    "Poultry Slaughtered",
+    "Poultry Slaughtered Hours",
+    "Poultry Hours %",
+    "Poultry Feed",
+    "Combined Feed",
+    "Combined Saved Feed",
+    "Month",
+)
+METRIC_INDEX = {name: index for index, name in enumerate(METRIC_NAMES)}
+
+# every column is stored as float64, so a results buffer can be viewed as records
+RESULT_DTYPE = np.dtype([(name, np.float64) for name in METRIC_NAMES])
+
+
+def results_frame(results):
+    """
+    Wraps a (months, len(METRIC_NAMES)) results buffer in a DataFrame.
+
+    The float columns share memory with the buffer, only Month is converted to
+    a separate integer column.
+
+    Arguments:
+        results (np.ndarray): one row per month, columns in METRIC_NAMES order
+
+    Returns:
+        pd.DataFrame: one row per month, columns as METRIC_NAMES
+    """
+    month = METRIC_INDEX["Month"]
+    df = pd.DataFrame(
+        results[:, :month], columns=list(METRIC_NAMES[:month]), copy=False
+    )
+    df["Month"] = np.arange(len(results))
+    return df
+
+
+def calculate_feed_and_animals(
+    reduction_in_beef_calves,
+    reduction_in_dairy_calves,
+    increase_in_slaughter,
+    reduction_in_pig_breeding,
+    reduction_in_poultry_breeding,
+    months,
+    discount_rate,
+    mother_slaughter,
+    use_grass_and_residues_for_dairy,
+    animal_inputs,
+    as_frame=True,
+    hook=None,
+    backend=None,
+):  # function arguments come from the component property of the Input (in this case, the sliders)
+    """
+    Simulates animal populations, slaughter and feed use month by month.
+
+    Arguments:
+        reduction_in_beef_calves ... use_grass_and_residues_for_dairy: the nine
+            slider values, in SLIDER_NAMES order
+        animal_inputs (ModelAnimalInputs): wraps the InputDataAndSources dataframe
+        as_frame (bool): return a DataFrame, or the raw record array when False
+        hook (ModelHook): optional instrumentation callbacks, off by default
+        backend (str): "python" for the reference loop, which runs hooks, or
+            "kernel" for kernel.month_recurrence. By default the kernel when it
+            is compiled and there is no hook
+
+    Returns:
+        pd.DataFrame or np.ndarray: one row per month, columns as METRIC_NAMES
+    """
+
+    feed_unit_adjust = FEED_UNIT_ADJUST  # pounds to billions of kcals
+    ## unpack the validated inputs for ease of use ##
+    # pigs
+    total_pigs = animal_inputs.total_pigs
+    piglets_pm = animal_inputs.piglets_pm
+    pigs_slaughter_pm = animal_inputs.pigs_slaughter_pm
+    pigGestation = animal_inputs.pig_gestation
+    piglets_per_litter = animal_inputs.piglets_per_litter
+
+    # poultry
+    total_poultry = animal_inputs.total_poultry
+    poultry_slaughter_pm = animal_inputs.poultry_slaughter_pm  # USDA
+    chicks_pm = poultry_slaughter_pm  # assume the same, no data
+    poultryGestation = (
+        animal_inputs.poultry_gestation
+    )  # USDA  # actaully 21 days, let's round to 1 month
+
+    # cows (more complex, as need to split dairy and beef), the dairy and beef
+    # ratios are worked out once when the inputs are loaded
+    cow_slaughter_pm = animal_inputs.cow_slaughter_pm
+    cowGestation = animal_inputs.cow_gestation
+    cattle_in_beef_track = animal_inputs.cattle_in_beef_track
+    cattle_in_dairy_track = animal_inputs.cattle_in_dairy_track
+    calves_per_mother = CALVES_PER_MOTHER
+
+    # other baseline variables
+    dairy_life_expectancy = DAIRY_LIFE_EXPECTANCY
+
+    ## End cows, and basic animal variable defintiions ##
+
+    # interventions, scale appropriately for maths (i.e convert sliders from % to decimal)
+    reduction_in_beef_calves *= 0.01
+    reduction_in_dairy_calves *= 0.01
+    reduction_in_pig_breeding *= 0.01
+    reduction_in_poultry_breeding *= 0.01
+    increase_in_slaughter *= 0.01
+
+    # per month values
+    other_cow_death_rate = OTHER_COW_DEATH_RATE
+    other_pig_death_rate = OTHER_PIG_DEATH_RATE
+    other_poultry_death_rate = OTHER_POULTRY_DEATH_RATE
+    new_beef_calfs_pm = animal_inputs.new_beef_calfs_pm
+    new_dairy_calfs_pm = animal_inputs.new_dairy_calfs_pm
+    new_pigs_pm = piglets_pm
+    new_poultry_pm = chicks_pm
+
+    # pregnant animals
+    current_pregnant_sows = animal_inputs.pregnant_sows
+    current_pregnant_cows = animal_inputs.pregnant_cows
+    sow_slaughter_percent = mother_slaughter  # of total percent of pig slaughter
+    mother_cow_slaughter_percent = mother_slaughter  # of total percent of cow slaughter
+
+    #### Slaughtering ####
+    ### Slaughtering variables (hardcoded in constants)
+    # total slaughter capacity
+    cow_slaughter_hours = COW_SLAUGHTER_HOURS
+    pig_slaughter_hours = PIG_SLAUGHTER_HOURS
+    poultry_slaughter_hours = POULTRY_SLAUGHTER_HOURS
+    total_slaughter_cap_hours = animal_inputs.slaughter_cap_hours
+    skill_transfer_discount_chickens_to_pigs = (100 - discount_rate) / 100  #
+    skill_transfer_discount_pigs_to_cows = (100 - discount_rate) / 100  #
+
+    ## Slaughtering Updates, increases from slider
+    total_slaughter_cap_hours *= increase_in_slaughter  # measured in hours
+    current_cow_slaughter = cow_slaughter_pm * increase_in_slaughter  # measured in head
+    current_poultry_slaughter = (
+        poultry_slaughter_pm * increase_in_slaughter
+    )  # measured in head
+    current_pig_slaughter = (
+        pigs_slaughter_pm * increase_in_slaughter
+    )  # measured in head
+    spare_slaughter_hours = 0
+
+    ## define current totals
+    # current_beef_feed_cattle = cattle_on_feed
+    current_beef_cattle = cattle_in_beef_track
+    current_dairy_cattle = cattle_in_dairy_track
+    current_total_pigs = total_pigs
+    current_total_poultry = total_poultry
+
+    ### FEED #commented out code is bottom up from roam page
+    # beef_cow_feed_pm_per_cow = 880 # lbs
+    # dairy_cow_feed_pm_per_cow = 1048
+    # poultry_feed_pm_per_bird = 20
+    # pig_feed_pm_per_pig = 139
+
+    # the top down feed numbers are in constants
+    beef_cow_feed_pm_per_cow = BEEF_COW_FEED_PM_PER_COW  # lbs
+    if use_grass_and_residues_for_dairy:
+        dairy_cow_feed_pm_per_cow = 0
+    else:
+        dairy_cow_feed_pm_per_cow = DAIRY_COW_FEED_PM_PER_COW
+    poultry_feed_pm_per_bird = POULTRY_FEED_PM_PER_BIRD
+    pig_feed_pm_per_pig = PIG_FEED_PM_PER_PIG
+    baseline_feed = (
+        animal_inputs.baseline_feed_without_dairy
+        + current_dairy_cattle * dairy_cow_feed_pm_per_cow
+    )
+
+    # one row per month, columns in METRIC_NAMES order
+    results = np.empty((months, len(METRIC_NAMES)))
+
+    if backend is None:
+        backend = "kernel" if kernel.COMPILED and hook is None else "python"
+    if backend not in ("python", "kernel"):
+        raise ValueError(f"backend must be 'python' or 'kernel', got {backend!r}")
+    if backend == "kernel" and hook is not None:
+        raise ValueError("hooks are only called by the python backend")
+
+    if hook is not None:
+        start_time = time.perf_counter()
+        hook.on_run_start(months)
+
+    if backend == "kernel":
+        kernel.month_recurrence(
+            0,
+            months,
+            1.0,
+            # float64 throughout, so numba compiles one signature
+            *np.array(
+                [
+                    reduction_in_beef_calves,
+                    reduction_in_dairy_calves,
+                    reduction_in_pig_breeding,
+                    reduction_in_poultry_breeding,
+                    cowGestation,
+                    pigGestation,
+                    poultryGestation,
+                    piglets_per_litter,
+                    calves_per_mother,
+                    new_dairy_calfs_pm,
+                    new_poultry_pm,
+                    current_pregnant_sows,
+                    current_pregnant_cows,
+                    current_beef_cattle,
+                    current_dairy_cattle,
+                    current_total_pigs,
+                    current_total_poultry,
+                    current_cow_slaughter,
+                    current_pig_slaughter,
+                    current_poultry_slaughter,
+                    total_slaughter_cap_hours,
+                    cow_slaughter_hours,
+                    pig_slaughter_hours,
+                    poultry_slaughter_hours,
+                    skill_transfer_discount_chickens_to_pigs,
+                    skill_transfer_discount_pigs_to_cows,
+                    sow_slaughter_percent,
+                    mother_cow_slaughter_percent,
+                    dairy_life_expectancy,
+                    other_cow_death_rate,
+                    other_pig_death_rate,
+                    other_poultry_death_rate,
+                    beef_cow_feed_pm_per_cow,
+                    dairy_cow_feed_pm_per_cow,
+                    pig_feed_pm_per_pig,
+                    poultry_feed_pm_per_bird,
+                    baseline_feed,
+                    feed_unit_adjust,
+                ],
+                dtype=float,
+            ),
+            results,
+            np.empty((months + 1, len(kernel.STATE_NAMES))),
+        )
+    else:
+        # simulate x months
+        for i in range(months):
+
+            new_pigs_pm = current_pregnant_sows * piglets_per_litter
+            new_beef_calfs_pm = current_pregnant_cows * calves_per_mother
+
+            # determine birth rates
+            if np.abs(i - cowGestation) <= 0.5:
+                new_beef_calfs_pm *= 1 - reduction_in_beef_calves
+                new_dairy_calfs_pm *= 1 - reduction_in_dairy_calves
+                current_pregnant_cows *= 1 - reduction_in_beef_calves
+
+            if np.abs(i - pigGestation) <= 0.5:
+                new_pigs_pm *= 1 - reduction_in_pig_breeding
+                current_pregnant_sows *= 1 - reduction_in_pig_breeding
+
+            if np.abs(i - poultryGestation) <= 0.5:
+                new_poultry_pm *= 1 - reduction_in_poultry_breeding
+
+            if new_pigs_pm < 0:
+                new_pigs_pm = 0
+
+            if new_beef_calfs_pm < 0:
+                new_beef_calfs_pm = 0
+
+            # Transfer excess slaughter capacity to next animal, current coding method only allows poultry -> pig -> cow, there are some small erros here due to rounding, and the method is not 100% water tight but errors are within the noise
+            if current_total_poultry < current_poultry_slaughter:
+                spare_slaughter_hours = (
+                    current_poultry_slaughter - current_total_poultry
+                ) * poultry_slaughter_hours
+                current_poultry_slaughter = current_total_poultry
+                if hook is not None:
+                    hook.on_spillover(i, "poultry", "pig", spare_slaughter_hours)
+                current_pig_slaughter += (
+                    spare_slaughter_hours
+                    * skill_transfer_discount_chickens_to_pigs
+                    / pig_slaughter_hours
+                )
+            if current_total_pigs < current_pig_slaughter:
+                spare_slaughter_hours = (
+                    current_pig_slaughter - current_total_pigs
+                ) * pig_slaughter_hours
+                current_pig_slaughter = current_total_pigs
+                if hook is not None:
+                    hook.on_spillover(i, "pig", "cow", spare_slaughter_hours)
+                current_cow_slaughter += (
+                    spare_slaughter_hours
+                    * skill_transfer_discount_pigs_to_cows
+                    / cow_slaughter_hours
+                )
+
+            # this set up only kills dairy cows when they are getting to the end of their life.
+            current_dairy_slaughter = current_dairy_cattle / (
+                dairy_life_expectancy * 12
+            )
+            current_beef_slaughter = current_cow_slaughter - current_dairy_slaughter
+            if current_beef_cattle < current_beef_slaughter:
+                actual_beef_slaughter = current_beef_cattle  # required due to the difference between actual slaughter and 'slaughter capacity' consider a rewrite of the whole method to distinuguish between these two. For now, this is thr workaround.
+            else:
+                actual_beef_slaughter = current_beef_slaughter
+
+            other_beef_death = other_cow_death_rate * current_beef_cattle
+            other_dairy_death = other_cow_death_rate * current_dairy_cattle
+            other_pig_death = current_total_pigs * other_pig_death_rate
+            other_poultry_death = current_total_poultry * other_poultry_death_rate
+
+            ## Feed
+            current_beef_feed = current_beef_cattle * beef_cow_feed_pm_per_cow
+            current_dairy_feed = current_dairy_cattle * dairy_cow_feed_pm_per_cow
+            current_pig_feed = current_total_pigs * pig_feed_pm_per_pig
+            current_poultry_feed = current_total_poultry * poultry_feed_pm_per_bird
+
+            current_feed_combined = (
+                current_beef_feed
+                + current_dairy_feed
+                + current_pig_feed
+                + current_poultry_feed
+            )
+
+            ### Write this month's row (before new totals have been calculated)
+            # feed adjust turns lbs in to billions of kcals
+            beef_slaughtered_hours = actual_beef_slaughter * cow_slaughter_hours
+            dairy_slaughtered_hours = current_dairy_slaughter * cow_slaughter_hours
+            pig_slaughtered_hours = current_pig_slaughter * pig_slaughter_hours
+            poultry_slaughtered_hours = (
+                current_poultry_slaughter * poultry_slaughter_hours
+            )
+            results[i] = (
+                current_beef_cattle,
+                new_beef_calfs_pm,
+                actual_beef_slaughter,
+                beef_slaughtered_hours,
+                beef_slaughtered_hours / total_slaughter_cap_hours,
+                other_beef_death,
+                current_beef_feed * feed_unit_adjust,
+                current_dairy_cattle,
+                new_dairy_calfs_pm,
+                current_dairy_slaughter,
+                dairy_slaughtered_hours,
+                dairy_slaughtered_hours / total_slaughter_cap_hours,
+                other_dairy_death,
+                current_dairy_feed * feed_unit_adjust,
+                current_total_pigs,
+                new_pigs_pm,
+                current_pig_slaughter,
+                pig_slaughtered_hours,
+                pig_slaughtered_hours / total_slaughter_cap_hours,
+                current_pig_feed * feed_unit_adjust,
+                current_total_poultry,
+                new_poultry_pm,
+                current_poultry_slaughter,
+                poultry_slaughtered_hours,
+                poultry_slaughtered_hours / total_slaughter_cap_hours,
+                current_poultry_feed * feed_unit_adjust,
+                current_feed_combined * feed_unit_adjust,
+                (baseline_feed - current_feed_combined) * feed_unit_adjust,
+                i,
+            )
+            if hook is not None:
+                hook.on_month(i, results[i])
+
+            # some up new totals
+            current_beef_cattle += (
+                new_beef_calfs_pm - current_beef_slaughter - other_beef_death
+            )
+            current_dairy_cattle += (
+                new_dairy_calfs_pm - current_dairy_slaughter - other_dairy_death
+            )
+            current_total_poultry += (
+                new_poultry_pm - current_poultry_slaughter - other_poultry_death
+            )
+            current_total_pigs += new_pigs_pm - current_pig_slaughter - other_pig_death
+
+            current_pregnant_sows -= sow_slaughter_percent * (
+                current_pig_slaughter + other_pig_death
+            )
+            current_pregnant_cows -= mother_cow_slaughter_percent * (
+                current_beef_slaughter + other_beef_death
+            )
+
+            if current_beef_cattle < 0:
+                current_beef_cattle = 0
+            if current_dairy_cattle < 0:
+                current_dairy_cattle = 0
+
+    ### End of loop, start summary
+    if hook is not None:
+        hook.on_run_end(months, time.perf_counter() - start_time)
+    if not as_frame:
+        return results.view(RESULT_DTYPE)[:, 0]
+    return results_frame(results)
@@ -0,0 +1,359 @@
+"""
+Monte Carlo uncertainty analysis over the InputDataAndSources.csv quantities.
+
+Input quantities are sampled from the distributions declared in
+InputDataAndSources_distributions.csv and run through the batch engine in
+chunks, spread over worker processes. Each chunk is reduced to per-cell
+histograms straight away, so quantile bands can be reported while the run is
+still going and no trajectories are kept in memory.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .batch import INPUT_ROWS, batch_parameters, simulate_batch, slider_array
+from .inputs import load_animal_inputs, read_input_csv
+from .model import METRIC_NAMES
+
+DISTRIBUTIONS_FILE = "InputDataAndSources_distributions.csv"
+DEFAULT_QUANTILES = (5, 50, 95)
+
+
+def load_input_distributions(filename=DISTRIBUTIONS_FILE):
+    """
+    Reads the distributions declared for the InputDataAndSources.csv rows.
+
+    Arguments:
+        filename (str): name of the distributions file in the data folder
+
+    Returns:
+        pd.DataFrame: Distribution and Param1-3 columns indexed by Variable
+    """
+    distributions = read_input_csv(filename)
+    unknown = set(distributions["Distribution"]) - set(SAMPLERS)
+    if unknown:
+        raise ValueError(f"unknown distributions in {filename}: {sorted(unknown)}")
+    return distributions
+
+
+def _sample_normal(rng, qty, row, draws):
+    # Param1 is the standard deviation relative to the point estimate
+    return np.maximum(rng.normal(qty, abs(qty) * row["Param1"], draws), 0.0)
+
+
+def _sample_uniform(rng, qty, row, draws):
+    return rng.uniform(row["Param1"], row["Param2"], draws)
+
+
+def _sample_triangular(rng, qty, row, draws):
+    return rng.triangular(row["Param1"], row["Param2"], row["Param3"], draws)
+
+
+def _sample_fixed(rng, qty, row, draws):
+    return np.full(draws, qty)
+
+
+SAMPLERS = {
+    "normal": _sample_normal,
+    "uniform": _sample_uniform,
+    "triangular": _sample_triangular,
+    "fixed": _sample_fixed,
+}
+
+
+def sample_parameters(params, distributions, draws, rng):
+    """
+    Draws model input quantities from their declared distributions.
+
+    Arguments:
+        params (dict): point estimates, keyed as in INPUT_ROWS
+        distributions (pd.DataFrame): as returned by load_input_distributions
+        draws (int): number of samples to draw
+        rng (np.random.Generator): the random generator to sample with
+
+    Returns:
+        dict: per-draw arrays for uncertain inputs, point estimates otherwise
+    """
+    sampled = dict(params)
+    for name, variable in INPUT_ROWS.items():
+        if variable in distributions.index:
+            row = distributions.loc[variable]
+            sampled[name] = SAMPLERS[row["Distribution"]](rng, params[name], row, draws)
+    return sampled
+
+
+class QuantileAccumulator:
+    """
+    Streaming quantile estimates for every (month, metric) cell.
+
+    Values are counted into fixed histogram bins between lower and upper, so
+    accumulators from different chunks or processes merge by adding counts.
+    Values outside the range are counted in the edge bins.
+
+    Arguments:
+        lower (np.ndarray): lower histogram edge of every cell
+        upper (np.ndarray): upper histogram edge of every cell
+        bins (int): number of bins per cell
+    """
+
+    def __init__(self, lower, upper, bins=512):
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.bins = bins
+        self.counts = np.zeros(self.lower.shape + (bins,), dtype=np.int64)
+
+    @classmethod
+    def from_pilot(cls, values, bins=512, margin=0.5):
+        """
+        Sizes the histogram range from a pilot sample of trajectories.
+
+        Arguments:
+            values (np.ndarray): (draws, months, metrics) pilot results
+            bins (int): number of bins per cell
+            margin (float): fraction of the pilot range added on each side
+
+        Returns:
+            QuantileAccumulator: an empty accumulator covering the pilot range
+        """
+        finite = np.where(np.isfinite(values), values, np.nan)
+        with np.errstate(invalid="ignore"):
+            lower = np.nan_to_num(np.nanmin(finite, axis=0))
+            upper = np.nan_to_num(np.nanmax(finite, axis=0))
+        pad = np.maximum((upper - lower) * margin, np.abs(upper) * 1e-6 + 1e-12)
+        return cls(lower - pad, upper + pad, bins)
+
+    def add(self, values):
+        """
+        Counts a chunk of trajectories into the histograms, NaNs are skipped.
+
+        Arguments:
+            values (np.ndarray): (draws, months, metrics) results
+        """
+        self.counts += self.histogram(values)
+
+    def histogram(self, values):
+        """
+        Bins a chunk of trajectories without adding it to the accumulator.
+
+        Arguments:
+            values (np.ndarray): (draws, months, metrics) results
+
+        Returns:
+            np.ndarray: (months, metrics, bins) counts
+        """
+        cells = self.lower.size
+        width = (self.upper - self.lower) / self.bins
+        with np.errstate(invalid="ignore"):
+            position = np.floor((values - self.lower) / width)
+        valid = ~np.isnan(position)
+        index = np.clip(np.where(valid, position, 0), 0, self.bins - 1)
+        index = (
+            index.astype(np.int64)
+            + np.arange(cells).reshape(self.lower.shape) * self.bins
+        )
+        counts = np.bincount(index[valid], minlength=cells * self.bins)
+        return counts.reshape(self.counts.shape)
+
+    def merge(self, counts):
+        """
+        Adds histogram counts produced elsewhere with the same range.
+
+        Arguments:
+            counts (np.ndarray): (months, metrics, bins) counts
+        """
+        self.counts += counts
+
+    @property
+    def total(self):
+        """
+        np.ndarray: the number of values counted in every cell
+        """
+        return self.counts.sum(axis=-1)
+
+    def quantiles(self, percentiles=DEFAULT_QUANTILES):
+        """
+        Estimates percentiles by interpolating inside the histogram bins.
+
+        Arguments:
+            percentiles (iterable): percentiles between 0 and 100
+
+        Returns:
+            np.ndarray: (len(percentiles), months, metrics) estimates, NaN for
+                cells with no values
+        """
+        cumulative = np.cumsum(self.counts, axis=-1)
+        total = cumulative[..., -1:]
+        width = (self.upper - self.lower) / self.bins
+        estimates = []
+        for percentile in percentiles:
+            target = percentile / 100 * total
+            # first bin whose cumulative count reaches the target
+            index = (cumulative < target).sum(axis=-1, keepdims=True)
+            index = np.minimum(index, self.bins - 1)
+            before = np.take_along_axis(
+                cumulative, index, axis=-1
+            ) - np.take_along_axis(self.counts, index, axis=-1)
+            in_bin = np.take_along_axis(self.counts, index, axis=-1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                fraction = np.clip((target - before) / in_bin, 0, 1)
+            value = self.lower + (index[..., 0] + fraction[..., 0]) * width
+            estimates.append(np.where(total[..., 0] > 0, value, np.nan))
+        return np.stack(estimates)
+
+
+@dataclass
+class MonteCarloProgress:
+    """
+    Quantile bands after some of the draws have been evaluated.
+
+    Arguments:
+        draws (int): the number of draws counted so far
+        total_draws (int): the number of draws requested
+        bands (dict): "P5" style keys to (months x metric) DataFrames
+    """
+
+    draws: int
+    total_draws: int
+    bands: dict
+
+
+def _bands(accumulator, percentiles):
+    estimates = accumulator.quantiles(percentiles)
+    return {
+        f"P{percentile:g}": pd.DataFrame(
+            estimate, columns=list(METRIC_NAMES)
+        ).rename_axis("Month")
+        for percentile, estimate in zip(percentiles, estimates)
+    }
+
+
+def _simulate_chunk(sliders, params, distributions, draws, seed, months):
+    # one chunk of draws, every draw runs the same slider scenario
+    rng = np.random.default_rng(seed)
+    sampled = sample_parameters(params, distributions, draws, rng)
+    return simulate_batch(np.repeat(sliders, draws, axis=0), sampled, months=months)
+
+
+def _histogram_chunk(task):
+    # worker entry point, returns counts only so trajectories never cross processes
+    sliders, params, distributions, draws, seed, months, lower, upper, bins = task
+    values = _simulate_chunk(sliders, params, distributions, draws, seed, months)
+    return draws, QuantileAccumulator(lower, upper, bins).histogram(values)
+
+
+def iter_monte_carlo(
+    sliders,
+    draws,
+    animal_inputs=None,
+    distributions=None,
+    chunk_size=2000,
+    workers=None,
+    seed=0,
+    bins=512,
+    percentiles=DEFAULT_QUANTILES,
+):
+    """
+    Runs a Monte Carlo analysis, yielding the quantile bands after every chunk.
+
+    The first chunk runs in this process and sets the histogram range, the
+    remaining chunks run on a process pool. Results are reproducible for a given
+    seed and chunk_size whatever the number of workers.
+
+    Arguments:
+        sliders (array-like): the nine slider values of the scenario
+        draws (int): total number of draws
+        animal_inputs (ModelAnimalInputs): point estimates, loaded from the data
+            folder by default
+        distributions (pd.DataFrame): input distributions, loaded from the data
+            folder by default
+        chunk_size (int): draws evaluated together in one batch
+        workers (int): worker processes, defaults to the CPU count, 0 runs every
+            chunk in this process
+        seed (int): seed of the random draws
+        bins (int): histogram bins per cell, sets the quantile resolution
+        percentiles (iterable): percentiles to report
+
+    Yields:
+        MonteCarloProgress: the bands over all draws evaluated so far
+
+    Raises:
+        ValueError: if draws or chunk_size is below 1
+    """
+    if draws < 1:
+        raise ValueError(f"draws must be >= 1, got {draws}")
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be >= 1, got {chunk_size}")
+    sliders = slider_array(sliders)[:1]
+    params = batch_parameters(animal_inputs or load_animal_inputs())
+    if distributions is None:
+        distributions = load_input_distributions()
+    return _monte_carlo_steps(
+        sliders,
+        draws,
+        params,
+        distributions,
+        chunk_size,
+        workers,
+        seed,
+        bins,
+        percentiles,
+    )
+
+
+def _monte_carlo_steps(
+    sliders, draws, params, distributions, chunk_size, workers, seed, bins, percentiles
+):
+    # the chunks of iter_monte_carlo, a generator so nothing runs until iterated
+    months = int(sliders[0, 5])
+    sizes = [min(chunk_size, draws - start) for start in range(0, draws, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    pilot = _simulate_chunk(sliders, params, distributions, sizes[0], seeds[0], months)
+    accumulator = QuantileAccumulator.from_pilot(pilot, bins=bins)
+    accumulator.add(pilot)
+    done = sizes[0]
+    del pilot
+    yield MonteCarloProgress(done, draws, _bands(accumulator, percentiles))
+
+    tasks = [
+        (sliders, params, distributions, size, chunk_seed, months)
+        + (accumulator.lower, accumulator.upper, bins)
+        for size, chunk_seed in zip(sizes[1:], seeds[1:])
+    ]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 0 or len(tasks) == 0:
+        results = map(_histogram_chunk, tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+        futures = [executor.submit(_histogram_chunk, task) for task in tasks]
+        results = (future.result() for future in as_completed(futures))
+    try:
+        for size, counts in results:
+            accumulator.merge(counts)
+            done += size
+            yield MonteCarloProgress(done, draws, _bands(accumulator, percentiles))
+    finally:
+        if workers != 0 and len(tasks) != 0:
+            executor.shutdown(cancel_futures=True)
+
+
+def run_monte_carlo(sliders, draws, **kwargs):
+    """
+    Runs a Monte Carlo analysis and returns the final quantile bands.
+
+    Arguments:
+        sliders (array-like): the nine slider values of the scenario
+        draws (int): total number of draws
+        **kwargs: passed on to iter_monte_carlo
+
+    Returns:
+        dict: "P5", "P50" and "P95" (by default) to (months x metric) DataFrames
+    """
+    for progress in iter_monte_carlo(sliders, draws, **kwargs):
+        pass
+    return progress.bands
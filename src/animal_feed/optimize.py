@@ -0,0 +1,167 @@
+"""
+Search the slider space for the scenario that saves the most feed.
+
+Uses the cross-entropy method: each iteration samples a population of slider
+settings, evaluates all of them at once with the batch engine, and refits the
+sampling distribution to the best of them. Constraints on any output metric are
+checked in every month of the horizon.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .batch import batch_parameters, simulate_batch
+from .inputs import load_animal_inputs, save_slider_scenario
+from .model import METRIC_INDEX, SLIDER_NAMES
+from .sensitivity import base_slider_values, design_to_sliders
+
+# the months slider sets the horizon, it is not optimised
+DEFAULT_PARAMETERS = tuple(name for name in SLIDER_NAMES if name != "months")
+OBJECTIVE_METRIC = "Combined Saved Feed"
+
+
+@dataclass
+class OptimizationResult:
+    """
+    The best slider setting found by optimize_sliders.
+
+    Arguments:
+        sliders (dict): slider name to value, for every slider
+        objective (float): cumulative Combined Saved Feed over the horizon
+        feasible (bool): whether every constraint holds in every month
+        evaluations (int): the number of model runs made
+        seconds (float): wall time of the search
+    """
+
+    sliders: dict
+    objective: float
+    feasible: bool
+    evaluations: int
+    seconds: float
+
+    def save_scenario(self, name):
+        """
+        Saves the sliders as a named scenario the dashboard can load.
+
+        Arguments:
+            name (str): the scenario name, saved as <name>_slider_values.csv
+
+        Returns:
+            pathlib.Path: the written file
+        """
+        return save_slider_scenario(name, self.sliders)
+
+
+def constraint_violation(results, constraints):
+    """
+    Measures how far each scenario is from satisfying the constraints.
+
+    Arguments:
+        results (np.ndarray): (N, months, metrics) batch results
+        constraints (dict): metric name to ("<=" or ">=", limit), applied in
+            every month
+
+    Returns:
+        np.ndarray: (N,) total violation relative to each limit, 0 if feasible
+            and inf where a constrained metric is NaN
+    """
+    violation = np.zeros(len(results))
+    for metric, (operator, limit) in constraints.items():
+        values = results[:, :, METRIC_INDEX[metric]]
+        if operator == "<=":
+            excess = values - limit
+        elif operator == ">=":
+            excess = limit - values
+        else:
+            raise ValueError(
+                f"constraint operator must be '<=' or '>=', got {operator}"
+            )
+        excess = np.nan_to_num(excess, nan=np.inf) / max(abs(limit), 1e-12)
+        violation += np.maximum(excess, 0).sum(axis=1)
+    return violation
+
+
+def optimize_sliders(
+    months=24,
+    constraints=None,
+    parameters=DEFAULT_PARAMETERS,
+    bounds=None,
+    base_sliders=None,
+    population=2000,
+    iterations=40,
+    elite_fraction=0.1,
+    smoothing=0.7,
+    integer=True,
+    seed=0,
+    animal_inputs=None,
+):
+    """
+    Finds the sliders that maximise cumulative Combined Saved Feed.
+
+    Arguments:
+        months (int): the horizon the saved feed is summed over
+        constraints (dict): metric name to ("<=" or ">=", limit), applied in
+            every month, e.g. {"Pig Hours %": ("<=", 0.5)}
+        parameters (tuple): the slider names to optimise
+        bounds (dict): slider name to (low, high), overrides SLIDER_BOUNDS
+        base_sliders (array-like): the nine slider values used for sliders that
+            are not optimised, the baseline scenario by default
+        population (int): slider settings evaluated per iteration
+        iterations (int): the maximum number of iterations
+        elite_fraction (float): share of the population the distribution is
+            refitted to
+        smoothing (float): weight of the new fit against the previous one
+        integer (bool): round sliders to whole numbers, as the dashboard does
+        seed (int): seed of the search
+        animal_inputs (ModelAnimalInputs): loaded from the data folder by default
+
+    Returns:
+        OptimizationResult: the best feasible setting, or the least infeasible
+            one if none satisfied the constraints
+    """
+    start = time.perf_counter()
+    constraints = constraints or {}
+    parameters = tuple(parameters)
+    rng = np.random.default_rng(seed)
+    params = batch_parameters(animal_inputs or load_animal_inputs())
+    base = base_slider_values(base_sliders, months)
+    elite_count = max(2, int(population * elite_fraction))
+
+    mean = np.full(len(parameters), 0.5)
+    spread = np.full(len(parameters), 0.5)
+    best = None
+    evaluations = 0
+    for _ in range(iterations):
+        unit = np.clip(rng.normal(mean, spread, (population, len(parameters))), 0, 1)
+        sliders = design_to_sliders(unit, parameters, base, bounds)
+        if integer:
+            sliders = np.round(sliders)
+        if best is not None:
+            sliders[0], unit[0] = best[0], best[1]
+        results = simulate_batch(sliders, params, months=months)
+        evaluations += len(sliders)
+        objective = np.nansum(results[:, :, METRIC_INDEX[OBJECTIVE_METRIC]], axis=1)
+        violation = constraint_violation(results, constraints)
+
+        # feasible settings first by objective, then the rest by violation
+        order = np.lexsort((-objective, violation))
+        top = order[0]
+        best = (sliders[top], unit[top], objective[top], violation[top])
+        elite = unit[order[:elite_count]]
+        mean = smoothing * elite.mean(axis=0) + (1 - smoothing) * mean
+        spread = smoothing * elite.std(axis=0) + (1 - smoothing) * spread
+        if spread.max() < 1e-3:
+            break
+
+    return OptimizationResult(
+        sliders={
+            name: int(value) if value.is_integer() else value
+            for name, value in zip(SLIDER_NAMES, best[0].tolist())
+        },
+        objective=float(best[2]),
+        feasible=bool(best[3] == 0),
+        evaluations=evaluations,
+        seconds=time.perf_counter() - start,
+    )
@@ -0,0 +1,276 @@
+"""
+State level simulation of the animal feed model.
+
+The national input quantities are split between the 50 states in proportion to
+the USDA state survey data in data/usda_other_data, and every state is run as
+one row of the batch engine, so all states advance together as a
+(states x months) array computation. Each state has its own slaughter
+capacity, which can optionally be lent to neighbouring states.
+"""
+
+import functools
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .batch import (
+    batch_parameters,
+    simulate_batch,
+    slider_array,
+)
+from .constants import (
+    COW_SLAUGHTER_HOURS,
+    PIG_SLAUGHTER_HOURS,
+    POULTRY_SLAUGHTER_HOURS,
+)
+from .datacache import load_usda_table
+from .inputs import DATA_PATH, load_animal_inputs
+from .model import METRIC_INDEX, results_frame
+
+NEIGHBORS_FILE = "state_neighbors.csv"
+
+# USDA survey series used to split the national quantities between states, and
+# how the survey periods of a state are combined: inventories are averaged,
+# flows such as births and slaughter are summed
+STATE_SERIES = {
+    "cattle": ("CattleByState.csv", "mean"),
+    "cows": ("Cattle( only cows) by state.csv", "mean"),
+    "calf_crop": ("carlf crop by state.csv", "sum"),
+    "hogs": ("HOGS - INVENTORY.csv", "mean"),
+    "pig_crop": ("Pig Crop by State 2022.csv", "sum"),
+    "hog_slaughter": ("Hogs Slaughtered By State 2022.csv", "sum"),
+}
+
+# the share column each model input quantity is split by. There is no state
+# poultry or cattle slaughter data in the repo, so those follow cattle numbers
+PARAMETER_SHARES = {
+    "total_pigs": "hogs",
+    "piglets_pm": "pig_crop",
+    "pigs_slaughter_pm": "hog_slaughter",
+    "total_poultry": "cattle",
+    "poultry_slaughter_pm": "cattle",
+    "total_calves": "cattle",
+    "dairy_cows": "cows",
+    "beef_cows": "cows",
+    "beef_steers": "cattle",
+    "heifers": "cattle",
+    "new_calves_per_year": "calf_crop",
+    "cow_slaughter_pm": "cattle",
+}
+
+# metrics that are ratios to the slaughter capacity, not totals over states
+CAPACITY_METRICS = {
+    "Beef Hours %": "Beef Slaughtered Hours",
+    "Dairy Hours %": "Dairy Slaughtered Hours",
+    "Pig Hours %": "Pig Slaughtered Hours",
+    "Poultry Hours %": "Poultry Slaughtered Hours",
+}
+
+
+def read_state_series(filename, how="sum"):
+    """
+    Reads a USDA QuickStats state export through the columnar cache, combining
+    the periods of each state.
+
+    Withheld values such as (D) are skipped, states missing from the export
+    are NaN.
+
+    Arguments:
+        filename (str): name of the file in data/usda_other_data
+        how (str): "sum" or "mean" of the periods reported for a state
+
+    Returns:
+        pd.Series: head count indexed by state name
+    """
+    frame = load_usda_table(filename)
+    grouped = frame["Value"].groupby(frame["State"])
+    return grouped.sum(min_count=1) if how == "sum" else grouped.mean()
+
+
+def _fill_missing(series, proxy):
+    # states without a value get the proxy scaled by the ratio where both exist
+    both = series.notna() & proxy.notna()
+    ratio = series[both].sum() / proxy[both].sum()
+    return series.fillna(proxy * ratio).fillna(0.0)
+
+
+@functools.lru_cache(maxsize=None)
+def load_state_shares():
+    """
+    Works out each state's share of every USDA series once per process.
+
+    States missing from the pig crop and hog slaughter exports are filled in
+    from their hog inventory, states with no hog inventory have no pigs.
+
+    Returns:
+        pd.DataFrame: one row per state, one column per STATE_SERIES key, each
+            column summing to 1
+    """
+    series = {
+        name: read_state_series(filename, how)
+        for name, (filename, how) in STATE_SERIES.items()
+    }
+    states = series["cattle"].index
+    series = {name: values.reindex(states) for name, values in series.items()}
+    series["pig_crop"] = _fill_missing(series["pig_crop"], series["hogs"])
+    series["hog_slaughter"] = _fill_missing(series["hog_slaughter"], series["hogs"])
+    counts = pd.DataFrame(series).fillna(0.0)
+    return counts / counts.sum()
+
+
+@functools.lru_cache(maxsize=None)
+def load_state_neighbors():
+    """
+    Loads the pairs of states that share a border once per process.
+
+    Returns:
+        pd.DataFrame: one row per pair, State and Neighbor columns
+    """
+    return pd.read_csv(DATA_PATH.joinpath(NEIGHBORS_FILE))
+
+
+def neighbor_matrix(states, neighbors=None):
+    """
+    Builds the symmetric 0/1 matrix of neighbouring states.
+
+    Arguments:
+        states (pd.Index): the state order of the matrix
+        neighbors (pd.DataFrame): State and Neighbor pairs, the shipped border
+            list by default
+
+    Returns:
+        np.ndarray: (states, states) matrix, 1 where two states are neighbours
+    """
+    if neighbors is None:
+        neighbors = load_state_neighbors()
+    rows = states.get_indexer(neighbors["State"])
+    columns = states.get_indexer(neighbors["Neighbor"])
+    known = (rows >= 0) & (columns >= 0)
+    matrix = np.zeros((len(states), len(states)))
+    matrix[rows[known], columns[known]] = 1.0
+    matrix[columns[known], rows[known]] = 1.0
+    return matrix
+
+
+def state_parameters(params, shares):
+    """
+    Splits the national input quantities between states.
+
+    Arguments:
+        params (dict): national quantities, keyed as in INPUT_ROWS
+        shares (pd.DataFrame): state shares, as returned by load_state_shares
+
+    Returns:
+        dict: per-state arrays for the quantities in PARAMETER_SHARES, the
+            national value for gestations and litter size
+    """
+    split = dict(params)
+    for name, column in PARAMETER_SHARES.items():
+        split[name] = params[name] * shares[column].to_numpy()
+    return split
+
+
+@dataclass
+class RegionalResult:
+    """
+    Results of a state level run.
+
+    Arguments:
+        states (pd.Index): the state names, in row order
+        values (np.ndarray): (states, months, len(METRIC_NAMES)) results
+        capacity_hours (np.ndarray): (states,) monthly slaughter capacity hours
+    """
+
+    states: pd.Index
+    values: np.ndarray
+    capacity_hours: np.ndarray
+
+    def state_frame(self, state):
+        """
+        Tabulates the results of one state.
+
+        Arguments:
+            state (str): a state name, e.g. "IOWA"
+
+        Returns:
+            pd.DataFrame: one row per month, columns as METRIC_NAMES
+        """
+        return results_frame(self.values[self.states.get_loc(state)])
+
+    def national(self):
+        """
+        Aggregates the states back to the national view.
+
+        Totals are summed over states and the capacity ratios are recomputed
+        against the national slaughter capacity.
+
+        Returns:
+            pd.DataFrame: one row per month, columns as METRIC_NAMES
+        """
+        total = self.values.sum(axis=0)
+        for ratio, hours in CAPACITY_METRICS.items():
+            total[:, METRIC_INDEX[ratio]] = (
+                total[:, METRIC_INDEX[hours]] / self.capacity_hours.sum()
+            )
+        total[:, METRIC_INDEX["Month"]] = self.values[0, :, METRIC_INDEX["Month"]]
+        return results_frame(total)
+
+    def metric(self, metric):
+        """
+        Tabulates one metric for every state and month.
+
+        Arguments:
+            metric (str): one of METRIC_NAMES
+
+        Returns:
+            pd.DataFrame: one row per month, one column per state
+        """
+        return pd.DataFrame(
+            self.values[:, :, METRIC_INDEX[metric]].T,
+            columns=self.states,
+        ).rename_axis("Month")
+
+
+def simulate_states(
+    sliders,
+    animal_inputs=None,
+    shares=None,
+    share_capacity=False,
+    neighbors=None,
+):
+    """
+    Runs the model for every state at once.
+
+    Arguments:
+        sliders (array-like): the nine slider values used in every state, or
+            (states, 9) values per state
+        animal_inputs (ModelAnimalInputs): national quantities, loaded from the
+            data folder by default
+        shares (pd.DataFrame): state shares with the PARAMETER_SHARES columns,
+            load_state_shares() by default
+        share_capacity (bool): lend spare cow slaughter capacity to
+            neighbouring states
+        neighbors (pd.DataFrame): State and Neighbor pairs used when sharing,
+            the shipped border list by default
+
+    Returns:
+        RegionalResult: the results of every state
+    """
+    if shares is None:
+        shares = load_state_shares()
+    params = state_parameters(
+        batch_parameters(animal_inputs or load_animal_inputs()), shares
+    )
+    sliders = slider_array(sliders)
+    sliders = np.broadcast_to(sliders, (len(shares), sliders.shape[1]))
+    sharing = neighbor_matrix(shares.index, neighbors) if share_capacity else None
+    values = simulate_batch(
+        sliders, params, months=int(sliders[:, 5].max()), capacity_sharing=sharing
+    )
+    capacity_hours = (
+        params["cow_slaughter_pm"] * COW_SLAUGHTER_HOURS
+        + params["pigs_slaughter_pm"] * PIG_SLAUGHTER_HOURS
+        + params["poultry_slaughter_pm"] * POULTRY_SLAUGHTER_HOURS
+    ) * (sliders[:, 2] * 0.01)
+    return RegionalResult(shares.index, values, capacity_hours)
@@ -0,0 +1,151 @@
+"""
+Parser for the USDA weekly "Federally Inspected Slaughter By Region" reports.
+
+The run_results_<year>_slaughter.csv scrapes in data/usda_other_data embed one
+plain text report per row. Reports are streamed from the csv and tokenised
+line by line in a single pass. Fields are found by their labels, the
+"Week Ending" line, the "Standard <species>" section headers and the "U.S."
+totals rows, so they do not depend on line numbers.
+"""
+
+import csv
+import datetime
+import pathlib
+import re
+
+import numpy as np
+import pandas as pd
+
+from .datacache import USDA_PATH
+
+REPORT_COLUMN = "selection4_selection5"
+RUN_RESULTS_FILE = "run_results_{year}_slaughter.csv"
+
+# columns of the U.S. totals row of each section, keyed by the first species
+# named in the section header. Values are in 1,000 head
+SECTION_COLUMNS = {
+    "Cattle": (
+        "Cattle",
+        "Steers",
+        "Heifers",
+        "Dairy Cows",
+        "Other Cows",
+        "Bulls",
+        "Calves",
+    ),
+    "Hogs": (
+        "Hogs",
+        "Barrows And Gilts",
+        "Sows",
+        "Boars",
+        "Sheep",
+        "Mature Sheep",
+        "Lambs And Yearlings",
+    ),
+}
+REPORT_COLUMNS = tuple(
+    column for columns in SECTION_COLUMNS.values() for column in columns
+)
+
+WEEK_ENDING = re.compile(r"Week Ending\s+(\d{1,2}/\d{1,2}/\d{4})")
+SECTION = re.compile(r"Standard\s+(\w+)")
+TOTALS = re.compile(r"U\.S\.(?:\s+\d+/)?\s+(.*)")
+
+
+def _report_value(token):
+    # "-" represents zero and "(D)" is withheld
+    if token == "-":
+        return 0.0
+    try:
+        return float(token.replace(",", ""))
+    except ValueError:
+        return np.nan
+
+
+def parse_weekly_report(text):
+    """
+    Extracts the week and the national totals from one report.
+
+    Arguments:
+        text (str): the plain text of one weekly report
+
+    Returns:
+        dict: "Date" (datetime.datetime) and every REPORT_COLUMNS total found, None
+            if the report has no Week Ending line
+    """
+    record = {}
+    section = None
+    for line in text.splitlines():
+        if "Date" not in record:
+            match = WEEK_ENDING.search(line)
+            if match:
+                record["Date"] = datetime.datetime.strptime(match.group(1), "%m/%d/%Y")
+                continue
+        match = SECTION.match(line)
+        if match:
+            section = SECTION_COLUMNS.get(match.group(1))
+            continue
+        if section is not None:
+            match = TOTALS.match(line)
+            if match:
+                tokens = match.group(1).split()
+                record.update(zip(section, map(_report_value, tokens)))
+                section = None
+    return record if "Date" in record else None
+
+
+def iter_report_texts(path):
+    """
+    Streams the embedded report texts out of a scrape csv, one row at a time.
+
+    Arguments:
+        path (pathlib.Path): a run_results csv file
+
+    Yields:
+        str: the text of each non empty report
+    """
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            text = row.get(REPORT_COLUMN)
+            if text:
+                yield text
+
+
+def parse_slaughter_reports(paths):
+    """
+    Parses every weekly report in one or more scrape csv files.
+
+    A week reported more than once keeps its first report.
+
+    Arguments:
+        paths (iterable): run_results csv files, any number of years
+
+    Returns:
+        pd.DataFrame: one row per week indexed by Date in ascending order,
+            float REPORT_COLUMNS columns in 1,000 head, NaN where withheld
+    """
+    records = (
+        parse_weekly_report(text) for path in paths for text in iter_report_texts(path)
+    )
+    frame = pd.DataFrame.from_records(
+        [record for record in records if record is not None],
+        columns=("Date",) + REPORT_COLUMNS,
+    )
+    frame = frame.drop_duplicates("Date").set_index("Date").sort_index()
+    return frame.astype(float)
+
+
+def load_weekly_slaughter(years=(2019, 2020)):
+    """
+    Parses the shipped run_results scrapes for some years.
+
+    Arguments:
+        years (iterable): years with a run_results_<year>_slaughter.csv file
+
+    Returns:
+        pd.DataFrame: as returned by parse_slaughter_reports
+    """
+    return parse_slaughter_reports(
+        pathlib.Path(USDA_PATH).joinpath(RUN_RESULTS_FILE.format(year=year))
+        for year in years
+    )
@@ -0,0 +1,211 @@
+"""
+Headless batch runner for slider scenario csv files.
+
+Every csv in the default_slider_values.csv format is one scenario. Scenarios
+are split into chunks that run through the batch engine on a process pool.
+Each scenario's results are written as a compressed .npz file with one array
+per METRIC_NAMES column, and one row per scenario goes into summary.csv.
+
+Only NumPy and pandas are imported, never Dash, plotly or matplotlib.
+
+Run `python -m animal_feed.runner scenarios/ --output results/` from the src
+folder, see `--help` for the options.
+"""
+
+import argparse
+import glob
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .batch import batch_parameters, batch_result_frame, simulate_batch
+from .inputs import load_animal_inputs
+from .model import SLIDER_NAMES
+
+SUMMARY_FILE = "summary.csv"
+# final month values reported in the summary
+SUMMARY_POPULATIONS = ("Beef Pop", "Dairy Pop", "Pigs Pop", "Poultry Pop")
+# values summed over all months in the summary
+SUMMARY_TOTALS = ("Combined Feed", "Combined Saved Feed")
+
+
+def find_scenario_files(patterns):
+    """
+    Expands directories and glob patterns to slider csv files.
+
+    Arguments:
+        patterns (iterable): directories, whose csv files are all used, or glob
+            patterns
+
+    Returns:
+        list: the matching pathlib.Path files, sorted and without duplicates
+    """
+    files = set()
+    for pattern in patterns:
+        path = pathlib.Path(pattern)
+        if path.is_dir():
+            files.update(path.glob("*.csv"))
+        else:
+            files.update(pathlib.Path(match) for match in glob.glob(pattern))
+    return sorted(files)
+
+
+def read_slider_file(path):
+    """
+    Reads the slider values of one scenario csv.
+
+    Arguments:
+        path (pathlib.Path): a csv in the default_slider_values.csv format
+
+    Returns:
+        np.ndarray: the nine slider values in SLIDER_NAMES order
+    """
+    qty = pd.read_csv(path, index_col="Variable")["Qty"]
+    missing = set(SLIDER_NAMES) - set(qty.index)
+    if missing:
+        raise ValueError(f"{path} is missing sliders: {sorted(missing)}")
+    return qty.loc[list(SLIDER_NAMES)].to_numpy(dtype=float)
+
+
+def write_result(frame, path):
+    """
+    Writes one scenario's results as compressed columns.
+
+    Arguments:
+        frame (pd.DataFrame): the scenario results, columns as METRIC_NAMES
+        path (pathlib.Path): the .npz file to write
+    """
+    np.savez_compressed(path, **{name: frame[name].to_numpy() for name in frame})
+
+
+def read_result(path):
+    """
+    Reads back a result written by write_result.
+
+    Arguments:
+        path (pathlib.Path): the .npz file
+
+    Returns:
+        pd.DataFrame: the scenario results, columns as METRIC_NAMES
+    """
+    with np.load(path) as columns:
+        return pd.DataFrame({name: columns[name] for name in columns.files})
+
+
+def summarise_result(name, frame):
+    """
+    Condenses one scenario's results to a summary row.
+
+    Arguments:
+        name (str): the scenario name
+        frame (pd.DataFrame): the scenario results, columns as METRIC_NAMES
+
+    Returns:
+        dict: the scenario, its months, the final populations and feed totals
+    """
+    row = {"Scenario": name, "Months": len(frame)}
+    for column in SUMMARY_POPULATIONS:
+        row[f"Final {column}"] = frame[column].iloc[-1] if len(frame) else np.nan
+    for column in SUMMARY_TOTALS:
+        row[f"Total {column}"] = frame[column].sum()
+    return row
+
+
+def _run_chunk(task):
+    # worker entry point, writes the results itself so only summaries come back
+    names, sliders, params, output_dir = task
+    results = simulate_batch(sliders, params)
+    rows = []
+    for index, name in enumerate(names):
+        frame = batch_result_frame(results, index)
+        write_result(frame, pathlib.Path(output_dir).joinpath(name + ".npz"))
+        rows.append(summarise_result(name, frame))
+    return rows
+
+
+def run_scenario_files(files, output_dir, workers=None, chunk_size=64):
+    """
+    Runs slider csv files through the batch engine and writes their results.
+
+    Arguments:
+        files (iterable): slider csv files, each named after its scenario
+        output_dir (pathlib.Path): folder for the .npz results and summary.csv
+        workers (int): worker processes, defaults to the CPU count, 0 runs every
+            chunk in this process
+        chunk_size (int): scenarios run together in one batch
+
+    Returns:
+        pd.DataFrame: the summary table, one row per scenario
+    """
+    files = list(files)
+    names = [pathlib.Path(path).stem for path in files]
+    if len(set(names)) != len(names):
+        raise ValueError("scenario files must have unique names")
+    output_dir = pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sliders = np.array([read_slider_file(path) for path in files]).reshape(
+        len(files), len(SLIDER_NAMES)
+    )
+    params = batch_parameters(load_animal_inputs())
+    tasks = [
+        (names[start : start + chunk_size], sliders[start : start + chunk_size])
+        + (params, str(output_dir))
+        for start in range(0, len(files), chunk_size)
+    ]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 0 or len(tasks) <= 1:
+        chunks = list(map(_run_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            chunks = list(executor.map(_run_chunk, tasks))
+    summary = pd.DataFrame.from_records(
+        [row for rows in chunks for row in rows],
+        columns=["Scenario", "Months"]
+        + [f"Final {column}" for column in SUMMARY_POPULATIONS]
+        + [f"Total {column}" for column in SUMMARY_TOTALS],
+    )
+    summary.to_csv(output_dir.joinpath(SUMMARY_FILE), index=False)
+    return summary
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Arguments:
+        argv (list): the arguments, sys.argv[1:] by default
+
+    Returns:
+        int: the exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m animal_feed.runner",
+        description="Run slider scenario csv files without the dashboard.",
+    )
+    parser.add_argument(
+        "scenarios", nargs="+", help="directories or glob patterns of slider csvs"
+    )
+    parser.add_argument(
+        "-o", "--output", default="results", help="folder for the results"
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None, help="worker processes"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=64, help="scenarios per batch"
+    )
+    args = parser.parse_args(argv)
+    files = find_scenario_files(args.scenarios)
+    if not files:
+        parser.error("no scenario files found")
+    summary = run_scenario_files(files, args.output, args.workers, args.chunk_size)
+    print(f"ran {len(summary)} scenarios, results in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,388 @@
+"""
+Global sensitivity analysis of the model outputs to the slider parameters.
+
+Supports variance based Sobol indices (Saltelli sampling) and Morris
+elementary effects. Designs are evaluated in chunks with the batch engine on a
+process pool, and finished chunks can be checkpointed to disk so that long
+analyses resume where they stopped.
+"""
+
+import json
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .batch import batch_parameters, simulate_batch
+from .inputs import inputs_digest, load_animal_inputs, load_slider_defaults
+from .model import METRIC_INDEX, METRIC_NAMES, SLIDER_BOUNDS, SLIDER_NAMES
+
+# the months slider sets the horizon, it is not analysed as a parameter
+DEFAULT_PARAMETERS = tuple(name for name in SLIDER_NAMES if name != "months")
+DEFAULT_METRICS = tuple(name for name in METRIC_NAMES if name != "Month")
+
+
+@dataclass
+class SensitivityResult:
+    """
+    Sensitivity indices for every parameter, month and output metric.
+
+    Arguments:
+        method (str): "sobol" or "morris"
+        parameters (tuple): the slider names analysed
+        metrics (tuple): the output metrics analysed
+        indices (dict): index name to a (parameters, months, metrics) array.
+            Sobol gives "S1" and "ST", Morris gives "mu", "mu_star" and "sigma"
+    """
+
+    method: str
+    parameters: tuple
+    metrics: tuple
+    indices: dict
+
+    def to_frame(self, metric, month=-1):
+        """
+        Tabulates the indices of one metric in one month.
+
+        Arguments:
+            metric (str): one of the analysed metrics
+            month (int): the month to report, the last one by default
+
+        Returns:
+            pd.DataFrame: one row per parameter, one column per index
+        """
+        column = self.metrics.index(metric)
+        return pd.DataFrame(
+            {name: values[:, month, column] for name, values in self.indices.items()},
+            index=pd.Index(self.parameters, name="Parameter"),
+        )
+
+
+def design_to_sliders(unit_design, parameters, base_sliders, bounds=None):
+    """
+    Maps a design on the unit cube to full slider rows.
+
+    Arguments:
+        unit_design (np.ndarray): (rows, len(parameters)) values in [0, 1]
+        parameters (tuple): the slider names the design columns vary
+        base_sliders (array-like): the nine slider values used for every
+            slider that is not varied
+        bounds (dict): slider name to (low, high), SLIDER_BOUNDS by default
+
+    Returns:
+        np.ndarray: (rows, 9) slider values
+    """
+    bounds = {**SLIDER_BOUNDS, **(bounds or {})}
+    sliders = np.tile(np.asarray(base_sliders, dtype=float), (len(unit_design), 1))
+    for column, name in enumerate(parameters):
+        low, high = bounds[name]
+        values = low + unit_design[:, column] * (high - low)
+        if name == "use_grass_and_residues_for_dairy":
+            values = np.round(values)
+        sliders[:, SLIDER_NAMES.index(name)] = values
+    return sliders
+
+
+def saltelli_design(samples, dimensions, rng):
+    """
+    Builds the Saltelli design for first order and total Sobol indices.
+
+    Arguments:
+        samples (int): number of base samples N
+        dimensions (int): number of parameters k
+        rng (np.random.Generator): the random generator to sample with
+
+    Returns:
+        np.ndarray: (N * (k + 2), k) unit design, rows ordered A, B, AB_1..AB_k
+    """
+    a = rng.random((samples, dimensions))
+    b = rng.random((samples, dimensions))
+    blocks = [a, b]
+    for column in range(dimensions):
+        ab = a.copy()
+        ab[:, column] = b[:, column]
+        blocks.append(ab)
+    return np.concatenate(blocks)
+
+
+def morris_design(trajectories, dimensions, levels, rng):
+    """
+    Builds Morris one-at-a-time trajectories on a grid of levels.
+
+    Arguments:
+        trajectories (int): number of trajectories r
+        dimensions (int): number of parameters k
+        levels (int): number of grid levels p, an even number
+        rng (np.random.Generator): the random generator to sample with
+
+    Returns:
+        np.ndarray: (r * (k + 1), k) unit design, one trajectory after another
+    """
+    delta = levels / (2 * (levels - 1))
+    starts = np.arange(levels // 2) / (levels - 1)
+    lower = np.tril(np.ones((dimensions + 1, dimensions)), -1)
+    ones = np.ones((dimensions + 1, dimensions))
+    blocks = []
+    for _ in range(trajectories):
+        x_star = rng.choice(starts, dimensions)
+        directions = np.diag(rng.choice([-1.0, 1.0], dimensions))
+        permutation = np.eye(dimensions)[rng.permutation(dimensions)]
+        steps = (delta / 2) * ((2 * lower - ones) @ directions + ones)
+        blocks.append((x_star + steps) @ permutation)
+    return np.concatenate(blocks)
+
+
+def _evaluate_chunk(task):
+    # worker entry point, returns only the requested metrics
+    index, sliders, params, months, metric_index = task
+    return index, simulate_batch(sliders, params, months=months)[..., metric_index]
+
+
+def _save_atomic(path, array):
+    # write then rename, so an interrupted run never leaves a partial chunk
+    temporary = path.with_suffix(".tmp.npy")
+    np.save(temporary, array)
+    os.replace(temporary, path)
+
+
+def _prepare_checkpoint(checkpoint_dir, metadata, sliders):
+    # returns the design to evaluate, reusing the one stored in the checkpoint
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    metadata_path = checkpoint_dir.joinpath("design.json")
+    design_path = checkpoint_dir.joinpath("design.npy")
+    if metadata_path.exists():
+        stored = json.loads(metadata_path.read_text())
+        if stored != metadata:
+            raise ValueError(
+                f"checkpoint in {checkpoint_dir} was written for a different design"
+            )
+        return np.load(design_path)
+    _save_atomic(design_path, sliders)
+    metadata_path.write_text(json.dumps(metadata, indent=2))
+    return sliders
+
+
+def evaluate_design(
+    sliders,
+    months,
+    metrics=DEFAULT_METRICS,
+    chunk_size=4096,
+    workers=None,
+    checkpoint_dir=None,
+    metadata=None,
+    animal_inputs=None,
+):
+    """
+    Runs the model on every row of a slider design.
+
+    Arguments:
+        sliders (np.ndarray): (rows, 9) slider values
+        months (int): number of months to simulate
+        metrics (tuple): the output metrics to keep
+        chunk_size (int): rows evaluated together in one batch
+        workers (int): worker processes, defaults to the CPU count, 0 runs every
+            chunk in this process
+        checkpoint_dir (str or pathlib.Path): folder to store finished chunks
+            in, a rerun with the same folder skips them
+        metadata (dict): description of the design, checked on resume along
+            with the months, metrics, chunk size and animal inputs
+        animal_inputs (ModelAnimalInputs): loaded from the data folder by default
+
+    Returns:
+        np.ndarray: (rows, months, len(metrics)) results
+    """
+    animal_inputs = animal_inputs or load_animal_inputs()
+    if checkpoint_dir is not None:
+        checkpoint_dir = pathlib.Path(checkpoint_dir)
+        metadata = dict(
+            metadata or {},
+            months=months,
+            metrics=list(metrics),
+            chunk_size=chunk_size,
+            inputs=inputs_digest(animal_inputs),
+        )
+        sliders = _prepare_checkpoint(checkpoint_dir, metadata, sliders)
+    params = batch_parameters(animal_inputs)
+    metric_index = [METRIC_INDEX[name] for name in metrics]
+    results = np.empty((len(sliders), months, len(metric_index)))
+
+    tasks = []
+    for index, start in enumerate(range(0, len(sliders), chunk_size)):
+        rows = slice(start, start + chunk_size)
+        path = None
+        if checkpoint_dir is not None:
+            path = checkpoint_dir.joinpath(f"chunk_{index:05d}.npy")
+            if path.exists():
+                results[rows] = np.load(path)
+                continue
+        tasks.append(((index, sliders[rows], params, months, metric_index), rows, path))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 0 or len(tasks) <= 1:
+        finished = map(_evaluate_chunk, [task for task, _, _ in tasks])
+        _collect(finished, tasks, results)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            futures = [executor.submit(_evaluate_chunk, task) for task, _, _ in tasks]
+            finished = (future.result() for future in as_completed(futures))
+            _collect(finished, tasks, results)
+    return results
+
+
+def _collect(finished, tasks, results):
+    # stores each finished chunk in the results and its checkpoint file
+    destinations = {task[0]: (rows, path) for task, rows, path in tasks}
+    for index, values in finished:
+        rows, path = destinations[index]
+        results[rows] = values
+        if path is not None:
+            _save_atomic(path, values)
+
+
+def base_slider_values(base_sliders, months):
+    """
+    Completes the slider values held fixed during an analysis.
+
+    Arguments:
+        base_sliders (array-like): the nine slider values, or None for the
+            baseline scenario
+        months (int): the horizon, replaces the months slider
+
+    Returns:
+        np.ndarray: the nine slider values
+    """
+    if base_sliders is None:
+        defaults = load_slider_defaults("baseline")
+        base_sliders = [getattr(defaults, name) for name in SLIDER_NAMES]
+    base_sliders = np.asarray(base_sliders, dtype=float).copy()
+    base_sliders[SLIDER_NAMES.index("months")] = months
+    return base_sliders
+
+
+def _design_metadata(parameters, base_sliders, bounds):
+    # what a design's sliders depend on besides the method, size and seed
+    bounds = {**SLIDER_BOUNDS, **(bounds or {})}
+    return {
+        "parameters": list(parameters),
+        "base_sliders": base_sliders.tolist(),
+        "bounds": {
+            name: [float(value) for value in bounds[name]] for name in parameters
+        },
+    }
+
+
+def sobol_analysis(
+    samples,
+    parameters=DEFAULT_PARAMETERS,
+    months=24,
+    metrics=DEFAULT_METRICS,
+    bounds=None,
+    base_sliders=None,
+    seed=0,
+    **kwargs,
+):
+    """
+    Estimates first order and total Sobol indices with Saltelli sampling.
+
+    Needs samples * (len(parameters) + 2) model runs. Uses the Saltelli (2010)
+    first order and Jansen total effect estimators.
+
+    Arguments:
+        samples (int): number of base samples N
+        parameters (tuple): the slider names to analyse
+        months (int): the simulation horizon
+        metrics (tuple): the output metrics to analyse
+        bounds (dict): slider name to (low, high), overrides SLIDER_BOUNDS
+        base_sliders (array-like): values of the sliders not analysed, the
+            baseline scenario by default
+        seed (int): seed of the design
+        **kwargs: chunk_size, workers, checkpoint_dir and animal_inputs, passed
+            on to evaluate_design
+
+    Returns:
+        SensitivityResult: "S1" and "ST" indices
+    """
+    parameters = tuple(parameters)
+    dimensions = len(parameters)
+    unit = saltelli_design(samples, dimensions, np.random.default_rng(seed))
+    base_sliders = base_slider_values(base_sliders, months)
+    sliders = design_to_sliders(unit, parameters, base_sliders, bounds)
+    metadata = {"method": "sobol", "samples": samples, "seed": seed}
+    metadata.update(_design_metadata(parameters, base_sliders, bounds))
+    outputs = evaluate_design(sliders, months, metrics, metadata=metadata, **kwargs)
+
+    y_a = outputs[:samples]
+    y_b = outputs[samples : 2 * samples]
+    y_ab = outputs[2 * samples :].reshape((dimensions, samples) + outputs.shape[1:])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = np.var(np.concatenate([y_a, y_b]), axis=0)
+        first_order = np.mean(y_b * (y_ab - y_a), axis=1) / variance
+        total = 0.5 * np.mean((y_a - y_ab) ** 2, axis=1) / variance
+    return SensitivityResult(
+        "sobol", parameters, tuple(metrics), {"S1": first_order, "ST": total}
+    )
+
+
+def morris_analysis(
+    trajectories,
+    levels=4,
+    parameters=DEFAULT_PARAMETERS,
+    months=24,
+    metrics=DEFAULT_METRICS,
+    bounds=None,
+    base_sliders=None,
+    seed=0,
+    **kwargs,
+):
+    """
+    Screens parameters with Morris elementary effects.
+
+    Needs trajectories * (len(parameters) + 1) model runs. Effects are per unit
+    of the scaled parameter range, so they compare across sliders.
+
+    Arguments:
+        trajectories (int): number of trajectories r
+        levels (int): number of grid levels p, an even number
+        parameters (tuple): the slider names to analyse
+        months (int): the simulation horizon
+        metrics (tuple): the output metrics to analyse
+        bounds (dict): slider name to (low, high), overrides SLIDER_BOUNDS
+        base_sliders (array-like): values of the sliders not analysed, the
+            baseline scenario by default
+        seed (int): seed of the design
+        **kwargs: chunk_size, workers, checkpoint_dir and animal_inputs, passed
+            on to evaluate_design
+
+    Returns:
+        SensitivityResult: "mu", "mu_star" and "sigma" of the elementary effects
+    """
+    parameters = tuple(parameters)
+    dimensions = len(parameters)
+    unit = morris_design(trajectories, dimensions, levels, np.random.default_rng(seed))
+    base_sliders = base_slider_values(base_sliders, months)
+    sliders = design_to_sliders(unit, parameters, base_sliders, bounds)
+    metadata = {"method": "morris", "trajectories": trajectories, "seed": seed}
+    metadata.update(levels=levels, **_design_metadata(parameters, base_sliders, bounds))
+    outputs = evaluate_design(sliders, months, metrics, metadata=metadata, **kwargs)
+
+    unit = unit.reshape(trajectories, dimensions + 1, dimensions)
+    outputs = outputs.reshape((trajectories, dimensions + 1) + outputs.shape[1:])
+    step = np.diff(unit, axis=1)
+    changed = np.argmax(step != 0, axis=2)
+    effects = np.empty((dimensions, trajectories) + outputs.shape[2:])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for trajectory in range(trajectories):
+            for position, parameter in enumerate(changed[trajectory]):
+                effects[parameter, trajectory] = (
+                    outputs[trajectory, position + 1] - outputs[trajectory, position]
+                ) / step[trajectory, position, parameter]
+        indices = {
+            "mu": effects.mean(axis=1),
+            "mu_star": np.abs(effects).mean(axis=1),
+            "sigma": effects.std(axis=1, ddof=min(1, trajectories - 1)),
+        }
+    return SensitivityResult("morris", parameters, tuple(metrics), indices)
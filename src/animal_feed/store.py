@@ -0,0 +1,180 @@
+"""
+Persistent store of model results in SQLite, shared by worker processes.
+
+Results are keyed by a hash of the slider values, the model input quantities
+and MODEL_VERSION, so a stored result is only served for the exact run that
+made it, and a change to InputDataAndSources.csv or the model leaves earlier
+results unused until they are evicted. The database is in WAL mode, so
+several gunicorn workers can read while one writes, and every operation opens
+its own connection, which keeps the store safe across threads and forks. When
+the stored results outgrow max_bytes the least recently used are evicted.
+"""
+
+import contextlib
+import hashlib
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from .cache import SLIDER_KEY_DECIMALS
+from .inputs import inputs_digest
+from .model import METRIC_NAMES, MODEL_VERSION
+
+RESULTS_PATH = pathlib.Path(__file__).parent.joinpath("../../results").resolve()
+STORE_PATH = RESULTS_PATH.joinpath("model_results.sqlite")
+# bump when the table layout changes, the table is then recreated
+FORMAT_VERSION = 1
+# seconds a connection waits for another worker's write to finish
+BUSY_TIMEOUT = 10.0
+
+
+def result_key(sliders, animal_inputs):
+    """
+    Builds the content address of one model run.
+
+    Arguments:
+        sliders (iterable): the nine slider values, in SLIDER_NAMES order
+        animal_inputs (ModelAnimalInputs): the animal inputs the model runs on
+
+    Returns:
+        str: the sha256 hex digest of the sliders, inputs and model version
+    """
+    normalised = [round(float(value), SLIDER_KEY_DECIMALS) for value in sliders]
+    text = json.dumps([normalised, inputs_digest(animal_inputs), MODEL_VERSION])
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultStore:
+    """
+    Size bounded, least recently used store of model results on disk.
+
+    Arguments:
+        path (pathlib.Path): the SQLite database file, created if missing
+        max_bytes (int): the most result bytes kept before evicting
+    """
+
+    def __init__(self, path=STORE_PATH, max_bytes=256 * 2**20):
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must be >= 0, got {max_bytes}")
+        self.path = pathlib.Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            if connection.execute("PRAGMA user_version").fetchone()[0] != (
+                FORMAT_VERSION
+            ):
+                connection.execute("DROP TABLE IF EXISTS results")
+                connection.execute(f"PRAGMA user_version={FORMAT_VERSION}")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY,"
+                " data BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # a connection per operation, committed when the with block exits
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key):
+        """
+        Looks up a stored result, marking it as most recently used.
+
+        Arguments:
+            key (str): as made by result_key
+
+        Returns:
+            np.ndarray: (months, len(METRIC_NAMES)) results, or None on a miss
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT data FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key)
+                )
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        values = np.frombuffer(row[0], dtype=np.float64)
+        return values.reshape(-1, len(METRIC_NAMES)).copy()
+
+    def put(self, key, results):
+        """
+        Stores a result, evicting the least recently used beyond max_bytes.
+
+        Arguments:
+            key (str): as made by result_key
+            results (np.ndarray): (months, len(METRIC_NAMES)) model results
+        """
+        data = np.ascontiguousarray(results, dtype=np.float64).tobytes()
+        if len(data) > self.max_bytes:
+            return
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+            excess = connection.execute("SELECT SUM(size) FROM results").fetchone()[0]
+            excess -= self.max_bytes
+            if excess <= 0:
+                return
+            evicted = []
+            for old_key, size in connection.execute(
+                "SELECT key, size FROM results ORDER BY accessed"
+            ):
+                if excess <= 0:
+                    break
+                evicted.append((old_key,))
+                excess -= size
+            connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+        with self._lock:
+            self.evictions += len(evicted)
+
+    def clear(self):
+        """
+        Deletes every stored result.
+        """
+        with self._connect() as connection:
+            connection.execute("DELETE FROM results")
+
+    def stats(self):
+        """
+        Reports the store's size and this process's counters.
+
+        Returns:
+            dict: stored entries and bytes, with the hits, misses and evictions
+                of this process
+        """
+        with self._connect() as connection:
+            entries, size = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        with self._lock:
+            return {
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
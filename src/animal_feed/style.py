@@ -0,0 +1,50 @@
+"""
+Optional ALLFED matplotlib style sheet.
+
+Nothing is fetched on import, the sheet is only applied when a plotting script
+asks for it.
+"""
+
+import os
+import pathlib
+import warnings
+
+ALLFED_STYLE_URL = (
+    "https://raw.githubusercontent.com/allfed/ALLFED-matplotlib-style-sheet/main/"
+    "ALLFED.mplstyle"
+)
+# drop a copy of the sheet here to use it without network access
+VENDORED_STYLE_PATH = pathlib.Path(__file__).parent.joinpath("ALLFED.mplstyle")
+
+
+def use_allfed_style(allow_network=False):
+    """
+    Applies the ALLFED matplotlib style sheet if one is available.
+
+    Tries the file named by the ALLFED_MPLSTYLE environment variable, then the
+    vendored copy, then (only if allow_network is set) the sheet on GitHub.
+    Falls back to the matplotlib defaults with a warning.
+
+    Arguments:
+        allow_network (bool): whether the sheet may be downloaded
+
+    Returns:
+        bool: True if the ALLFED style was applied
+    """
+    import matplotlib.pyplot as plt
+
+    candidates = [os.environ.get("ALLFED_MPLSTYLE")]
+    if VENDORED_STYLE_PATH.exists():
+        candidates.append(str(VENDORED_STYLE_PATH))
+    if allow_network:
+        candidates.append(ALLFED_STYLE_URL)
+    for candidate in candidates:
+        if not candidate:
+            continue
+        try:
+            plt.style.use(candidate)
+            return True
+        except OSError:
+            continue
+    warnings.warn("ALLFED style sheet not available, using matplotlib defaults")
+    return False
@@ -0,0 +1,366 @@
+"""
+Precomputed response surface of the model over a grid of slider values.
+
+The model is run offline for every point of a grid over the sliders except
+months, for the most months the dashboard shows. The results are saved as one
+float32 .npy table next to a manifest.json, and loaded memory mapped. A slider
+state inside the grid is then answered by multilinear interpolation between
+the surrounding grid points, exactly on a grid point by that point alone.
+The model has kinks where populations run out, so a coarse grid interpolates
+poorly. The build measures the interpolation error, and callers can choose to
+answer only states on grid points.
+States outside the grid, or whose interpolation would mix in inf or NaN
+results, are left to the model.
+
+Run `python -m animal_feed.surface` from the src folder to build the table,
+see `--help` for the options.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import pathlib
+import threading
+
+import numpy as np
+
+from .batch import batch_parameters, iter_batch
+from .inputs import DATA_PATH, inputs_digest, load_animal_inputs
+from .model import METRIC_INDEX, METRIC_NAMES, SLIDER_BOUNDS, SLIDER_NAMES
+
+SURFACE_PATH = DATA_PATH.joinpath(".cache", "surface")
+# bump when the table layout changes so existing tables are rebuilt
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+TABLE = "table.npy"
+MONTHS = SLIDER_NAMES.index("months")
+# sliders with a grid axis, every one but months, which only truncates a run
+AXES = tuple(name for name in SLIDER_NAMES if name != "months")
+# evenly spaced grid points over each slider's range
+DEFAULT_POINTS = dict(
+    {name: 3 for name in AXES},
+    change_to_baseline_slaughter=7,
+    use_grass_and_residues_for_dairy=2,
+)
+
+
+def grid_axes(points=None):
+    """
+    Spaces the grid points of every axis over its slider's range.
+
+    Arguments:
+        points (dict): slider name to number of points, overriding
+            DEFAULT_POINTS
+
+    Returns:
+        dict: slider name to its grid values, in AXES order
+    """
+    points = dict(DEFAULT_POINTS, **(points or {}))
+    unknown = set(points) - set(AXES)
+    if unknown:
+        raise ValueError(f"unknown grid axes: {sorted(unknown)}")
+    axes = {}
+    for name in AXES:
+        if points[name] < 1:
+            raise ValueError(f"{name} needs at least one grid point")
+        low, high = SLIDER_BOUNDS[name]
+        axes[name] = np.linspace(low, high, points[name]) if points[name] > 1 else [low]
+    return {name: np.asarray(values, dtype=float) for name, values in axes.items()}
+
+
+def _grid_sliders(axes, months):
+    # one slider row per grid point, in the table's C order
+    columns = [axes.get(name, [months]) for name in SLIDER_NAMES]
+    return np.array(list(itertools.product(*columns)), dtype=float).reshape(
+        -1, len(SLIDER_NAMES)
+    )
+
+
+def _write_manifest(directory, manifest):
+    temporary = directory.joinpath(MANIFEST + ".tmp")
+    temporary.write_text(json.dumps(manifest, indent=1))
+    os.replace(temporary, directory.joinpath(MANIFEST))
+
+
+def build_surface(
+    directory=SURFACE_PATH,
+    animal_inputs=None,
+    points=None,
+    months=SLIDER_BOUNDS["months"][1],
+    chunk_size=4096,
+    samples=256,
+):
+    """
+    Runs the model over a slider grid and saves the results table.
+
+    Arguments:
+        directory (pathlib.Path): folder for the table and its manifest
+        animal_inputs (ModelAnimalInputs): loaded from the data folder by default
+        points (dict): slider name to number of grid points, overriding
+            DEFAULT_POINTS
+        months (int): number of months stored for every grid point
+        chunk_size (int): grid points run together in one batch
+        samples (int): random integer slider states the interpolation is
+            checked against the model on, 0 to skip the check
+
+    Returns:
+        dict: the manifest, including the largest interpolation error found
+            relative to each metric's largest magnitude
+    """
+    animal_inputs = animal_inputs or load_animal_inputs()
+    params = batch_parameters(animal_inputs)
+    axes = grid_axes(points)
+    shape = tuple(len(values) for values in axes.values())
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    temporary = directory.joinpath(TABLE + ".tmp")
+    table = np.lib.format.open_memmap(
+        temporary,
+        mode="w+",
+        dtype=np.float32,
+        shape=(int(np.prod(shape)), months, len(METRIC_NAMES)),
+    )
+    sliders = _grid_sliders(axes, months)
+    for start in range(0, len(sliders), chunk_size):
+        chunk = sliders[start : start + chunk_size]
+        table[start : start + len(chunk)] = next(
+            iter_batch(chunk, params, months, chunk_steps=max(months, 1))
+        )
+    table.flush()
+    del table
+    os.replace(temporary, directory.joinpath(TABLE))
+    manifest = {
+        "format": FORMAT_VERSION,
+        "inputs_sha256": inputs_digest(animal_inputs),
+        "months": months,
+        "metrics": list(METRIC_NAMES),
+        "axes": {name: values.tolist() for name, values in axes.items()},
+        "max_relative_error": None,
+    }
+    _write_manifest(directory, manifest)
+    if samples:
+        surface = ResponseSurface(directory)
+        manifest["max_relative_error"] = surface.interpolation_error(params, samples)
+        _write_manifest(directory, manifest)
+    return manifest
+
+
+class ResponseSurface:
+    """
+    Answers slider states from a table saved by build_surface.
+
+    Arguments:
+        directory (pathlib.Path): folder of the table and its manifest
+    """
+
+    def __init__(self, directory=SURFACE_PATH):
+        directory = pathlib.Path(directory)
+        self.manifest = json.loads(directory.joinpath(MANIFEST).read_text())
+        if self.manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{directory} holds an outdated response surface")
+        if self.manifest["metrics"] != list(METRIC_NAMES):
+            raise ValueError(f"{directory} was built for other model metrics")
+        self.axes = [np.asarray(values) for values in self.manifest["axes"].values()]
+        self.months = self.manifest["months"]
+        table = np.load(directory.joinpath(TABLE), mmap_mode="r")
+        self.table = table.reshape(
+            tuple(len(values) for values in self.axes) + table.shape[1:]
+        )
+        self.hits = 0
+        self.interpolated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _corners(self, sliders):
+        # per axis, the (index, weight) of the grid points around the slider
+        corners = []
+        for values, value in zip(self.axes, np.delete(sliders, MONTHS)):
+            if not values[0] <= value <= values[-1]:
+                return None
+            if len(values) == 1:
+                corners.append(((0, 1.0),))
+                continue
+            index = min(
+                int(np.searchsorted(values, value, "right")) - 1, len(values) - 2
+            )
+            fraction = (value - values[index]) / (values[index + 1] - values[index])
+            if fraction == 0 or fraction == 1:
+                corners.append(((index + int(fraction), 1.0),))
+            else:
+                corners.append(((index, 1 - fraction), (index + 1, fraction)))
+        return corners
+
+    def _interpolate(self, sliders, interpolate):
+        months = sliders[MONTHS]
+        if months != int(months) or not 0 <= months <= self.months:
+            return None
+        corners = self._corners(sliders)
+        if corners is None or not interpolate and any(len(c) > 1 for c in corners):
+            return None
+        months = int(months)
+        results = np.zeros((months, len(METRIC_NAMES)))
+        for corner in itertools.product(*corners):
+            index = tuple(index for index, _ in corner)
+            weight = np.prod([weight for _, weight in corner])
+            results += weight * self.table[index][:months]
+        if not np.isfinite(results).all():
+            return None
+        results[:, METRIC_INDEX["Month"]] = np.arange(months)
+        return results
+
+    def lookup(self, sliders, interpolate=True):
+        """
+        Answers the results of one slider state from the table.
+
+        Arguments:
+            sliders (iterable): the nine slider values, in SLIDER_NAMES order
+            interpolate (bool): whether states between grid points are
+                interpolated, otherwise only grid points are answered
+
+        Returns:
+            np.ndarray: (months, len(METRIC_NAMES)) results like the model's, or
+                None if the state must be left to the model
+        """
+        sliders = np.asarray(sliders, dtype=float)
+        results = self._interpolate(sliders, interpolate)
+        with self._lock:
+            if results is None:
+                self.misses += 1
+            elif all(
+                value in axis
+                for value, axis in zip(np.delete(sliders, MONTHS), self.axes)
+            ):
+                self.hits += 1
+            else:
+                self.interpolated += 1
+        return results
+
+    def interpolation_error(self, params, samples=256, seed=0):
+        """
+        Compares interpolated results with model runs at random slider states.
+
+        Arguments:
+            params (dict): model input quantities, keyed as in INPUT_ROWS
+            samples (int): number of random integer slider states
+            seed (int): seeds the random states
+
+        Returns:
+            float: the largest absolute error of any metric relative to that
+                metric's largest magnitude, over the states the table answers
+        """
+        rng = np.random.default_rng(seed)
+        low, high = np.array([SLIDER_BOUNDS[name] for name in SLIDER_NAMES]).T
+        sliders = rng.integers(
+            low, high, size=(samples, len(SLIDER_NAMES)), endpoint=True
+        ).astype(float)
+        sliders[:, MONTHS] = self.months
+        exact = next(
+            iter_batch(sliders, params, self.months, chunk_steps=max(self.months, 1))
+        )
+        answered = [
+            (results, expected)
+            for results, expected in zip(
+                (self._interpolate(row, True) for row in sliders), exact
+            )
+            if results is not None and np.isfinite(expected).all()
+        ]
+        if not answered:
+            return None
+        results, expected = np.array(answered).swapaxes(0, 1)
+        scale = np.abs(expected).max(axis=(0, 1))
+        difference = np.abs(results - expected).max(axis=(0, 1))
+        return float(np.max(difference / np.where(scale, scale, 1)))
+
+    def stats(self):
+        """
+        Reports the lookup counters.
+
+        Returns:
+            dict: states answered from a grid point, interpolated and left to
+                the model, and the grid size
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "interpolated": self.interpolated,
+                "misses": self.misses,
+                "points": int(np.prod([len(values) for values in self.axes])),
+            }
+
+
+def load_surface(directory=SURFACE_PATH, animal_inputs=None):
+    """
+    Loads a response surface if one was built for the current inputs.
+
+    Arguments:
+        directory (pathlib.Path): folder of the table and its manifest
+        animal_inputs (ModelAnimalInputs): loaded from the data folder by default
+
+    Returns:
+        ResponseSurface: the surface, or None if there is no usable table
+    """
+    try:
+        surface = ResponseSurface(directory)
+    except (OSError, ValueError):
+        return None
+    digest = inputs_digest(animal_inputs or load_animal_inputs())
+    if surface.manifest["inputs_sha256"] != digest:
+        return None
+    return surface
+
+
+def _parse_points(text):
+    name, _, count = text.partition("=")
+    return name, int(count)
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Arguments:
+        argv (list): the arguments, sys.argv[1:] by default
+
+    Returns:
+        int: the exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m animal_feed.surface",
+        description="Precompute the model over a grid of slider values.",
+    )
+    parser.add_argument(
+        "-o", "--output", default=SURFACE_PATH, help="folder for the table"
+    )
+    parser.add_argument(
+        "--points",
+        type=_parse_points,
+        action="append",
+        default=[],
+        metavar="SLIDER=N",
+        help="grid points of one slider, repeat for others",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=256,
+        help="states the interpolation is checked on",
+    )
+    args = parser.parse_args(argv)
+    try:
+        manifest = build_surface(
+            args.output, points=dict(args.points), samples=args.samples
+        )
+    except ValueError as error:
+        parser.error(str(error))
+    points = np.prod([len(values) for values in manifest["axes"].values()])
+    print(f"built {points} grid points in {args.output}")
+    if manifest["max_relative_error"] is not None:
+        print(
+            f"largest relative interpolation error {manifest['max_relative_error']:.3g}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
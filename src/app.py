@@ -1,26 +1,31 @@
-import pathlib
+import functools
+import os
+import uuid
 import plotly.express as px
-import pandas as pd
-from difflib import diff_bytes
-import numpy as np
-from dash import Dash, dcc, html, Output, Input, dash_table  # pip install dash
+from dash import Dash, dcc, html, Output, Input, State  # pip install dash
+from dash import ClientsideFunction, Patch, ctx
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc  # pip install dash-bootstrap-components
-import matplotlib.pyplot as plt
-
-plt.style.use(
-    "https://raw.githubusercontent.com/allfed/ALLFED-matplotlib-style-sheet/main/ALLFED.mplstyle"
+from animal_feed.api import api
+from animal_feed.cache import ResultCache, slider_cache_key
+from animal_feed.clientside import model_payload
+from animal_feed.coalesce import LatestWins, Superseded
+from animal_feed.incremental import IncrementalModel
+from animal_feed.instrumentation import MetricsHook
+from animal_feed.inputs import (
+    available_scenarios,
+    load_animal_inputs,
+    load_slider_defaults,
 )
-
-
-# CSV changes
-# changes to head/1000 head
-# dash vs matplotlib
-
+from animal_feed.model import SLIDER_NAMES, calculate_feed_and_animals, results_frame
+from animal_feed.store import STORE_PATH, ResultStore, result_key
+from animal_feed.surface import load_surface
 
 """
 Define functions
 """
 
+
 def format_plotly_graphs(fig):
 
     fig.update_layout(
@@ -28,24 +33,19 @@ def format_plotly_graphs(fig):
         # “Arial”, “Balto”, “Courier New”, “Droid Sans”, “Droid Serif”, “Droid Sans Mono”, “Gravitas One”, “Old Standard TT”, “Open Sans”, “Overpass”, “PT Sans Narrow”, “Raleway”, “Times New Roman”.
         font_color="dimgrey",
         title_font_color="dimgrey",
-        title={'font': {'size': 30}},
+        title={"font": {"size": 30}},
         legend_title_font_color="dimgrey",
         legend=dict(title="Legend"),
         legend_traceorder="reversed",
         font=dict(size=16),
-        plot_bgcolor = 'white',
-        paper_bgcolor = 'white',
+        plot_bgcolor="white",
+        paper_bgcolor="white",
     )
-    
+
     fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor="#e6e6e6")
     fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor="#e6e6e6")
 
-    fig.update_layout(legend=dict(
-    yanchor="top",
-    y=0.99,
-    xanchor="right",
-    x=0.99
-    ))
+    fig.update_layout(legend=dict(yanchor="top", y=0.99, xanchor="right", x=0.99))
 
     return fig
 
@@ -70,7 +70,7 @@ def create_plotly_figs(df_final):
     fig3 = px.bar(
         df_final,
         x="Month",
-        y=["Dairy Feed","Beef Feed", "Pigs Feed", "Poultry Feed"],
+        y=["Dairy Feed", "Beef Feed", "Pigs Feed", "Poultry Feed"],
         title="Feed Requirements",
         color_discrete_sequence=graph_colours,
     ).update_layout(yaxis_title="Metric Tonnes")
@@ -109,444 +109,54 @@ def create_plotly_figs(df_final):
     fig5 = format_plotly_graphs(fig5)
     fig6 = format_plotly_graphs(fig6)
 
-    
-
     return (fig1, fig2, fig3, fig4, fig5, fig6)
 
 
-def calculate_feed_and_animals(
-    reduction_in_beef_calves,
-    reduction_in_dairy_calves,
-    increase_in_slaughter,
-    reduction_in_pig_breeding,
-    reduction_in_poultry_breeding,
-    months,
-    discount_rate,
-    mother_slaughter,
-    use_grass_and_residues_for_dairy,
-    animal_inputs,
-):  # function arguments come from the component property of the Input (in this case, the sliders)
-
-    tons_to_kcals = (
-        (3560 + 3350) / 2 * 1000
-    )  # convert tons to kcals (ASSUME CALORIC DENSITY IS HALF MAIZE, HALF SOYBEAN)
-    kcals_to_billion_kcals = 1e-9
-    feed_unit_adjust = (
-        0.000453592 * tons_to_kcals * kcals_to_billion_kcals
-    )  # convert pounds to tonnes to billions of kcals
-    ## unpack all the dataframe information for ease of use ##
-    # pigs
-    total_pigs = animal_inputs.dataframe.loc["TotalPigs", "Qty"]
-    piglets_pm = animal_inputs.dataframe.loc["PigletsPerMonth", "Qty"]
-    pigs_slaughter_pm = animal_inputs.dataframe.loc["SlaughterPerMonth", "Qty"]
-    pigGestation = animal_inputs.dataframe.loc["pigGestation", "Qty"]
-    piglets_per_litter = animal_inputs.dataframe.loc["PigsPerLitter", "Qty"]
-
-    # poultry
-    total_poultry = animal_inputs.dataframe.loc["Broiler Population", "Qty"]
-    poultry_slaughter_pm = animal_inputs.dataframe.loc[
-        "poultry_slaughter_pm", "Qty"
-    ]  # USDA
-    chicks_pm = poultry_slaughter_pm  # assume the same, no data
-    poultryGestation = animal_inputs.dataframe.loc[
-        "Chicken Gestation", "Qty"
-    ]  # USDA  # actaully 21 days, let's round to 1 month
-
-    # cows (more complex, as need to split dairy and beef)
-    total_calves = animal_inputs.dataframe.loc["Calves under 500 pounds", "Qty"]
-    dairy_cows = animal_inputs.dataframe.loc["Milk cows", "Qty"]
-    beef_cows = animal_inputs.dataframe.loc["Beef cows", "Qty"]
-    beef_steers = animal_inputs.dataframe.loc["Steers 500 pounds and over", "Qty"]
-    heifers = animal_inputs.dataframe.loc["Heifers 500 pounds and over", "Qty"]
-    bulls = animal_inputs.dataframe.loc["Bulls 500 pounds and over", "Qty"]
-    new_calves_per_year = animal_inputs.dataframe.loc["Calf crop", "Qty"]
-    cattle_on_feed = animal_inputs.dataframe.loc["Cattle on feed", "Qty"]
-    cow_slaughter_pm = animal_inputs.dataframe.loc["CowSlaughter", "Qty"]
-    cowGestation = animal_inputs.dataframe.loc["cowGestation", "Qty"]
-    calves_per_mother = 1
-
-    #### Calcultaion for cows ratios
-    # calaculate number of cows using ratios
-    dairy_beef_mother_ratio = dairy_cows / beef_cows
-    dairy_heifers = heifers * dairy_beef_mother_ratio
-    beef_heifers = heifers - dairy_heifers
-
-    dairy_calves = dairy_beef_mother_ratio * total_calves
-    beef_calves = total_calves - dairy_calves
-    dairy_calf_steers = dairy_calves / 2
-    dairy_calf_girls = dairy_calves / 2
-
-    calves_destined_for_beef_ratio = (beef_calves + dairy_calf_steers) / total_calves
-    new_beef_calfs = calves_destined_for_beef_ratio * new_calves_per_year
-    new_dairy_calfs = new_calves_per_year - new_beef_calfs
-    new_beef_calfs_pm = new_beef_calfs / 12
-    new_dairy_calfs_pm = new_dairy_calfs / 12
-
-    cattle_in_beef_track = (
-        dairy_calf_steers + beef_calves + beef_steers + beef_cows + beef_heifers
-    )
-    cattle_in_dairy_track = dairy_calf_girls + dairy_cows + dairy_heifers
-
-    # other baseline variables
-    dairy_life_expectancy = 5
-
-    ## End cows, and basic animal variable defintiions ##
-
-    # interventions, scale appropriately for maths (i.e convert sliders from % to decimal)
-    reduction_in_beef_calves *= 0.01
-    reduction_in_dairy_calves *= 0.01
-    reduction_in_pig_breeding *= 0.01
-    reduction_in_poultry_breeding *= 0.01
-    increase_in_slaughter *= 0.01
-
-    # per month values
-    other_cow_death_rate = 0.005  # from USDA
-    other_pig_death_rate = 0.005  # from USDA
-    other_poultry_death_rate = 0.005
-    new_beef_calfs_pm = new_beef_calfs / 12
-    new_dairy_calfs_pm = new_dairy_calfs / 12
-    new_pigs_pm = piglets_pm
-    new_poultry_pm = chicks_pm
-
-    # pregnant animals
-    current_pregnant_sows = piglets_pm / piglets_per_litter
-    current_pregnant_cows = new_beef_calfs_pm / calves_per_mother
-    sow_slaughter_percent = mother_slaughter  # of total percent of pig slaughter
-    mother_cow_slaughter_percent = mother_slaughter  # of total percent of cow slaughter
-
-    #### Slaughtering ####
-    ### Slaughtering variables (currently hardcoded !!)
-    # total slaughter capacity
-    cow_slaughter_hours = (
-        4  # resources/hours of single person hours for slaughter of cow
-    )
-    pig_slaughter_hours = (
-        4  # resources/hours of single person hours for slaughter of pig
-    )
-    poultry_slaughter_hours = (
-        0.08  # resources/hours of single person hours for slaughter of poultry
-    )
-    total_slaughter_cap_hours = (
-        cow_slaughter_pm * cow_slaughter_hours
-        + pigs_slaughter_pm * pig_slaughter_hours
-        + poultry_slaughter_pm * poultry_slaughter_hours
-    )
-    skill_transfer_discount_chickens_to_pigs = (100 - discount_rate) / 100  #
-    skill_transfer_discount_pigs_to_cows = (100 - discount_rate) / 100  #
-
-    ## Slaughtering Updates, increases from slider
-    total_slaughter_cap_hours *= increase_in_slaughter  # measured in hours
-    current_cow_slaughter = cow_slaughter_pm * increase_in_slaughter  # measured in head
-    current_poultry_slaughter = (
-        poultry_slaughter_pm * increase_in_slaughter
-    )  # measured in head
-    current_pig_slaughter = (
-        pigs_slaughter_pm * increase_in_slaughter
-    )  # measured in head
-    spare_slaughter_hours = 0
-
-    ## define current totals
-    # current_beef_feed_cattle = cattle_on_feed
-    current_beef_cattle = cattle_in_beef_track
-    current_dairy_cattle = cattle_in_dairy_track
-    current_total_pigs = total_pigs
-    current_total_poultry = total_poultry
-
-    ### FEED #commented out code is bottom up from roam page
-    # beef_cow_feed_pm_per_cow = 880 # lbs
-    # dairy_cow_feed_pm_per_cow = 1048
-    # poultry_feed_pm_per_bird = 20
-    # pig_feed_pm_per_pig = 139
-
-    # these feed numbers are top down, calculations in google sheet, working backwards from total feed used and dividing it evenly amongst the animal populations
-    beef_cow_feed_pm_per_cow = 137.3117552  # lbs
-    if use_grass_and_residues_for_dairy:
-        dairy_cow_feed_pm_per_cow = 0
-    else:
-        dairy_cow_feed_pm_per_cow = 448.3820431
-    poultry_feed_pm_per_bird = 4.763762808
-    pig_feed_pm_per_pig = 141.8361586
-    baseline_feed = (
-        current_total_poultry * poultry_feed_pm_per_bird
-        + current_total_pigs * pig_feed_pm_per_pig
-        + current_beef_cattle * beef_cow_feed_pm_per_cow
-        + current_dairy_cattle * dairy_cow_feed_pm_per_cow
-    )
-
-    d = []  # create empty list to place variables in to in loop
-
-    # simulate x months
-    for i in range(months):
-
-        new_pigs_pm = current_pregnant_sows * piglets_per_litter
-        new_beef_calfs_pm = current_pregnant_cows * calves_per_mother
-
-        # determine birth rates
-        if np.abs(i - cowGestation) <= 0.5:
-            new_beef_calfs_pm *= 1 - reduction_in_beef_calves
-            new_dairy_calfs_pm *= 1 - reduction_in_dairy_calves
-            current_pregnant_cows *= 1 - reduction_in_beef_calves
-
-        if np.abs(i - pigGestation) <= 0.5:
-            new_pigs_pm *= 1 - reduction_in_pig_breeding
-            current_pregnant_sows *= 1 - reduction_in_pig_breeding
-
-        if np.abs(i - poultryGestation) <= 0.5:
-            new_poultry_pm *= 1 - reduction_in_poultry_breeding
-
-        if new_pigs_pm < 0:
-            new_pigs_pm = 0
-
-        if new_beef_calfs_pm < 0:
-            new_beef_calfs_pm = 0
-
-        # Transfer excess slaughter capacity to next animal, current coding method only allows poultry -> pig -> cow, there are some small erros here due to rounding, and the method is not 100% water tight but errors are within the noise
-        if current_total_poultry < current_poultry_slaughter:
-            spare_slaughter_hours = (
-                current_poultry_slaughter - current_total_poultry
-            ) * poultry_slaughter_hours
-            current_poultry_slaughter = current_total_poultry
-            current_pig_slaughter += (
-                spare_slaughter_hours
-                * skill_transfer_discount_chickens_to_pigs
-                / pig_slaughter_hours
-            )
-        if current_total_pigs < current_pig_slaughter:
-            spare_slaughter_hours = (
-                current_pig_slaughter - current_total_pigs
-            ) * pig_slaughter_hours
-            current_pig_slaughter = current_total_pigs
-            current_cow_slaughter += (
-                spare_slaughter_hours
-                * skill_transfer_discount_pigs_to_cows
-                / cow_slaughter_hours
-            )
-
-        # this set up only kills dairy cows when they are getting to the end of their life.
-        current_dairy_slaughter = current_dairy_cattle / (dairy_life_expectancy * 12)
-        current_beef_slaughter = current_cow_slaughter - current_dairy_slaughter
-        if current_beef_cattle < current_beef_slaughter:
-            actual_beef_slaughter = current_beef_cattle  # required due to the difference between actual slaughter and 'slaughter capacity' consider a rewrite of the whole method to distinuguish between these two. For now, this is thr workaround.
-        else:
-            actual_beef_slaughter = current_beef_slaughter
-
-        other_beef_death = other_cow_death_rate * current_beef_cattle
-        other_dairy_death = other_cow_death_rate * current_dairy_cattle
-        other_pig_death = current_total_pigs * other_pig_death_rate
-        other_poultry_death = current_total_poultry * other_poultry_death_rate
-
-        ## Feed
-        current_beef_feed = current_beef_cattle * beef_cow_feed_pm_per_cow
-        current_dairy_feed = current_dairy_cattle * dairy_cow_feed_pm_per_cow
-        current_pig_feed = current_total_pigs * pig_feed_pm_per_pig
-        current_poultry_feed = current_total_poultry * poultry_feed_pm_per_bird
-
-        current_feed_combined = (
-            current_beef_feed
-            + current_dairy_feed
-            + current_pig_feed
-            + current_poultry_feed
-        )
-
-        print(current_poultry_feed * feed_unit_adjust)
-        print(current_feed_combined * feed_unit_adjust)
-
-        ### Generate list (before new totals have been calculated)
-        # magnitude adjust moves the numbers from per thousnad head to per head (or other)
-        # feed adjust turns lbs in to tons
-        d.append(
-            {
-                "Beef Pop": current_beef_cattle,
-                "Beef Born": new_beef_calfs_pm,
-                "Beef Slaughtered": actual_beef_slaughter,
-                "Beef Slaughtered Hours": actual_beef_slaughter * cow_slaughter_hours,
-                "Beef Hours %": actual_beef_slaughter
-                * cow_slaughter_hours
-                / total_slaughter_cap_hours,
-                "Beef Other Death": other_beef_death,
-                "Beef Feed": current_beef_cattle
-                * beef_cow_feed_pm_per_cow
-                * feed_unit_adjust,
-                "Dairy Pop": current_dairy_cattle,
-                "Dairy Born": new_dairy_calfs_pm,
-                "Dairy Slaughtered": current_dairy_slaughter,
-                "Dairy Slaughtered Hours": current_dairy_slaughter
-                * cow_slaughter_hours,
-                "Dairy Hours %": current_dairy_slaughter
-                * cow_slaughter_hours
-                / total_slaughter_cap_hours,
-                "Dairy Other Death": other_dairy_death,
-                "Dairy Feed": current_dairy_cattle
-                * dairy_cow_feed_pm_per_cow
-                * feed_unit_adjust,
-                "Pigs Pop": current_total_pigs,
-                "Pig Born": new_pigs_pm,
-                "Pig Slaughtered": current_pig_slaughter,
-                "Pig Slaughtered Hours": current_pig_slaughter * pig_slaughter_hours,
-                "Pig Hours %": current_pig_slaughter
-                * pig_slaughter_hours
-                / total_slaughter_cap_hours,
-                "Pigs Feed": current_total_pigs
-                * pig_feed_pm_per_pig
-                * feed_unit_adjust,
-                "Poultry Pop": current_total_poultry,
-                "Poultry Born": new_poultry_pm,
-                "Poultry Slaughtered": current_poultry_slaughter,
-                "Poultry Slaughtered Hours": current_poultry_slaughter
-                * poultry_slaughter_hours,
-                "Poultry Hours %": current_poultry_slaughter
-                * poultry_slaughter_hours
-                / total_slaughter_cap_hours,
-                "Poultry Feed": current_total_poultry
-                * poultry_feed_pm_per_bird
-                * feed_unit_adjust,
-                "Combined Feed": current_feed_combined * feed_unit_adjust,
-                "Combined Saved Feed": (baseline_feed - current_feed_combined)
-                * feed_unit_adjust,
-                "Month": i,
-            }
-        )
-
-        # some up new totals
-        current_beef_cattle += (
-            new_beef_calfs_pm - current_beef_slaughter - other_beef_death
-        )
-        current_dairy_cattle += (
-            new_dairy_calfs_pm - current_dairy_slaughter - other_dairy_death
-        )
-        current_total_poultry += (
-            new_poultry_pm - current_poultry_slaughter - other_poultry_death
-        )
-        current_total_pigs += new_pigs_pm - current_pig_slaughter - other_pig_death
-
-        current_pregnant_sows -= sow_slaughter_percent * (
-            current_pig_slaughter + other_pig_death
-        )
-        current_pregnant_cows -= mother_cow_slaughter_percent * (
-            current_beef_slaughter + other_beef_death
-        )
-
-        if current_beef_cattle < 0:
-            current_beef_cattle = 0
-        if current_dairy_cattle < 0:
-            current_dairy_cattle = 0
-
-    ### End of loop, start summary
-
-    df_final = pd.DataFrame(d)
-
-    return df_final
-
-
-"""
-Defne Classes
-"""
+# slider values the dashboard opens with, a key of animal_feed.inputs.SCENARIO_FILES
+SCENARIO = "optimistic"  #### THIS IS THE SCENARIO CHOOSER
 
+# recently rendered slider states, shared by all sessions of this worker
+result_cache = ResultCache(maxsize=int(os.environ.get("ANIMAL_FEED_CACHE_SIZE", 128)))
 
-class ModelAnimalInputs:
-    def __init__(self, dataframe):
-        self.dataframe = dataframe
+# model timings and spillover counters, only collected when ANIMAL_FEED_METRICS is set
+model_metrics = MetricsHook() if os.environ.get("ANIMAL_FEED_METRICS") else None
 
+# run the model in the browser (assets/animal_feed_model.js) when slider values
+# change, the server then only renders the page
+CLIENTSIDE = bool(os.environ.get("ANIMAL_FEED_CLIENTSIDE"))
 
-class ModelSlidersDefaults:
-    def __init__(self, dataframe):
-        self.reduction_in_beef_calves = dataframe.loc["reduction_in_beef_calves", "Qty"]
-        self.reduction_in_dairy_calves = dataframe.loc[
-            "reduction_in_dairy_calves", "Qty"
-        ]
-        self.change_to_baseline_slaughter = dataframe.loc[
-            "change_to_baseline_slaughter", "Qty"
-        ]
-        self.reduction_in_pig_breeding = dataframe.loc[
-            "reduction_in_pig_breeding", "Qty"
-        ]
-        self.reduction_in_poultry_breeding = dataframe.loc[
-            "reduction_in_poultry_breeding", "Qty"
-        ]
-        self.months = dataframe.loc["months", "Qty"]
-        self.discount_rate = dataframe.loc["discount_rate", "Qty"]
-        self.mother_slaughter = dataframe.loc["mother_slaughter", "Qty"]
-        self.use_grass_and_residues_for_dairy = dataframe.loc[
-            "use_grass_and_residues_for_dairy", "Qty"
-        ]
-
-
-class ModelSliderInputs:
-    def __init__(self, dataframe):
-        self.reduction_in_beef_calves = dataframe.loc["reduction_in_beef_calves", "Qty"]
-        self.reduction_in_dairy_calves = dataframe.loc[
-            "reduction_in_dairy_calves", "Qty"
-        ]
-        self.change_to_baseline_slaughter = dataframe.loc[
-            "change_to_baseline_slaughter", "Qty"
-        ]
-        self.reduction_in_pig_breeding = dataframe.loc[
-            "reduction_in_pig_breeding", "Qty"
-        ]
-        self.reduction_in_poultry_breeding = dataframe.loc[
-            "reduction_in_poultry_breeding", "Qty"
-        ]
-        self.months = dataframe.loc["months", "Qty"]
-        self.discount_rate = dataframe.loc["discount_rate", "Qty"]
-        self.mother_slaughter = dataframe.loc["mother_slaughter", "Qty"]
-        self.use_grass_and_residues_for_dairy = dataframe.loc[
-            "use_grass_and_residues_for_dairy", "Qty"
-        ]
-
-
-"""
-Start main function
-"""
-# Import CSV to dataframes
-PATH = pathlib.Path(__file__).parent
-DATA_PATH = PATH.joinpath("../data").resolve()
-df_animals = pd.read_csv(
-    DATA_PATH.joinpath("InputDataAndSources.csv"), index_col="Variable"
+# per session latest-wins scheduling of renders, enabled by setting
+# ANIMAL_FEED_COALESCE to a debounce in milliseconds (0 for none). Needs
+# threaded workers, as in the Procfile, for renders to overlap at all
+coalescer = (
+    LatestWins(debounce=float(os.environ["ANIMAL_FEED_COALESCE"]) / 1000)
+    if "ANIMAL_FEED_COALESCE" in os.environ
+    else None
 )
 
-## various scenarios can be used here
-df_baseline_vars = pd.read_csv(
-    DATA_PATH.joinpath("default_slider_values.csv"), index_col="Variable"
-)  # change this to saved model values (optimistic/pessimistic etc.)
-df_optimistic_vars = pd.read_csv(
-    DATA_PATH.joinpath("optimistic_slider_values.csv"), index_col="Variable"
-)  # change this to saved model values (optimistic/pessimistic etc.)
-df_scenario1_vars = pd.read_csv(
-    DATA_PATH.joinpath("scneario1_slider_values.csv"), index_col="Variable"
-)  # change this to saved model values (optimistic/pessimistic etc.)
-
-## poplulate the data in to classes
-animal_inputs = ModelAnimalInputs(df_animals)
-slider_inputs = ModelSlidersDefaults(
-    df_optimistic_vars
-)  #### THIS IS THE SCENARIO CHOOSER
-
-
-df_final = calculate_feed_and_animals(
-    slider_inputs.reduction_in_beef_calves,
-    slider_inputs.reduction_in_dairy_calves,
-    slider_inputs.change_to_baseline_slaughter,
-    slider_inputs.reduction_in_pig_breeding,
-    slider_inputs.reduction_in_poultry_breeding,
-    slider_inputs.months,
-    slider_inputs.discount_rate,
-    slider_inputs.mother_slaughter,
-    slider_inputs.use_grass_and_residues_for_dairy,
-    animal_inputs,
+# precomputed results answering slider states without a model run, enabled by
+# setting ANIMAL_FEED_SURFACE to a folder built by `python -m animal_feed.surface`.
+# States between grid points are only interpolated if the table's measured
+# error is within ANIMAL_FEED_SURFACE_TOLERANCE
+SURFACE = os.environ.get("ANIMAL_FEED_SURFACE")
+SURFACE_TOLERANCE = float(os.environ.get("ANIMAL_FEED_SURFACE_TOLERANCE", 0.01))
+
+# model results kept on disk across restarts and shared by the workers,
+# enabled by setting ANIMAL_FEED_STORE to the SQLite file, or to nothing for
+# results/model_results.sqlite, and limited to ANIMAL_FEED_STORE_MB megabytes
+STORE = os.environ.get("ANIMAL_FEED_STORE")
+STORE_MB = float(os.environ.get("ANIMAL_FEED_STORE_MB", 256))
+
+# each session's latest trajectory, resumed from the first month a slider
+# change affects rather than rerun from month 0, enabled by setting
+# ANIMAL_FEED_INCREMENTAL to the number of sessions kept. Not used while
+# ANIMAL_FEED_METRICS is set, as only full runs call the metrics hook
+trajectories = (
+    ResultCache(maxsize=int(os.environ["ANIMAL_FEED_INCREMENTAL"]))
+    if "ANIMAL_FEED_INCREMENTAL" in os.environ
+    else None
 )
 
-## Example of matplotlib plotting ##
-
-# plt.figure()
-# plt.plot(df_final["Combined Feed"])
-# plt.title("Combined Feed")
-# plt.show()
-
-### End Model Section ###
-
-# ### Start DASH section ###
-## Currently commented out, need to seperate in to packages to avoid this I believe
-
 
 #### Do Dash things below, skip ahead to callback function for the main event
 # Build your components
@@ -554,194 +164,375 @@ app = Dash(__name__, external_stylesheets=[dbc.themes.LUX])
 
 # Declare server for Heroku deployment. Needed for Procfile.
 server = app.server  # for heroku deployment
+# JSON and NumPy model results for other services, under /api/v1
+server.register_blueprint(api)
+
+
+@server.route("/_model-metrics")
+def model_metrics_report():
+    """
+    Reports the model metrics and result cache counters of this worker.
+
+    Returns:
+        dict: the cache stats, and the model metrics, render coalescing,
+            response surface, result store and session trajectory counters if
+            they are enabled
+    """
+    report = {"cache": result_cache.stats()}
+    if model_metrics is not None:
+        report["model"] = model_metrics.summary()
+    if coalescer is not None:
+        report["coalescing"] = coalescer.stats()
+    if response_surface() is not None:
+        report["surface"] = response_surface().stats()
+    if result_store() is not None:
+        report["store"] = result_store().stats()
+    if trajectories is not None:
+        report["incremental"] = trajectories.stats()
+    return report
+
+
+@functools.lru_cache(maxsize=None)
+def result_store():
+    """
+    Opens the persistent result store once per worker.
+
+    Returns:
+        ResultStore: the store, or None if STORE is not set
+    """
+    if STORE is None:
+        return None
+    return ResultStore(STORE or STORE_PATH, max_bytes=int(STORE_MB * 2**20))
+
+
+@functools.lru_cache(maxsize=None)
+def response_surface():
+    """
+    Loads the precomputed response surface once per worker.
+
+    Returns:
+        ResponseSurface: the surface, or None if SURFACE is not set or its
+            table was built for other inputs
+    """
+    if not SURFACE:
+        return None
+    return load_surface(SURFACE, load_animal_inputs())
+
+
+def model_results(sliders, session_id=None):
+    """
+    Runs the model for one slider state, with caching and the response surface.
+
+    Results are looked up in the result cache, the result store and the
+    response surface in turn, and only a model run is written to the store.
+    With session trajectories enabled a model run resumes the session's last.
+
+    Arguments:
+        sliders (tuple): the nine slider values, in SLIDER_NAMES order
+        session_id (str): the browser session, None outside the dashboard
+
+    Returns:
+        pd.DataFrame: the model results
+    """
+    animal_inputs = load_animal_inputs()
+    key = slider_cache_key(sliders, animal_inputs)
+    df_final = result_cache.get(key)
+    if df_final is not None:
+        return df_final
+    store = result_store()
+    results = None
+    if store is not None:
+        store_key = result_key(sliders, animal_inputs)
+        results = store.get(store_key)
+    surface = response_surface()
+    if results is None and surface is not None:
+        error = surface.manifest["max_relative_error"]
+        interpolate = error is not None and error <= SURFACE_TOLERANCE
+        results = surface.lookup(sliders, interpolate)
+    if results is not None:
+        df_final = results_frame(results)
+    else:
+        ## Run Model ##
+        if (
+            trajectories is not None
+            and session_id is not None
+            and model_metrics is None
+        ):
+            trajectory = trajectories.get(session_id)
+            if trajectory is None or trajectory.animal_inputs is not animal_inputs:
+                trajectory = trajectories.put(
+                    session_id, IncrementalModel(animal_inputs)
+                )
+            df_final = trajectory.run(sliders)
+        else:
+            df_final = calculate_feed_and_animals(
+                *sliders, animal_inputs, hook=model_metrics
+            )
+        if store is not None:
+            store.put(store_key, df_final.to_numpy(dtype=float))
+    return result_cache.put(key, df_final)
+
+
+@functools.lru_cache(maxsize=None)
+def figure_templates():
+    """
+    Builds the six figures once per worker, renders only swap their trace data.
+
+    Returns:
+        tuple: the figures as dicts, made from a run of the opening scenario
+    """
+    slider_inputs = load_slider_defaults(SCENARIO)
+    df_final = model_results([getattr(slider_inputs, name) for name in SLIDER_NAMES])
+    return tuple(fig.to_dict() for fig in create_plotly_figs(df_final))
+
+
+def fill_figure(template, df_final):
+    """
+    Copies a figure template with its traces pointing at new model results.
+
+    Arguments:
+        template (dict): one of figure_templates()
+        df_final (pd.DataFrame): the model results
+
+    Returns:
+        dict: the full figure, sharing its layout with the template
+    """
+    months = df_final["Month"].to_numpy()
+    return {
+        "data": [
+            dict(trace, x=months, y=df_final[trace["name"]].to_numpy())
+            for trace in template["data"]
+        ],
+        "layout": template["layout"],
+    }
+
+
+def patch_figure(template, df_final):
+    """
+    Builds a partial update that replaces only the x and y of every trace.
+
+    Arguments:
+        template (dict): one of figure_templates()
+        df_final (pd.DataFrame): the model results
+
+    Returns:
+        Patch: the update for a graph already showing the template's traces
+    """
+    months = df_final["Month"].to_numpy()
+    patch = Patch()
+    for index, trace in enumerate(template["data"]):
+        patch["data"][index]["x"] = months
+        patch["data"][index]["y"] = df_final[trace["name"]].to_numpy()
+    return patch
+
+
+def serve_layout():
+    """
+    Builds the page layout, Dash calls this on every page load.
+
+    Slider defaults are read here rather than at import, so starting a worker
+    does no file I/O.
+
+    Returns:
+        dbc.Container: the page layout
+    """
+    slider_inputs = load_slider_defaults(SCENARIO)
+
+    mytitle = dcc.Markdown(children="", id="mytitle")
+    # identifies this page load to the render coalescing
+    session = dcc.Store(id="session-id", data=uuid.uuid4().hex)
+    scatter = dcc.Graph(figure={}, id="scatter")
+    scatter2 = dcc.Graph(figure={}, id="scatter2")
+    bar = dcc.Graph(figure={}, id="bar")
+    bar2 = dcc.Graph(figure={}, id="bar2")
+    bar3 = dcc.Graph(figure={}, id="bar3")
+    bar4 = dcc.Graph(figure={}, id="bar4")
+
+    ### Create slider components on a card
+    controls = dbc.Card(
+        [
+            html.Div(
+                [
+                    dbc.Label("Scenario"),
+                    dcc.Dropdown(
+                        options=list(available_scenarios()),
+                        value=SCENARIO,
+                        clearable=False,
+                        id="scenario",
+                    ),
+                ]
+            ),
+            html.Div(
+                [
+                    dbc.Label("Baseline Slaughter Rate"),
+                    dcc.Slider(
+                        0,
+                        600,
+                        value=slider_inputs.change_to_baseline_slaughter,
+                        id="myslider3",
+                        updatemode="drag",
+                        tooltip={"placement": "bottom", "always_visible": True},
+                    ),
+                ]
+            ),
+            html.Div(
+                [
+                    dbc.Label(
+                        "Proportion of Slaughter which is mothers"
+                    ),  # (proxy for termination of pregnancies too, but not the same as a percentage)
+                    dcc.Slider(
+                        0,
+                        100,
+                        value=slider_inputs.mother_slaughter,
+                        id="myslider8",
+                        updatemode="drag",
+                        tooltip={"placement": "bottom", "always_visible": True},
+                    ),
+                ]
+            ),
+            html.Div(
+                [
+                    dbc.Label(
+                        "Discount Rate for Labour/Technology Transfer between species"
+                    ),
+                    dcc.Slider(
+                        0,
+                        100,
+                        value=slider_inputs.discount_rate,
+                        id="myslider7",
+                        updatemode="drag",
+                        tooltip={"placement": "bottom", "always_visible": True},
+                    ),
+                ]
+            ),
+            html.Div(
+                [
+                    dbc.Label("Decrease Beef Birth Rate"),
+                    dcc.Slider(
+                        0,
+                        100,
+                        value=slider_inputs.reduction_in_beef_calves,
+                        id="myslider1",
+                        updatemode="drag",
+                        tooltip={"placement": "bottom", "always_visible": True},
+                    ),
+                ]
+            ),
+            html.Div(
+                [
+                    dbc.Label("Decrease Dairy Birth Rate"),
+                    dcc.Slider(
+                        0,
+                        100,
+                        value=slider_inputs.reduction_in_dairy_calves,
+                        id="myslider2",
+                        updatemode="drag",
+                        tooltip={"placement": "bottom", "always_visible": True},
+                    ),
+                ]
+            ),
+            html.Div(
+                [
+                    dbc.Label("Reduction Pig Breeding"),
+                    dcc.Slider(
+                        0,
+                        100,
+                        value=slider_inputs.reduction_in_pig_breeding,
+                        id="myslider4",
+                        updatemode="drag",
+                        tooltip={"placement": "bottom", "always_visible": True},
+                    ),
+                ]
+            ),
+            html.Div(
+                [
+                    dbc.Label("Reduction Poultry Breeding"),
+                    dcc.Slider(
+                        0,
+                        100,
+                        value=slider_inputs.reduction_in_poultry_breeding,
+                        id="myslider5",
+                        updatemode="drag",
+                        tooltip={"placement": "bottom", "always_visible": True},
+                    ),
+                ]
+            ),
+            html.Div(
+                [
+                    dbc.Label("Use Residues for Dairy"),
+                    dcc.Slider(
+                        0,
+                        1,
+                        value=slider_inputs.use_grass_and_residues_for_dairy,
+                        step=1,
+                        id="myslider9",
+                        updatemode="drag",
+                        tooltip={"placement": "bottom", "always_visible": True},
+                    ),
+                ]
+            ),
+            html.Div(
+                [
+                    dbc.Label("Months"),
+                    dcc.Slider(
+                        0,
+                        24,
+                        value=slider_inputs.months,
+                        step=1,
+                        id="myslider6",
+                        updatemode="drag",
+                        tooltip={"placement": "bottom", "always_visible": True},
+                    ),
+                ]
+            ),
+        ],
+        body=True,
+    )
 
-mytitle = dcc.Markdown(children="")
-# table_out = dcc.Markdown(children="")
-# mysubtitle = dcc.Markdown(children="")
-scatter = dcc.Graph(figure={})
-scatter2 = dcc.Graph(figure={})
-bar = dcc.Graph(figure={})
-bar2 = dcc.Graph(figure={})
-bar3 = dcc.Graph(figure={})
-bar4 = dcc.Graph(figure={})
-
-### Create slider components on a card
-controls = dbc.Card(
-    [
-        html.Div(
-            [
-                dbc.Label("Baseline Slaughter Rate"),
-                dcc.Slider(
-                    0,
-                    600,
-                    value=slider_inputs.change_to_baseline_slaughter,
-                    id="myslider3",
-                    updatemode="drag",
-                    tooltip={"placement": "bottom", "always_visible": True},
-                ),
-            ]
-        ),
-        html.Div(
-            [
-                dbc.Label(
-                    "Proportion of Slaughter which is mothers"
-                ),  # (proxy for termination of pregnancies too, but not the same as a percentage)
-                dcc.Slider(
-                    0,
-                    100,
-                    value=slider_inputs.mother_slaughter,
-                    id="myslider8",
-                    updatemode="drag",
-                    tooltip={"placement": "bottom", "always_visible": True},
-                ),
-            ]
-        ),
-        html.Div(
-            [
-                dbc.Label(
-                    "Discount Rate for Labour/Technology Transfer between species"
-                ),
-                dcc.Slider(
-                    0,
-                    100,
-                    value=slider_inputs.discount_rate,
-                    id="myslider7",
-                    updatemode="drag",
-                    tooltip={"placement": "bottom", "always_visible": True},
-                ),
-            ]
-        ),
-        html.Div(
-            [
-                dbc.Label("Decrease Beef Birth Rate"),
-                dcc.Slider(
-                    0,
-                    100,
-                    value=slider_inputs.reduction_in_beef_calves,
-                    id="myslider1",
-                    updatemode="drag",
-                    tooltip={"placement": "bottom", "always_visible": True},
-                ),
-            ]
-        ),
-        html.Div(
-            [
-                dbc.Label("Decrease Dairy Birth Rate"),
-                dcc.Slider(
-                    0,
-                    100,
-                    value=slider_inputs.reduction_in_dairy_calves,
-                    id="myslider2",
-                    updatemode="drag",
-                    tooltip={"placement": "bottom", "always_visible": True},
-                ),
-            ]
-        ),
-        html.Div(
-            [
-                dbc.Label("Reduction Pig Breeding"),
-                dcc.Slider(
-                    0,
-                    100,
-                    value=slider_inputs.reduction_in_pig_breeding,
-                    id="myslider4",
-                    updatemode="drag",
-                    tooltip={"placement": "bottom", "always_visible": True},
-                ),
-            ]
-        ),
-        html.Div(
-            [
-                dbc.Label("Reduction Poultry Breeding"),
-                dcc.Slider(
-                    0,
-                    100,
-                    value=slider_inputs.reduction_in_poultry_breeding,
-                    id="myslider5",
-                    updatemode="drag",
-                    tooltip={"placement": "bottom", "always_visible": True},
-                ),
-            ]
-        ),
-        html.Div(
-            [
-                dbc.Label("Use Residues for Dairy"),
-                dcc.Slider(
-                    0,
-                    1,
-                    value=slider_inputs.use_grass_and_residues_for_dairy,
-                    step=1,
-                    id="myslider9",
-                    updatemode="drag",
-                    tooltip={"placement": "bottom", "always_visible": True},
-                ),
-            ]
-        ),
-        html.Div(
-            [
-                dbc.Label("Months"),
-                dcc.Slider(
-                    0,
-                    24,
-                    value=slider_inputs.months,
-                    step=1,
-                    id="myslider6",
-                    updatemode="drag",
-                    tooltip={"placement": "bottom", "always_visible": True},
-                ),
-            ]
-        ),
-    ],
-    body=True,
-)
+    # Customize your own Layout
+    return dbc.Container(
+        [
+            dbc.Row([dbc.Col([mytitle], width=6)], justify="center"),
+            # dbc.Row([dbc.Col([mysubtitle], width=6)], justify="center"),
+            dbc.Row(
+                [
+                    dbc.Col(controls, md=3),
+                    dbc.Col([bar], width=9),
+                ],
+                align="center",
+            ),
+            html.Hr(),
+            dbc.Row([dbc.Col([bar2], width=12)], justify="center"),
+            dbc.Row([dbc.Col([bar3], width=12)], justify="center"),
+            dbc.Row([dbc.Col([bar4], width=12)], justify="center"),
+            dbc.Row([dbc.Col([scatter], width=12)], justify="center"),
+            dbc.Row([dbc.Col([scatter2], width=12)], justify="center"),
+            session,
+        ]
+        + clientside_stores(),
+        fluid=True,
+    )
 
 
-# Customize your own Layout
-app.layout = dbc.Container(
-    [
-        dbc.Row([dbc.Col([mytitle], width=6)], justify="center"),
-        # dbc.Row([dbc.Col([mysubtitle], width=6)], justify="center"),
-        dbc.Row(
-            [
-                dbc.Col(controls, md=3),
-                dbc.Col([bar], width=9),
-            ],
-            align="center",
-        ),
-        html.Hr(),
-        dbc.Row([dbc.Col([bar2], width=12)], justify="center"),
-        dbc.Row([dbc.Col([bar3], width=12)], justify="center"),
-        dbc.Row([dbc.Col([bar4], width=12)], justify="center"),
-        dbc.Row([dbc.Col([scatter], width=12)], justify="center"),
-        dbc.Row([dbc.Col([scatter2], width=12)], justify="center"),
-
-    ],
-    fluid=True,
-)
+def clientside_stores():
+    """
+    Builds the data the browser needs to run the model, sent once per page.
+
+    Returns:
+        list: the model inputs and figure template stores, empty unless
+            CLIENTSIDE is set
+    """
+    if not CLIENTSIDE:
+        return []
+    return [
+        dcc.Store(id="model-inputs", data=model_payload(load_animal_inputs())),
+        dcc.Store(id="figure-templates", data=figure_templates()),
+    ]
+
+
+app.layout = serve_layout
 
 
-#### Callback function here, this is where it all happens
-# Callback allows components to interact plotly
-@app.callback(
-    Output(scatter, "figure"),
-    Output(bar, "figure"),
-    Output(bar2, "figure"),
-    Output(bar3, "figure"),
-    Output(bar4, "figure"),
-    Output(scatter2, "figure"),
-    Output(mytitle, "children"),
-    # Output(table_out, "children"),
-    # Output(mysubtitle, "children"),
-    Input("myslider1", "value"),
-    Input("myslider2", "value"),
-    Input("myslider3", "value"),
-    Input("myslider4", "value"),
-    Input("myslider5", "value"),
-    Input("myslider6", "value"),
-    Input("myslider7", "value"),
-    Input("myslider8", "value"),
-    Input("myslider9", "value"),
-)
 #### Update graphs functions plotly ####
 def update_graph(
     reduction_in_beef_calves,
@@ -752,11 +543,11 @@ def update_graph(
     months,
     discount_rate,
     mother_slaughter,
-    use_grass_and_residues_for_dairy
+    use_grass_and_residues_for_dairy,
+    session_id,
 ):  # function arguments come from the component property of the Input (in this case, the sliders)
 
-    ## Run Model ##
-    df_final = calculate_feed_and_animals(
+    sliders = (
         reduction_in_beef_calves,
         reduction_in_dairy_calves,
         change_to_baseline_slaughter,
@@ -766,11 +557,42 @@ def update_graph(
         discount_rate,
         mother_slaughter,
         use_grass_and_residues_for_dairy,
-        animal_inputs
     )
-
-    ## Create figures ##
-    [fig1,fig2,fig3,fig4,fig5,fig6] = create_plotly_figs(df_final)
+    # the first render of a page sends whole figures, later ones only new data
+    initial = ctx.triggered_id is None
+    if coalescer is None:
+        return render_graphs(sliders, initial, session_id)
+    try:
+        # a page's first render is never dropped, later ones patch its figures
+        return coalescer.run(
+            session_id,
+            render_graphs,
+            sliders,
+            initial,
+            session_id,
+            droppable=not initial,
+        )
+    except Superseded:
+        raise PreventUpdate
+
+
+def render_graphs(sliders, initial, session_id=None):
+    """
+    Renders the dashboard outputs for one slider state.
+
+    Arguments:
+        sliders (tuple): the nine slider values, in SLIDER_NAMES order
+        initial (bool): whether this is the first render of the page
+        session_id (str): the browser session the render is for
+
+    Returns:
+        tuple: the six figures, whole or as patches, and the title
+    """
+    df_final = model_results(sliders, session_id)
+    render = fill_figure if initial else patch_figure
+    fig1, fig2, fig3, fig4, fig5, fig6 = (
+        render(template, df_final) for template in figure_templates()
+    )
     # return figures and outputs
     return (
         fig1,
@@ -779,10 +601,57 @@ def update_graph(
         fig4,
         fig5,
         fig6,
-        "Animal Feed Model"
+        "Animal Feed Model",
         # f"# Total Feed Use Reduction over {months} months is {months} million tonnes from a baseline of {months} million tonnes",
     )  # returned objects are assigned to the component property of the Output
 
+
+#### Callback function here, this is where it all happens
+# Callback allows components to interact plotly
+graph_outputs = [
+    Output("scatter", "figure"),
+    Output("bar", "figure"),
+    Output("bar2", "figure"),
+    Output("bar3", "figure"),
+    Output("bar4", "figure"),
+    Output("scatter2", "figure"),
+    Output("mytitle", "children"),
+]
+graph_inputs = [Input(f"myslider{index}", "value") for index in range(1, 10)]
+if CLIENTSIDE:
+    app.clientside_callback(
+        ClientsideFunction(namespace="animalFeed", function_name="updateGraphs"),
+        *graph_outputs,
+        *graph_inputs,
+        State("model-inputs", "data"),
+        State("figure-templates", "data"),
+    )
+else:
+    app.callback(*graph_outputs, *graph_inputs, State("session-id", "data"))(
+        update_graph
+    )
+
+
+@app.callback(
+    [Output(f"myslider{index}", "value") for index in range(1, 10)],
+    Input("scenario", "value"),
+    prevent_initial_call=True,
+)
+def load_scenario(scenario):
+    """
+    Moves every slider to the values of a saved scenario.
+
+    Arguments:
+        scenario (str): a key of available_scenarios()
+
+    Returns:
+        list: the nine slider values, myslider1 to myslider9
+    """
+    slider_inputs = load_slider_defaults(scenario)
+    # myslider1 to myslider9 follow the SLIDER_NAMES order
+    return [getattr(slider_inputs, name) for name in SLIDER_NAMES]
+
+
 # Run app
 if __name__ == "__main__":
     app.run_server(debug=False, port=8055)
@@ -0,0 +1,243 @@
+/*
+ * In-browser copy of calculate_feed_and_animals, used when the dashboard runs
+ * with ANIMAL_FEED_CLIENTSIDE set. The input quantities and model constants
+ * come from animal_feed.clientside.model_payload, sent once with the page, so
+ * dragging a slider re-renders the figures without a server round trip.
+ *
+ * Keep the month loop in step with src/animal_feed/model.py, the parity test
+ * in tests/test_clientside.py runs both on the same sliders.
+ */
+
+(function () {
+    "use strict";
+
+    function simulate(payload, sliders) {
+        var p = payload.params;
+        var c = payload.constants;
+        var metrics = payload.metrics;
+
+        var reductionInBeefCalves = sliders[0] * 0.01;
+        var reductionInDairyCalves = sliders[1] * 0.01;
+        var increaseInSlaughter = sliders[2] * 0.01;
+        var reductionInPigBreeding = sliders[3] * 0.01;
+        var reductionInPoultryBreeding = sliders[4] * 0.01;
+        var months = sliders[5];
+        var discountRate = sliders[6];
+        var motherSlaughter = sliders[7];
+        var useGrassAndResiduesForDairy = sliders[8];
+
+        // cow ratios
+        var dairyBeefMotherRatio = p.dairy_cows / p.beef_cows;
+        var dairyHeifers = p.heifers * dairyBeefMotherRatio;
+        var beefHeifers = p.heifers - dairyHeifers;
+        var dairyCalves = dairyBeefMotherRatio * p.total_calves;
+        var beefCalves = p.total_calves - dairyCalves;
+        var dairyCalfSteers = dairyCalves / 2;
+        var dairyCalfGirls = dairyCalves / 2;
+        var calvesDestinedForBeefRatio =
+            (beefCalves + dairyCalfSteers) / p.total_calves;
+        var newBeefCalfs = calvesDestinedForBeefRatio * p.new_calves_per_year;
+        var newDairyCalfs = p.new_calves_per_year - newBeefCalfs;
+        var cattleInBeefTrack =
+            dairyCalfSteers + beefCalves + p.beef_steers + p.beef_cows + beefHeifers;
+        var cattleInDairyTrack = dairyCalfGirls + p.dairy_cows + dairyHeifers;
+
+        var newDairyCalfsPm = newDairyCalfs / 12;
+        var newPoultryPm = p.poultry_slaughter_pm;
+        var currentPregnantSows = p.piglets_pm / p.piglets_per_litter;
+        var currentPregnantCows = newBeefCalfs / 12 / c.CALVES_PER_MOTHER;
+
+        // slaughter capacity, scaled by the slaughter slider
+        var totalSlaughterCapHours =
+            (p.cow_slaughter_pm * c.COW_SLAUGHTER_HOURS +
+                p.pigs_slaughter_pm * c.PIG_SLAUGHTER_HOURS +
+                p.poultry_slaughter_pm * c.POULTRY_SLAUGHTER_HOURS) *
+            increaseInSlaughter;
+        var skillTransferDiscount = (100 - discountRate) / 100;
+        var currentCowSlaughter = p.cow_slaughter_pm * increaseInSlaughter;
+        var currentPoultrySlaughter = p.poultry_slaughter_pm * increaseInSlaughter;
+        var currentPigSlaughter = p.pigs_slaughter_pm * increaseInSlaughter;
+
+        var currentBeefCattle = cattleInBeefTrack;
+        var currentDairyCattle = cattleInDairyTrack;
+        var currentTotalPigs = p.total_pigs;
+        var currentTotalPoultry = p.total_poultry;
+
+        var dairyCowFeedPmPerCow = useGrassAndResiduesForDairy
+            ? 0
+            : c.DAIRY_COW_FEED_PM_PER_COW;
+        var baselineFeed =
+            currentTotalPoultry * c.POULTRY_FEED_PM_PER_BIRD +
+            currentTotalPigs * c.PIG_FEED_PM_PER_PIG +
+            currentBeefCattle * c.BEEF_COW_FEED_PM_PER_COW +
+            currentDairyCattle * dairyCowFeedPmPerCow;
+
+        var columns = {};
+        metrics.forEach(function (name) {
+            columns[name] = new Array(months);
+        });
+        var feedUnitAdjust = c.FEED_UNIT_ADJUST;
+
+        for (var i = 0; i < months; i++) {
+            var newPigsPm = currentPregnantSows * p.piglets_per_litter;
+            var newBeefCalfsPm = currentPregnantCows * c.CALVES_PER_MOTHER;
+
+            // birth rate interventions take effect one gestation after month 0
+            if (Math.abs(i - p.cow_gestation) <= 0.5) {
+                newBeefCalfsPm *= 1 - reductionInBeefCalves;
+                newDairyCalfsPm *= 1 - reductionInDairyCalves;
+                currentPregnantCows *= 1 - reductionInBeefCalves;
+            }
+            if (Math.abs(i - p.pig_gestation) <= 0.5) {
+                newPigsPm *= 1 - reductionInPigBreeding;
+                currentPregnantSows *= 1 - reductionInPigBreeding;
+            }
+            if (Math.abs(i - p.poultry_gestation) <= 0.5) {
+                newPoultryPm *= 1 - reductionInPoultryBreeding;
+            }
+            if (newPigsPm < 0) {
+                newPigsPm = 0;
+            }
+            if (newBeefCalfsPm < 0) {
+                newBeefCalfsPm = 0;
+            }
+
+            // spare slaughter capacity spills over poultry -> pig -> cow
+            var spareSlaughterHours;
+            if (currentTotalPoultry < currentPoultrySlaughter) {
+                spareSlaughterHours =
+                    (currentPoultrySlaughter - currentTotalPoultry) *
+                    c.POULTRY_SLAUGHTER_HOURS;
+                currentPoultrySlaughter = currentTotalPoultry;
+                currentPigSlaughter +=
+                    (spareSlaughterHours * skillTransferDiscount) /
+                    c.PIG_SLAUGHTER_HOURS;
+            }
+            if (currentTotalPigs < currentPigSlaughter) {
+                spareSlaughterHours =
+                    (currentPigSlaughter - currentTotalPigs) * c.PIG_SLAUGHTER_HOURS;
+                currentPigSlaughter = currentTotalPigs;
+                currentCowSlaughter +=
+                    (spareSlaughterHours * skillTransferDiscount) /
+                    c.COW_SLAUGHTER_HOURS;
+            }
+
+            // dairy cows are only slaughtered at the end of their life
+            var currentDairySlaughter =
+                currentDairyCattle / (c.DAIRY_LIFE_EXPECTANCY * 12);
+            var currentBeefSlaughter = currentCowSlaughter - currentDairySlaughter;
+            var actualBeefSlaughter =
+                currentBeefCattle < currentBeefSlaughter
+                    ? currentBeefCattle
+                    : currentBeefSlaughter;
+
+            var otherBeefDeath = c.OTHER_COW_DEATH_RATE * currentBeefCattle;
+            var otherDairyDeath = c.OTHER_COW_DEATH_RATE * currentDairyCattle;
+            var otherPigDeath = currentTotalPigs * c.OTHER_PIG_DEATH_RATE;
+            var otherPoultryDeath = currentTotalPoultry * c.OTHER_POULTRY_DEATH_RATE;
+
+            var currentBeefFeed = currentBeefCattle * c.BEEF_COW_FEED_PM_PER_COW;
+            var currentDairyFeed = currentDairyCattle * dairyCowFeedPmPerCow;
+            var currentPigFeed = currentTotalPigs * c.PIG_FEED_PM_PER_PIG;
+            var currentPoultryFeed = currentTotalPoultry * c.POULTRY_FEED_PM_PER_BIRD;
+            var currentFeedCombined =
+                currentBeefFeed + currentDairyFeed + currentPigFeed + currentPoultryFeed;
+
+            var beefHours = actualBeefSlaughter * c.COW_SLAUGHTER_HOURS;
+            var dairyHours = currentDairySlaughter * c.COW_SLAUGHTER_HOURS;
+            var pigHours = currentPigSlaughter * c.PIG_SLAUGHTER_HOURS;
+            var poultryHours = currentPoultrySlaughter * c.POULTRY_SLAUGHTER_HOURS;
+            var row = [
+                currentBeefCattle,
+                newBeefCalfsPm,
+                actualBeefSlaughter,
+                beefHours,
+                beefHours / totalSlaughterCapHours,
+                otherBeefDeath,
+                currentBeefFeed * feedUnitAdjust,
+                currentDairyCattle,
+                newDairyCalfsPm,
+                currentDairySlaughter,
+                dairyHours,
+                dairyHours / totalSlaughterCapHours,
+                otherDairyDeath,
+                currentDairyFeed * feedUnitAdjust,
+                currentTotalPigs,
+                newPigsPm,
+                currentPigSlaughter,
+                pigHours,
+                pigHours / totalSlaughterCapHours,
+                currentPigFeed * feedUnitAdjust,
+                currentTotalPoultry,
+                newPoultryPm,
+                currentPoultrySlaughter,
+                poultryHours,
+                poultryHours / totalSlaughterCapHours,
+                currentPoultryFeed * feedUnitAdjust,
+                currentFeedCombined * feedUnitAdjust,
+                (baselineFeed - currentFeedCombined) * feedUnitAdjust,
+                i,
+            ];
+            for (var m = 0; m < metrics.length; m++) {
+                columns[metrics[m]][i] = row[m];
+            }
+
+            // sum up new totals
+            currentBeefCattle +=
+                newBeefCalfsPm - currentBeefSlaughter - otherBeefDeath;
+            currentDairyCattle +=
+                newDairyCalfsPm - currentDairySlaughter - otherDairyDeath;
+            currentTotalPoultry +=
+                newPoultryPm - currentPoultrySlaughter - otherPoultryDeath;
+            currentTotalPigs += newPigsPm - currentPigSlaughter - otherPigDeath;
+            currentPregnantSows -=
+                motherSlaughter * (currentPigSlaughter + otherPigDeath);
+            currentPregnantCows -=
+                motherSlaughter * (currentBeefSlaughter + otherBeefDeath);
+            if (currentBeefCattle < 0) {
+                currentBeefCattle = 0;
+            }
+            if (currentDairyCattle < 0) {
+                currentDairyCattle = 0;
+            }
+        }
+        return columns;
+    }
+
+    function renderFigures(payload, templates, sliders) {
+        // the templates are the server's figures, only their data is replaced
+        var columns = simulate(payload, sliders);
+        return templates.map(function (template) {
+            return {
+                layout: template.layout,
+                data: template.data.map(function (trace) {
+                    return Object.assign({}, trace, {
+                        x: columns.Month,
+                        y: columns[trace.name],
+                    });
+                }),
+            };
+        });
+    }
+
+    var animalFeed = {
+        simulate: simulate,
+        renderFigures: renderFigures,
+        // dash passes the nine slider values, then the two stores
+        updateGraphs: function () {
+            var sliders = Array.prototype.slice.call(arguments, 0, 9);
+            return renderFigures(arguments[9], arguments[10], sliders).concat([
+                "Animal Feed Model",
+            ]);
+        },
+    };
+
+    if (typeof window !== "undefined") {
+        window.dash_clientside = Object.assign({}, window.dash_clientside, {
+            animalFeed: animalFeed,
+        });
+    }
+    if (typeof module !== "undefined") {
+        module.exports = animalFeed;
+    }
+})();
@@ -0,0 +1,321 @@
+"""
+Benchmark suite for the model core, the figures and the dashboard callback.
+
+Each benchmark is timed over several repeats and its median time is compared
+with the median of the last runs recorded in the history file on the same
+machine. A benchmark more than --threshold times slower than that baseline is
+a regression. Every run is appended to the history as one JSON line.
+
+Run `python benchmarks.py` from the src folder, see `--help` for the options.
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from animal_feed import (
+    IncrementalModel,
+    calculate_feed_and_animals,
+    calculate_feed_and_animals_batch,
+    load_animal_inputs,
+)
+from animal_feed.model import SLIDER_BOUNDS, SLIDER_NAMES
+
+SRC_PATH = pathlib.Path(__file__).parent.resolve()
+HISTORY_PATH = SRC_PATH.joinpath("../results/benchmark_history.jsonl").resolve()
+# a benchmark this many times slower than its baseline is a regression
+DEFAULT_THRESHOLD = 1.5
+# number of earlier runs on the same machine the baseline is taken from
+BASELINE_RUNS = 5
+BASELINE_SLIDERS = (0, 0, 100, 0, 0, 12, 20, 0, 0)
+BATCH_SCENARIOS = 1000
+
+
+def _model(months, backend=None):
+    animal_inputs = load_animal_inputs()
+    sliders = list(BASELINE_SLIDERS)
+    sliders[5] = months
+    return lambda: calculate_feed_and_animals(*sliders, animal_inputs, backend=backend)
+
+
+def _resumed_model():
+    model = IncrementalModel(load_animal_inputs())
+    sliders = list(BASELINE_SLIDERS)
+    sliders[5] = 240
+
+    def run():
+        # alternately cut to 239 months and extended back to 240
+        sliders[5] = 479 - sliders[5]
+        model.run(sliders)
+
+    return run
+
+
+def _batch_sweep():
+    # a fixed random sweep over the dashboard's slider ranges
+    rng = np.random.default_rng(0)
+    low, high = np.array([SLIDER_BOUNDS[name] for name in SLIDER_NAMES]).T
+    sliders = rng.uniform(low, high, (BATCH_SCENARIOS, len(SLIDER_NAMES)))
+    sliders[:, 5] = 24
+    animal_inputs = load_animal_inputs()
+    return lambda: calculate_feed_and_animals_batch(sliders, animal_inputs)
+
+
+def _plotly_figs():
+    import app
+
+    df_final = calculate_feed_and_animals(*BASELINE_SLIDERS, load_animal_inputs())
+    return lambda: app.create_plotly_figs(df_final)
+
+
+def _update_graph():
+    import app
+
+    graphs = ("scatter", "bar", "bar2", "bar3", "bar4", "scatter2")
+    body = {
+        "output": ".."
+        + "...".join(f"{graph}.figure" for graph in graphs)
+        + "...mytitle.children..",
+        "outputs": [{"id": graph, "property": "figure"} for graph in graphs]
+        + [{"id": "mytitle", "property": "children"}],
+        "inputs": [
+            {"id": f"myslider{index}", "property": "value", "value": value}
+            for index, value in enumerate(BASELINE_SLIDERS, start=1)
+        ],
+        "state": [{"id": "session-id", "property": "data", "value": "benchmark"}],
+        "changedPropIds": ["myslider1.value"],
+    }
+    client = app.server.test_client()
+
+    def post():
+        # time the whole model run, not a result cache hit
+        app.result_cache.clear()
+        response = client.post("/_dash-update-component", json=body)
+        assert response.status_code == 200
+
+    return post
+
+
+def _app_import():
+    command = [sys.executable, "-c", "import app"]
+    return lambda: subprocess.run(command, cwd=SRC_PATH, check=True)
+
+
+# benchmark name to (setup returning the timed callable, repeats)
+BENCHMARKS = {
+    "model_12_months": (lambda: _model(12), 50),
+    "model_24_months": (lambda: _model(24), 50),
+    "model_240_months": (lambda: _model(240), 20),
+    # the reference loop, the months above use the compiled kernel if numba is installed
+    "model_24_months_python": (lambda: _model(24, "python"), 50),
+    # a 240 month trajectory extended by a month, not rerun
+    "model_240_months_resumed": (_resumed_model, 20),
+    "batch_sweep": (_batch_sweep, 10),
+    "create_plotly_figs": (_plotly_figs, 10),
+    "update_graph": (_update_graph, 20),
+    "app_import": (_app_import, 3),
+}
+
+
+def time_benchmark(setup, repeats):
+    """
+    Times a benchmark after one untimed warm up call.
+
+    Arguments:
+        setup (callable): returns the callable to time
+        repeats (int): number of timed calls
+
+    Returns:
+        dict: "median" and "min" seconds per call, and the repeats
+    """
+    func = setup()
+    func()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times), "repeats": repeats}
+
+
+def run_benchmarks(names=None, scale=1.0):
+    """
+    Runs some or all of the benchmarks.
+
+    Arguments:
+        names (iterable): keys of BENCHMARKS, all of them by default
+        scale (float): multiplies every benchmark's repeats, at least one each
+
+    Returns:
+        dict: benchmark name to the timings of time_benchmark
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        setup, repeats = BENCHMARKS[name]
+        results[name] = time_benchmark(setup, max(1, round(repeats * scale)))
+    return results
+
+
+def machine_id():
+    """
+    Identifies the machine and interpreter, timings only compare within one.
+
+    Returns:
+        str: the host name, machine type and python version
+    """
+    return f"{platform.node()}/{platform.machine()}/py{platform.python_version()}"
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SRC_PATH,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_history(path=HISTORY_PATH):
+    """
+    Reads the recorded benchmark runs.
+
+    Arguments:
+        path (pathlib.Path): the JSON lines history file
+
+    Returns:
+        list: the run records, oldest first, empty if there is no history
+    """
+    path = pathlib.Path(path)
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines() if line]
+
+
+def append_history(record, path=HISTORY_PATH):
+    """
+    Appends one run record to the history.
+
+    Arguments:
+        record (dict): the run, as made by make_record
+        path (pathlib.Path): the JSON lines history file
+    """
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as handle:
+        handle.write(json.dumps(record) + "\n")
+
+
+def make_record(results):
+    """
+    Wraps benchmark timings with when and where they were taken.
+
+    Arguments:
+        results (dict): as returned by run_benchmarks
+
+    Returns:
+        dict: the history record
+    """
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _git_commit(),
+        "machine": machine_id(),
+        "results": results,
+    }
+
+
+def baselines(history, machine, runs=BASELINE_RUNS):
+    """
+    Takes each benchmark's baseline from the latest runs on one machine.
+
+    Arguments:
+        history (list): run records, oldest first
+        machine (str): the machine_id to compare within
+        runs (int): number of latest runs of each benchmark to use
+
+    Returns:
+        dict: benchmark name to the median of its recorded median times
+    """
+    medians = {}
+    for record in history:
+        if record.get("machine") == machine:
+            for name, timing in record["results"].items():
+                medians.setdefault(name, []).append(timing["median"])
+    return {name: statistics.median(values[-runs:]) for name, values in medians.items()}
+
+
+def find_regressions(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares timings with their baselines.
+
+    Arguments:
+        results (dict): as returned by run_benchmarks
+        baseline (dict): as returned by baselines
+        threshold (float): the allowed slow down factor
+
+    Returns:
+        dict: name of every regressed benchmark to its slow down factor
+    """
+    return {
+        name: timing["median"] / baseline[name]
+        for name, timing in results.items()
+        if name in baseline and timing["median"] > baseline[name] * threshold
+    }
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    Arguments:
+        argv (list): the arguments, sys.argv[1:] by default
+
+    Returns:
+        int: 1 if a benchmark regressed, 0 otherwise
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "names", nargs="*", help=f"benchmarks to run, from {', '.join(BENCHMARKS)}"
+    )
+    parser.add_argument("--history", default=HISTORY_PATH, help="history file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed slow down factor",
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiplies the repeats"
+    )
+    parser.add_argument("--no-save", action="store_true", help="do not record this run")
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {sorted(unknown)}")
+
+    history = read_history(args.history)
+    results = run_benchmarks(args.names, args.scale)
+    baseline = baselines(history, machine_id())
+    regressions = find_regressions(results, baseline, args.threshold)
+    for name, timing in results.items():
+        previous = baseline.get(name)
+        change = f"{timing['median'] / previous:6.2f}x" if previous else "   new"
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:20s} {timing['median'] * 1000:10.3f} ms {change}{flag}")
+    if not args.no_save:
+        append_history(make_record(results), args.history)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# the model lives in src/ and is imported as top level modules, as gunicorn does
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.joinpath("src")))
@@ -0,0 +1,69 @@
+import io
+
+import numpy as np
+
+import app
+from animal_feed import SLIDER_NAMES, calculate_feed_and_animals, load_animal_inputs
+
+SLIDER_SETS = [
+    [0, 0, 100, 0, 0, 12, 20, 0, 0],
+    [100, 0, 110, 100, 100, 6, 20, 0.4, 1],
+]
+
+
+def test_bulk_request_matches_the_model():
+    """
+    Every slider set of a bulk request should get the model's results for its
+    own months, whether given as a list or by name
+    """
+    sets = [SLIDER_SETS[0], dict(zip(SLIDER_NAMES, SLIDER_SETS[1]))]
+    response = app.server.test_client().post("/api/v1/model", json={"sliders": sets})
+    assert response.status_code == 200
+    body = response.get_json()
+    for sliders, result in zip(SLIDER_SETS, body["results"]):
+        expected = calculate_feed_and_animals(*sliders, load_animal_inputs())
+        assert result["months"] == sliders[5]
+        for name in body["metrics"]:
+            np.testing.assert_allclose(
+                result["values"][name], expected[name], rtol=1e-12
+            )
+
+
+def test_get_requests_are_cached_by_etag():
+    """
+    A repeated GET with the ETag gets a 304, and npy holds the JSON values
+    """
+    client = app.server.test_client()
+    query = dict(zip(SLIDER_NAMES, SLIDER_SETS[0]), metrics="Beef Pop,Combined Feed")
+    response = client.get("/api/v1/model", query_string=query)
+    etag = response.headers["ETag"]
+    cached = client.get(
+        "/api/v1/model", query_string=query, headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304 and not cached.data
+    binary = client.get("/api/v1/model", query_string=dict(query, format="npy"))
+    assert binary.headers["ETag"] != etag
+    values = np.load(io.BytesIO(binary.data))
+    assert values.shape == (1, 12, 2)
+    np.testing.assert_array_equal(
+        values[0, :, 1], response.get_json()["results"][0]["values"]["Combined Feed"]
+    )
+
+
+def test_malformed_requests_are_rejected():
+    """
+    Missing sliders, out of range values, malformed metrics and requests with
+    too many result rows are answered with a 400
+    """
+    client = app.server.test_client()
+    for body in (
+        {"sliders": [1, 2, 3]},
+        {"sliders": dict(zip(SLIDER_NAMES, SLIDER_SETS[0]), months=2.5)},
+        {"sliders": SLIDER_SETS, "metrics": ["Goat Pop"]},
+        {"slider": SLIDER_SETS},
+        {"sliders": SLIDER_SETS, "metrics": 5},
+        {"sliders": [SLIDER_SETS[0][:5] + [1200] + SLIDER_SETS[0][6:]] * 1000},
+    ):
+        response = client.post("/api/v1/model", json=body)
+        assert response.status_code == 400
+        assert "error" in response.get_json()
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import app
+from animal_feed.coalesce import LatestWins
+
+GRAPHS = ("scatter", "bar", "bar2", "bar3", "bar4", "scatter2")
+
+
+def post_update(sliders, changed, session="test"):
+    """
+    Posts a slider update to the dashboard the way the browser does.
+
+    Arguments:
+        sliders (list): the nine slider values, myslider1 to myslider9
+        changed (list): the changed property ids, empty for a page's first render
+        session (str): the session-id store value
+
+    Returns:
+        flask.Response: the callback response
+    """
+    body = {
+        "output": ".."
+        + "...".join(f"{graph}.figure" for graph in GRAPHS)
+        + "...mytitle.children..",
+        "outputs": [{"id": graph, "property": "figure"} for graph in GRAPHS]
+        + [{"id": "mytitle", "property": "children"}],
+        "inputs": [
+            {"id": f"myslider{index}", "property": "value", "value": value}
+            for index, value in enumerate(sliders, start=1)
+        ],
+        "state": [{"id": "session-id", "property": "data", "value": session}],
+        "changedPropIds": changed,
+    }
+    return app.server.test_client().post("/_dash-update-component", json=body)
+
+
+def update_graphs(sliders, changed):
+    """
+    Posts a slider update and checks it rendered.
+
+    Arguments:
+        sliders (list): the nine slider values, myslider1 to myslider9
+        changed (list): the changed property ids, empty for a page's first render
+
+    Returns:
+        dict: the callback response keyed by component id
+    """
+    response = post_update(sliders, changed)
+    assert response.status_code == 200
+    return response.get_json()["response"]
+
+
+def test_first_render_sends_whole_figures():
+    """
+    A page's first render gets full figures built from the shared templates
+    """
+    response = update_graphs([0, 0, 100, 0, 0, 12, 20, 0, 0], [])
+    figure = response["bar"]["figure"]
+    assert figure["layout"]["title"]["text"] == "Population Make-up"
+    assert [trace["name"] for trace in figure["data"]] == [
+        "Dairy Pop",
+        "Beef Pop",
+        "Pigs Pop",
+        "Poultry Pop",
+    ]
+
+
+def test_slider_moves_send_only_trace_data():
+    """
+    Later renders patch the x and y of every trace and leave the layout alone
+    """
+    response = update_graphs([10, 0, 100, 0, 0, 12, 20, 0, 0], ["myslider1.value"])
+    operations = response["bar"]["figure"]["operations"]
+    assert {tuple(op["location"][::2]) for op in operations} == {
+        ("data", "x"),
+        ("data", "y"),
+    }
+    assert all(len(op["params"]["value"]) == 12 for op in operations)
+
+
+def test_concurrent_slider_moves_are_coalesced(monkeypatch):
+    """
+    With threaded workers, slider moves of a session that arrive while an
+    earlier one waits replace it, and only the latest renders
+    """
+    monkeypatch.setattr(app, "coalescer", LatestWins(debounce=0.5))
+    statuses = {}
+
+    def move(value):
+        sliders = [value, 0, 100, 0, 0, 12, 20, 0, 0]
+        statuses[value] = post_update(sliders, ["myslider1.value"], "drag").status_code
+
+    threads = []
+    for value in (20, 30, 40):
+        threads.append(threading.Thread(target=move, args=(value,)))
+        threads[-1].start()
+        while app.coalescer.stats()["waiting"] < len(threads):
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join(10)
+    # superseded renders end with PreventUpdate, which Dash answers with a 204
+    assert statuses == {20: 204, 30: 204, 40: 200}
+    assert app.coalescer.stats()["dropped"] == 2
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from animal_feed import (
+    METRIC_NAMES,
+    SLIDER_NAMES,
+    batch_result_frame,
+    calculate_feed_and_animals,
+    calculate_feed_and_animals_batch,
+    load_animal_inputs,
+)
+
+SCENARIOS = [
+    [0, 0, 100, 0, 0, 12, 20, 0, 0],
+    [100, 0, 110, 100, 100, 24, 20, 0.4, 1],
+    [100, 50, 80, 100, 30, 18, 50, 0.2, 0],
+    [10, 90, 600, 60, 100, 24, 0, 1, 0],
+    [0, 0, 0, 0, 0, 6, 100, 0, 1],
+]
+
+
+def test_batch_matches_scalar_model():
+    """
+    Every scenario of a batch run should match the scalar model month by month
+    """
+    animal_inputs = load_animal_inputs()
+    results = calculate_feed_and_animals_batch(SCENARIOS, animal_inputs)
+    assert results.shape == (len(SCENARIOS), 24, len(METRIC_NAMES))
+    for index, scenario in enumerate(SCENARIOS):
+        expected = calculate_feed_and_animals(*scenario, animal_inputs)
+        actual = batch_result_frame(results, index)
+        pd.testing.assert_frame_equal(
+            actual, expected[list(METRIC_NAMES)], check_dtype=False, rtol=1e-12
+        )
+
+
+def test_batch_masks_months_past_horizon():
+    """
+    Months past a scenario's own months slider should be NaN, and a months
+    slider that is not a whole number is rejected rather than truncated
+    """
+    results = calculate_feed_and_animals_batch(SCENARIOS, load_animal_inputs())
+    assert np.isnan(results[0, 12:]).all()
+    assert not np.isnan(results[0, :12, :]).any()
+    for months in (11.9, -1):
+        with pytest.raises(ValueError):
+            calculate_feed_and_animals_batch(
+                [SCENARIOS[0][:5] + [months] + SCENARIOS[0][6:]], load_animal_inputs()
+            )
+
+
+def test_batch_accepts_dataframe_sliders():
+    """
+    A DataFrame of sliders is reordered by column name
+    """
+    sliders = pd.DataFrame(SCENARIOS, columns=SLIDER_NAMES)
+    shuffled = sliders[list(reversed(SLIDER_NAMES))]
+    np.testing.assert_array_equal(
+        calculate_feed_and_animals_batch(shuffled, load_animal_inputs()),
+        calculate_feed_and_animals_batch(SCENARIOS, load_animal_inputs()),
+    )
@@ -0,0 +1,51 @@
+import benchmarks
+
+
+def record(machine, **medians):
+    """
+    Builds a history record with the given median times.
+
+    Arguments:
+        machine (str): the machine the run was taken on
+        **medians: benchmark name to median seconds
+
+    Returns:
+        dict: the record, as make_record would write it
+    """
+    return {
+        "machine": machine,
+        "results": {name: {"median": value} for name, value in medians.items()},
+    }
+
+
+def test_regressions_compare_with_recent_runs_on_the_same_machine():
+    """
+    Baselines come from the latest runs of the same machine only, and only
+    benchmarks slower than the threshold allows are regressions
+    """
+    history = [record("a", model=10.0)] + [record("a", model=1.0)] * 5
+    history.append(record("b", model=0.1, figures=0.1))
+    baseline = benchmarks.baselines(history, "a")
+    assert baseline == {"model": 1.0}
+    results = {"model": {"median": 1.4}, "figures": {"median": 5.0}}
+    assert benchmarks.find_regressions(results, baseline, 1.5) == {}
+    assert benchmarks.find_regressions(results, baseline, 1.2) == {"model": 1.4}
+
+
+def test_runs_are_recorded_in_the_history(tmp_path):
+    """
+    A run appends one record per invocation and exits non zero on a regression
+    """
+    history = tmp_path.joinpath("history.jsonl")
+    argv = ["model_12_months", "--scale", "0.1", "--history", str(history)]
+    assert benchmarks.main(argv) == 0
+    records = benchmarks.read_history(history)
+    assert len(records) == 1
+    assert records[0]["machine"] == benchmarks.machine_id()
+    assert records[0]["results"]["model_12_months"]["repeats"] == 5
+    # a baseline no run can beat
+    records[0]["results"]["model_12_months"]["median"] = 1e-12
+    history.write_text("")
+    benchmarks.append_history(records[0], history)
+    assert benchmarks.main(argv + ["--no-save"]) == 1
+    assert len(benchmarks.read_history(history)) == 1
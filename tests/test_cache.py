@@ -0,0 +1,36 @@
+from animal_feed.cache import ResultCache, slider_cache_key
+
+
+def test_cache_evicts_least_recently_used():
+    """
+    A full cache drops the entry that was used longest ago
+    """
+    cache = ResultCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"hits": 3, "misses": 1, "size": 2, "maxsize": 2}
+
+
+def test_cache_of_size_zero_stores_nothing():
+    """
+    maxsize 0 disables caching but still returns the value
+    """
+    cache = ResultCache(maxsize=0)
+    assert cache.put("a", 1) == 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_slider_cache_key_normalises_values():
+    """
+    Integer and float slider values share a key, different inputs do not
+    """
+    inputs, other_inputs = object(), object()
+    key = slider_cache_key([100, 0, 110, 100, 0, 12, 20, 0, 1], inputs)
+    assert key == slider_cache_key([100.0, 0, 110.0, 100, 0, 12.0, 20, 0, 1.0], inputs)
+    assert key != slider_cache_key([100, 0, 110, 100, 0, 12, 20, 0, 1], other_inputs)
@@ -0,0 +1,54 @@
+import json
+import pathlib
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from animal_feed import METRIC_NAMES, calculate_feed_and_animals, load_animal_inputs
+from animal_feed.clientside import model_payload
+
+MODEL_JS = pathlib.Path(__file__).parent.joinpath("../src/assets/animal_feed_model.js")
+
+SCENARIOS = [
+    [0, 0, 100, 0, 0, 12, 20, 0, 0],
+    [100, 0, 110, 100, 100, 24, 20, 0.4, 1],
+    [100, 50, 80, 100, 30, 18, 50, 0.2, 0],
+    [10, 90, 600, 60, 100, 24, 0, 1, 0],
+]
+
+RUNNER = """
+const model = require(process.argv[1]);
+const {payload, scenarios} = JSON.parse(require("fs").readFileSync(0, "utf8"));
+console.log(JSON.stringify(scenarios.map((s) => model.simulate(payload, s))));
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_javascript_model_matches_python_model():
+    """
+    The in-browser model gives the same numbers as calculate_feed_and_animals
+    """
+    animal_inputs = load_animal_inputs()
+    request = {"payload": model_payload(animal_inputs), "scenarios": SCENARIOS}
+    output = subprocess.run(
+        ["node", "-e", RUNNER, str(MODEL_JS.resolve())],
+        input=json.dumps(request),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for scenario, columns in zip(SCENARIOS, json.loads(output.stdout)):
+        expected = calculate_feed_and_animals(*scenario, animal_inputs)
+        for name in METRIC_NAMES:
+            np.testing.assert_allclose(columns[name], expected[name], rtol=1e-12)
+
+
+def test_payload_is_json_serialisable():
+    """
+    The payload sent to the browser holds plain numbers only
+    """
+    payload = json.loads(json.dumps(model_payload(load_animal_inputs())))
+    assert payload["metrics"] == list(METRIC_NAMES)
+    assert payload["constants"]["COW_SLAUGHTER_HOURS"] == 4
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from animal_feed.coalesce import LatestWins, Superseded
+
+
+def test_superseded_requests_are_dropped():
+    """
+    Requests queued behind a running one are dropped once a newer one arrives,
+    and only the latest of them runs
+    """
+    coalescer = LatestWins()
+    started = threading.Event()
+    release = threading.Event()
+    ran = []
+    outcomes = {}
+
+    def work(value):
+        if value == 0:
+            started.set()
+            release.wait(5)
+        ran.append(value)
+        return value
+
+    def request(value):
+        try:
+            outcomes[value] = coalescer.run("session", work, value, droppable=value)
+        except Superseded:
+            outcomes[value] = "superseded"
+
+    first = threading.Thread(target=request, args=(0,))
+    first.start()
+    started.wait(5)
+    queued = [threading.Thread(target=request, args=(value,)) for value in (1, 2, 3)]
+    for thread in queued:
+        thread.start()
+    while coalescer.stats()["waiting"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [first] + queued:
+        thread.join(5)
+    # the first request was not droppable so its result is kept
+    assert outcomes == {0: 0, 1: "superseded", 2: "superseded", 3: 3}
+    assert ran == [0, 3]
+    stats = coalescer.stats()
+    assert stats["dropped"] == 2
+    assert stats["max_waiting"] == 3
+    assert stats["completed"] == 2
+    assert stats["sessions"] == 0
+
+
+def test_sessions_do_not_supersede_each_other():
+    """
+    Requests of different sessions all run, and stale results are discarded
+    """
+    coalescer = LatestWins()
+    assert coalescer.run("a", sum, (1, 2)) == 3
+    assert coalescer.run("b", sum, (3, 4)) == 7
+
+    def replaced():
+        # a newer request of the same session arrives while this one runs
+        coalescer._sessions["a"].latest += 1
+        return 0
+
+    with pytest.raises(Superseded):
+        coalescer.run("a", replaced)
+    assert coalescer.stats()["discarded"] == 1
+    with pytest.raises(ValueError):
+        LatestWins(debounce=-1)
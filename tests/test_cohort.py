@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from animal_feed import load_animal_inputs
+from animal_feed.cohort import CohortRing, simulate_cohorts
+from animal_feed.model import METRIC_INDEX
+
+SCENARIOS = [
+    [0, 0, 100, 0, 0, 24, 20, 0, 0],
+    [100, 100, 110, 100, 100, 24, 20, 40, 1],
+]
+
+
+def test_ring_ages_cohorts_and_takes_the_oldest_first():
+    """
+    Advancing moves every cohort up an age, and take_oldest empties the oldest
+    eligible cohorts before younger ones
+    """
+    ring = CohortRing([[1.0, 2.0, 3.0]])
+    assert ring.advance(np.array([4.0])).tolist() == [0.0]
+    np.testing.assert_array_equal(ring.by_age(), [[4.0, 1.0, 5.0]])
+    assert ring.advance(np.array([6.0]), keep_oldest=False).tolist() == [5.0]
+    np.testing.assert_array_equal(ring.by_age(), [[6.0, 4.0, 1.0]])
+    assert ring.take_oldest(np.array([3.0]), youngest=1).tolist() == [3.0]
+    np.testing.assert_array_equal(ring.by_age(), [[6.0, 2.0, 0.0]])
+    assert ring.take_oldest(np.array([9.0]), youngest=1).tolist() == [2.0]
+    assert ring.total().tolist() == [6.0]
+
+
+def test_cattle_are_accounted_for_every_month():
+    """
+    Each month's cattle population should be the previous one plus births,
+    less slaughter and other deaths
+    """
+    results = simulate_cohorts(SCENARIOS, load_animal_inputs())
+    for species in ("Beef", "Dairy"):
+        columns = [
+            METRIC_INDEX[f"{species} {name}"]
+            for name in ("Pop", "Born", "Slaughtered", "Other Death")
+        ]
+        pop, born, slaughtered, death = np.moveaxis(results[:, :, columns], 2, 0)
+        np.testing.assert_allclose(
+            pop[:, 1:], (pop + born - slaughtered - death)[:, :-1], rtol=1e-9
+        )
+
+
+def test_breeding_cuts_reach_births_one_gestation_later():
+    """
+    Stopping pig breeding should leave births unchanged until one pig
+    gestation has passed, then stop them
+    """
+    animal_inputs = load_animal_inputs()
+    gestation = int(animal_inputs.dataframe.loc["pigGestation", "Qty"])
+    born = simulate_cohorts(SCENARIOS, animal_inputs)[:, :, METRIC_INDEX["Pig Born"]]
+    np.testing.assert_allclose(born[1, :gestation], born[0, :gestation])
+    assert (born[1, gestation:] == 0).all()
+    assert (born[0, gestation:] > 0).all()
+
+
+def test_mother_slaughter_is_a_percentage():
+    """
+    The mother slaughter slider runs from 0 to 100, so half the slaughter taken
+    from the breeding herd should differ from all of it
+    """
+    half, full = simulate_cohorts(
+        [SCENARIOS[0][:7] + [50, 0], SCENARIOS[0][:7] + [100, 0]], load_animal_inputs()
+    )
+    assert not np.allclose(
+        half[:, METRIC_INDEX["Pig Born"]], full[:, METRIC_INDEX["Pig Born"]]
+    )
+
+
+def test_fractional_months_are_rejected():
+    """
+    The cohort engine cannot run part of a month, like the batch engine
+    """
+    with pytest.raises(ValueError, match="whole numbers"):
+        simulate_cohorts(
+            [SCENARIOS[0][:5] + [12.5] + SCENARIOS[0][6:]], load_animal_inputs()
+        )
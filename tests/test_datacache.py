@@ -0,0 +1,108 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from animal_feed import datacache
+
+QUICKSTATS = (
+    '"Program","Year","Period","State","Zip Code","Data Item","Value","CV (%)"\n'
+    '"SURVEY","2021","YEAR","IOWA"," ","HOGS","23,900,000",""\n'
+    '"SURVEY","2021","YEAR","OHIO"," ","HOGS"," (D)",""\n'
+)
+
+
+def write_source(tmp_path, text=QUICKSTATS):
+    source = tmp_path.joinpath("hogs.csv")
+    source.write_text(text)
+    return source
+
+
+def test_quickstats_values_are_typed(tmp_path):
+    """
+    Thousands separators are stripped, withheld values are NaN and empty
+    columns are dropped
+    """
+    source = write_source(tmp_path)
+    table = datacache.load_table(source, tmp_path.joinpath("cache"))
+    assert table["Value"].iloc[0] == 23_900_000
+    assert np.isnan(table["Value"].iloc[1])
+    assert "Zip Code" not in table and "CV (%)" not in table
+    assert list(table["State"]) == ["IOWA", "OHIO"]
+
+
+def test_cached_columns_are_memory_mapped(tmp_path):
+    """
+    A second load reads the saved columns instead of parsing the csv
+    """
+    source = write_source(tmp_path)
+    cache = tmp_path.joinpath("cache")
+    assert datacache.build_entry(source, cache)[1]
+    assert not datacache.build_entry(source, cache)[1]
+    manifest = datacache.build_entry(source, cache)[0]
+    column = next(column for column in manifest["columns"] if column["name"] == "Value")
+    saved = np.load(
+        cache.joinpath("hogs.csv", manifest["build"], column["file"]), mmap_mode="r"
+    )
+    assert isinstance(saved, np.memmap)
+    table = datacache.load_table(source, cache)
+    np.testing.assert_array_equal(
+        table["Value"], datacache.read_normalised_csv(source)["Value"]
+    )
+
+
+def test_stale_entries_rebuild(tmp_path):
+    """
+    Touching a file keeps its entry, changing its content rebuilds it
+    """
+    source = write_source(tmp_path)
+    cache = tmp_path.joinpath("cache")
+    datacache.build_entry(source, cache)
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert not datacache.build_entry(source, cache)[1]
+    source.write_text(QUICKSTATS.replace("23,900,000", "24,100,000"))
+    assert datacache.build_entry(source, cache)[1]
+    assert datacache.load_table(source, cache)["Value"].iloc[0] == 24_100_000
+
+
+def test_concurrent_rebuilds_leave_a_whole_entry(tmp_path):
+    """
+    Rebuilds running at once each write their own build and swap the manifest
+    in last, so the entry always loads and no temporary files are left
+    """
+    source = write_source(tmp_path)
+    cache = tmp_path.joinpath("cache")
+    first = datacache.build_entry(source, cache)[0]
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: datacache.build_entry(source, cache, True), range(8)))
+    entry = cache.joinpath("hogs.csv")
+    manifest = json.loads(entry.joinpath(datacache.MANIFEST).read_text())
+    assert not entry.joinpath(first["build"]).exists()
+    assert entry.joinpath(manifest["build"]).is_dir()
+    assert not list(entry.glob("*.tmp"))
+    table = datacache.load_table(source, cache)
+    assert table["Value"].iloc[0] == 23_900_000
+
+
+def test_date_columns_are_datetimes(tmp_path):
+    """
+    Dates in either USDA format become datetime64 columns, other text stays
+    """
+    source = write_source(
+        tmp_path,
+        "Date,Week Date,Cattle,Note\n"
+        '2020-12-19,12/19/2020,"2,799.90",a\n'
+        "2020-12-12,12/12/2020,663.9,b\n",
+    )
+    table = datacache.load_table(source, tmp_path.joinpath("cache"))
+    for column in ("Date", "Week Date"):
+        assert table[column].dtype.kind == "M"
+        assert table[column].iloc[0] == np.datetime64("2020-12-19")
+    assert table["Cattle"].iloc[0] == 2799.9
+    assert table["Note"].dtype.kind != "M"
+    usda = datacache.read_normalised_csv(
+        datacache.USDA_PATH.joinpath("double_year_percentChange.csv")
+    )
+    assert usda["Date"].dtype.kind == "M"
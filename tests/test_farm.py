@@ -0,0 +1,36 @@
+import numpy as np
+
+from animal_feed import calculate_feed_and_animals_batch, load_animal_inputs, run_farm
+
+
+def random_sliders(count):
+    rng = np.random.default_rng(0)
+    sliders = rng.uniform(0, 100, (count, 9))
+    sliders[:, 5] = rng.integers(1, 25, count)
+    return sliders
+
+
+def test_farm_workers_match_the_batch_engine():
+    """
+    Results written in place by worker processes should be exactly the batch
+    engine's, NaN past each scenario's months included
+    """
+    sliders = random_sliders(500)
+    expected = calculate_feed_and_animals_batch(sliders, load_animal_inputs())
+    run = run_farm(sliders, workers=2, chunk_size=64)
+    assert run.workers == 2
+    assert run.scenarios_per_second > 0
+    np.testing.assert_array_equal(run.results, expected)
+
+
+def test_farm_runs_in_process_without_workers():
+    """
+    workers=0 runs every range here, and an empty sweep gives empty results
+    """
+    sliders = random_sliders(100)
+    run = run_farm(sliders, workers=0, chunk_size=30)
+    assert run.workers == 0
+    np.testing.assert_array_equal(
+        run.results, calculate_feed_and_animals_batch(sliders, load_animal_inputs())
+    )
+    assert run_farm(np.empty((0, 9)), months=12).results.shape == (0, 12, 29)
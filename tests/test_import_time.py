@@ -0,0 +1,61 @@
+import pathlib
+import subprocess
+import sys
+import time
+
+SRC_PATH = pathlib.Path(__file__).parent.joinpath("../src").resolve()
+
+# cold start budget for a gunicorn worker importing the dash app, in seconds
+APP_IMPORT_BUDGET = 5.0
+
+
+def import_in_fresh_interpreter(statement):
+    """
+    Runs an import statement in a new python process from the src folder.
+
+    Arguments:
+        statement (str): the python code to run
+
+    Returns:
+        tuple: (wall time in seconds, stdout of the process)
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", statement],
+        cwd=SRC_PATH,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return time.perf_counter() - start, result.stdout
+
+
+def test_app_import_is_within_budget():
+    """
+    Importing the dash app should stay under the cold start budget
+    """
+    elapsed, _ = import_in_fresh_interpreter("import app")
+    assert elapsed < APP_IMPORT_BUDGET
+
+
+def test_app_import_does_not_load_animal_inputs():
+    """
+    Importing the dash app should not load the animal inputs or run the model.
+    Dash builds the layout once to validate it, which only reads slider defaults
+    """
+    _, stdout = import_in_fresh_interpreter(
+        "import app, animal_feed.inputs as inputs;"
+        "print(inputs.load_animal_inputs.cache_info().currsize, len(app.result_cache))"
+    )
+    assert stdout.split() == ["0", "0"]
+
+
+def test_model_package_does_not_import_ui_libraries():
+    """
+    The model package should be usable without Dash, plotly or matplotlib
+    """
+    _, stdout = import_in_fresh_interpreter(
+        "import sys, animal_feed;"
+        "print(sorted({'dash', 'plotly', 'matplotlib'} & set(sys.modules)))"
+    )
+    assert stdout.strip() == "[]"
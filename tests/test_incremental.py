@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import app
+from animal_feed import IncrementalModel, calculate_feed_and_animals
+from animal_feed import load_animal_inputs
+from animal_feed.model import SLIDER_BOUNDS, SLIDER_NAMES
+
+SLIDERS = [0, 0, 100, 0, 0, 12, 20, 0, 0]
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_resumed_runs_match_full_runs():
+    """
+    After any sequence of slider changes a resumed run should be identical to
+    a run of the kernel from month 0
+    """
+    animal_inputs = load_animal_inputs()
+    model = IncrementalModel(animal_inputs)
+    rng = np.random.default_rng(0)
+    sliders = list(SLIDERS)
+    for _ in range(100):
+        index = rng.integers(len(SLIDER_NAMES))
+        low, high = SLIDER_BOUNDS[SLIDER_NAMES[index]]
+        if SLIDER_NAMES[index] == "months":
+            sliders[index] = int(rng.integers(0, 121))
+        else:
+            sliders[index] = float(rng.choice([low, high, rng.uniform(low, high)]))
+        expected = calculate_feed_and_animals(
+            *sliders, animal_inputs, as_frame=False, backend="kernel"
+        )
+        actual = model.run(sliders, as_frame=False)
+        for name in expected.dtype.names:
+            np.testing.assert_array_equal(actual[name], expected[name])
+    assert model.stats()["months_reused"] > 0
+
+
+def test_runs_resume_from_the_first_affected_month():
+    """
+    A longer run only simulates the new months, and a change to the calf
+    reductions only the months from cow gestation on
+    """
+    animal_inputs = load_animal_inputs()
+    model = IncrementalModel(animal_inputs)
+    model.run(SLIDERS)
+    model.run(SLIDERS[:5] + [24] + SLIDERS[6:])
+    assert model.stats() == {"months_computed": 24, "months_reused": 12}
+    gestation = int(animal_inputs.cow_gestation)
+    assert model.resume_month([50] + SLIDERS[1:5] + [24] + SLIDERS[6:]) == gestation
+    assert model.resume_month(SLIDERS[:2] + [110] + SLIDERS[3:5] + [24]) == 0
+
+
+def test_dashboard_resumes_each_sessions_trajectory(monkeypatch):
+    """
+    With session trajectories enabled the dashboard's model runs resume the
+    session's last run and give the model's results
+    """
+    monkeypatch.setattr(app, "trajectories", app.ResultCache(maxsize=4))
+    app.result_cache.clear()
+    try:
+        app.model_results(SLIDERS, "session")
+        actual = app.model_results(SLIDERS[:5] + [24] + SLIDERS[6:], "session")
+    finally:
+        app.result_cache.clear()
+    assert app.trajectories.get("session").stats()["months_reused"] == 12
+    expected = calculate_feed_and_animals(
+        *SLIDERS[:5], 24, *SLIDERS[6:], load_animal_inputs()
+    )
+    np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-12)
+    assert "incremental" in app.model_metrics_report()
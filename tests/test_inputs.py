@@ -0,0 +1,55 @@
+import pickle
+
+import pytest
+
+from animal_feed import SLIDER_NAMES, inputs, load_animal_inputs
+from animal_feed.inputs import ModelAnimalInputs, save_slider_scenario
+
+
+def test_invalid_inputs_are_rejected_at_load():
+    """
+    A missing row, a wrong unit and an out of range quantity should all be
+    reported by one ValueError
+    """
+    dataframe = load_animal_inputs().dataframe.drop(index="TotalPigs")
+    dataframe.loc["cowGestation", "Units"] = "Days"
+    dataframe.loc["PigsPerLitter", "Qty"] = -3
+    with pytest.raises(ValueError) as error:
+        ModelAnimalInputs(dataframe)
+    for problem in ("TotalPigs", "cowGestation", "PigsPerLitter"):
+        assert problem in str(error.value)
+
+
+def test_inputs_are_read_only_and_precomputed():
+    """
+    The inputs should refuse changes, survive pickling and hold the quantities
+    and derived constants of the dataframe
+    """
+    animal_inputs = load_animal_inputs()
+    with pytest.raises(AttributeError):
+        animal_inputs.total_pigs = 0
+    qty = animal_inputs.dataframe["Qty"]
+    assert animal_inputs.total_pigs == qty["TotalPigs"]
+    assert animal_inputs.pregnant_sows == qty["PigletsPerMonth"] / qty["PigsPerLitter"]
+    assert animal_inputs.new_beef_calfs + animal_inputs.new_dairy_calfs == (
+        pytest.approx(qty["Calf crop"])
+    )
+    copy = pickle.loads(pickle.dumps(animal_inputs))
+    assert copy.baseline_feed_without_dairy == animal_inputs.baseline_feed_without_dairy
+
+
+@pytest.mark.parametrize(
+    "name", ["baseline", "default", "scneario1", "optimistic", "../x", "a/b", "", "."]
+)
+def test_saving_cannot_overwrite_shipped_scenarios_or_leave_data(
+    name, tmp_path, monkeypatch
+):
+    """
+    Shipped scenarios, by key or by file, and names that are not plain words
+    are rejected without writing anything
+    """
+    monkeypatch.setattr(inputs, "DATA_PATH", tmp_path.joinpath("data"))
+    tmp_path.joinpath("data").mkdir()
+    with pytest.raises(ValueError):
+        save_slider_scenario(name, dict.fromkeys(SLIDER_NAMES, 0))
+    assert not list(tmp_path.rglob("*.csv"))
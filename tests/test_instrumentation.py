@@ -0,0 +1,63 @@
+import logging
+
+from animal_feed import (
+    LoggingHook,
+    MetricsHook,
+    ModelHook,
+    calculate_feed_and_animals,
+    load_animal_inputs,
+)
+
+# slaughter capacity at 6x baseline runs out of poultry and pigs to slaughter
+HIGH_SLAUGHTER = [0, 0, 600, 0, 0, 12, 20, 0, 0]
+
+
+def test_model_prints_nothing(capsys):
+    """
+    The model should not write to stdout
+    """
+    calculate_feed_and_animals(*HIGH_SLAUGHTER, load_animal_inputs())
+    assert capsys.readouterr().out == ""
+
+
+def test_metrics_hook_counts_runs_months_and_spillovers():
+    """
+    MetricsHook accumulates counters over several runs
+    """
+    hook = MetricsHook()
+    calculate_feed_and_animals(*HIGH_SLAUGHTER, load_animal_inputs(), hook=hook)
+    calculate_feed_and_animals(*HIGH_SLAUGHTER, load_animal_inputs(), hook=hook)
+    summary = hook.summary()
+    assert summary["runs"] == 2
+    assert summary["months"] == 24
+    assert summary["spillovers"]["poultry->pig"] > 0
+    assert summary["spillovers"]["pig->cow"] > 0
+    assert summary["max_seconds"] > 0
+
+
+def test_hook_sees_every_month_row():
+    """
+    on_month is called once per month with that month's results
+    """
+
+    class RecordingHook(ModelHook):
+        def __init__(self):
+            self.months = []
+
+        def on_month(self, month, row):
+            self.months.append((month, row[-1]))
+
+    hook = RecordingHook()
+    calculate_feed_and_animals(*HIGH_SLAUGHTER, load_animal_inputs(), hook=hook)
+    assert hook.months == [(i, i) for i in range(12)]
+
+
+def test_logging_hook_logs_feed_at_debug(caplog):
+    """
+    LoggingHook reports the feed figures the model used to print
+    """
+    with caplog.at_level(logging.DEBUG, logger="animal_feed.instrumentation"):
+        calculate_feed_and_animals(
+            *HIGH_SLAUGHTER, load_animal_inputs(), hook=LoggingHook()
+        )
+    assert len(caplog.records) == 12
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from animal_feed import ModelHook, calculate_feed_and_animals, load_animal_inputs
+
+SCENARIOS = [
+    [0, 0, 100, 0, 0, 12, 20, 0, 0],
+    [100, 0, 110, 100, 100, 24, 20, 40, 1],
+    [100, 50, 80, 100, 30, 18, 50, 20, 0],
+    [10, 90, 600, 60, 100, 240, 0, 100, 0],
+    [0, 0, 0, 0, 0, 6, 100, 0, 1],
+]
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_kernel_matches_python_backend(scenario):
+    """
+    The kernel backend, compiled or not, should match the reference loop,
+    including the inf and nan of a zero slaughter capacity
+    """
+    animal_inputs = load_animal_inputs()
+    expected = calculate_feed_and_animals(
+        *scenario, animal_inputs, as_frame=False, backend="python"
+    )
+    actual = calculate_feed_and_animals(
+        *scenario, animal_inputs, as_frame=False, backend="kernel"
+    )
+    for name in expected.dtype.names:
+        np.testing.assert_allclose(actual[name], expected[name], rtol=1e-12)
+
+
+def test_hooks_need_the_python_backend():
+    """
+    Only the reference loop calls hooks, so asking the kernel for one fails
+    """
+    with pytest.raises(ValueError):
+        calculate_feed_and_animals(
+            *SCENARIOS[0], load_animal_inputs(), hook=ModelHook(), backend="kernel"
+        )
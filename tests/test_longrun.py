@@ -0,0 +1,95 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from animal_feed import iter_long_run, load_animal_inputs, simulate_batch
+from animal_feed.batch import batch_parameters
+from animal_feed.longrun import write_long_run_csv
+from animal_feed.model import METRIC_INDEX
+
+SCENARIOS = [
+    [0, 0, 100, 0, 0, 24, 20, 0, 0],
+    [100, 0, 110, 100, 100, 24, 20, 0.4, 1],
+    [10, 90, 600, 60, 100, 24, 0, 1, 0],
+]
+
+
+def test_monthly_steps_match_the_batch_engine():
+    """
+    Monthly steps with the csv gestations should reproduce simulate_batch
+    """
+    chunks = list(
+        iter_long_run(SCENARIOS, 2, "month", gestation_days=None, chunk_steps=5)
+    )
+    assert [chunk.shape[1] for chunk in chunks] == [5, 5, 5, 5, 4]
+    expected = simulate_batch(SCENARIOS, batch_parameters(load_animal_inputs()))
+    np.testing.assert_array_equal(np.concatenate(chunks, axis=1), expected)
+
+
+def test_single_scenarios_match_the_batch_engine():
+    """
+    A single scenario runs through the kernel, and should give what the batch
+    engine gives it alongside other scenarios, in daily steps too
+    """
+    for step in ("week", "day"):
+        together = np.concatenate(
+            list(iter_long_run(SCENARIOS, 3, step, chunk_steps=100)), axis=1
+        )
+        for index, scenario in enumerate(SCENARIOS):
+            alone = np.concatenate(
+                list(iter_long_run([scenario], 3, step, chunk_steps=100)), axis=1
+            )
+            np.testing.assert_allclose(alone[0], together[index], rtol=1e-9)
+
+
+def test_weekly_steps_track_the_monthly_run():
+    """
+    Without interventions, weekly feed use should add up to about the monthly
+    one, and populations at the end of two years should agree within a few
+    percent
+    """
+    weekly = np.concatenate(list(iter_long_run(SCENARIOS[:1], 2, "week")), axis=1)
+    monthly = np.concatenate(list(iter_long_run(SCENARIOS[:1], 2, "month")), axis=1)
+    assert weekly.shape[1] == 105
+    feed = METRIC_INDEX["Combined Feed"]
+    np.testing.assert_allclose(
+        weekly[:, :, feed].sum(1), monthly[:, :, feed].sum(1), rtol=0.02
+    )
+    populations = [METRIC_INDEX[name] for name in ("Beef Pop", "Dairy Pop", "Pigs Pop")]
+    np.testing.assert_allclose(
+        weekly[:, -1, populations], monthly[:, -1, populations], rtol=0.05
+    )
+
+
+def peak_memory(years):
+    """
+    Measures the peak memory allocated while consuming a weekly run.
+
+    Arguments:
+        years (float): length of the run
+
+    Returns:
+        int: the peak traced allocation in bytes
+    """
+    tracemalloc.start()
+    for _ in iter_long_run(SCENARIOS[:1], years, "week", chunk_steps=64):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def test_long_runs_stream_in_constant_memory(tmp_path):
+    """
+    Memory should not grow with the horizon, and the csv writer should stream
+    every step of a decades long daily run
+    """
+    assert peak_memory(50) < peak_memory(5) * 1.1
+    rows = write_long_run_csv(
+        iter_long_run(SCENARIOS[:1], 30, "day"), tmp_path.joinpath("run.csv")
+    )
+    assert rows == 10958
+    frame = pd.read_csv(tmp_path.joinpath("run.csv"))
+    assert len(frame) == rows
+    assert frame["Month"].is_monotonic_increasing
@@ -0,0 +1,39 @@
+import numpy as np
+
+from animal_feed import METRIC_NAMES, calculate_feed_and_animals, load_animal_inputs
+
+OPTIMISTIC = [100, 0, 110, 100, 0, 12, 20, 0, 1]
+
+
+def test_model_returns_one_row_per_month():
+    """
+    The DataFrame has one row per month and the METRIC_NAMES columns
+    """
+    df = calculate_feed_and_animals(*OPTIMISTIC, load_animal_inputs())
+    assert list(df.columns) == list(METRIC_NAMES)
+    assert df["Month"].tolist() == list(range(12))
+    assert df.notna().all().all()
+
+
+def test_model_record_array_matches_frame():
+    """
+    as_frame=False returns the same values as a structured record array
+    """
+    df = calculate_feed_and_animals(*OPTIMISTIC, load_animal_inputs())
+    records = calculate_feed_and_animals(
+        *OPTIMISTIC, load_animal_inputs(), as_frame=False
+    )
+    assert records.dtype.names == METRIC_NAMES
+    for name in METRIC_NAMES:
+        np.testing.assert_array_equal(records[name], df[name])
+
+
+def test_model_with_no_months_is_empty():
+    """
+    Zero months gives an empty frame that still has every column
+    """
+    df = calculate_feed_and_animals(
+        *OPTIMISTIC[:5], 0, *OPTIMISTIC[6:], load_animal_inputs()
+    )
+    assert df.empty
+    assert list(df.columns) == list(METRIC_NAMES)
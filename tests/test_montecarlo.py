@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from animal_feed import calculate_feed_and_animals, load_animal_inputs
+from animal_feed.montecarlo import (
+    QuantileAccumulator,
+    iter_monte_carlo,
+    load_input_distributions,
+    run_monte_carlo,
+)
+
+OPTIMISTIC = [100, 0, 110, 100, 0, 12, 20, 0, 1]
+
+
+def test_quantile_accumulator_matches_exact_percentiles():
+    """
+    Histogram quantiles should be within a bin width of numpy's percentiles
+    """
+    rng = np.random.default_rng(1)
+    values = rng.normal(10, 2, (5000, 3, 2))
+    accumulator = QuantileAccumulator.from_pilot(values[:500], bins=1024)
+    for chunk in np.split(values, 10):
+        accumulator.add(chunk)
+    width = (accumulator.upper - accumulator.lower) / accumulator.bins
+    exact = np.percentile(values, [5, 50, 95], axis=0)
+    assert (np.abs(accumulator.quantiles() - exact) <= width).all()
+    assert (accumulator.total == 5000).all()
+
+
+def test_fixed_distributions_reproduce_the_point_estimate():
+    """
+    With no uncertainty every band equals the deterministic model run
+    """
+    distributions = load_input_distributions().assign(Distribution="fixed")
+    bands = run_monte_carlo(
+        OPTIMISTIC, 200, distributions=distributions, chunk_size=50, workers=0
+    )
+    expected = calculate_feed_and_animals(*OPTIMISTIC, load_animal_inputs())
+    for band in bands.values():
+        width = np.abs(expected["Combined Saved Feed"]) * 1e-3 + 1e-6
+        difference = np.abs(
+            band["Combined Saved Feed"] - expected["Combined Saved Feed"]
+        )
+        assert (difference <= width).all()
+
+
+def test_monte_carlo_streams_ordered_bands():
+    """
+    Each chunk yields bands over more draws, with P5 <= P50 <= P95
+    """
+    progress = list(iter_monte_carlo(OPTIMISTIC, 600, chunk_size=200, workers=0))
+    assert [step.draws for step in progress] == [200, 400, 600]
+    bands = progress[-1].bands
+    assert list(bands) == ["P5", "P50", "P95"]
+    feed = pd.concat(
+        {name: band["Combined Feed"] for name, band in bands.items()}, axis=1
+    )
+    assert (feed["P5"] <= feed["P50"]).all() and (feed["P50"] <= feed["P95"]).all()
+    assert (feed["P5"] < feed["P95"]).all()
+
+
+def test_monte_carlo_is_reproducible_across_worker_counts():
+    """
+    The same seed gives the same bands in process and on a process pool
+    """
+    serial = run_monte_carlo(OPTIMISTIC, 300, chunk_size=100, workers=0, seed=3)
+    pooled = run_monte_carlo(OPTIMISTIC, 300, chunk_size=100, workers=2, seed=3)
+    for name in serial:
+        pd.testing.assert_frame_equal(serial[name], pooled[name])
+
+
+def test_monte_carlo_needs_draws():
+    """
+    Zero draws or an empty chunk size is rejected before anything runs
+    """
+    with pytest.raises(ValueError):
+        run_monte_carlo(OPTIMISTIC, 0)
+    with pytest.raises(ValueError):
+        iter_monte_carlo(OPTIMISTIC, 10, chunk_size=0)
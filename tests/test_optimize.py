@@ -0,0 +1,62 @@
+import pandas as pd
+
+from animal_feed import (
+    SLIDER_NAMES,
+    calculate_feed_and_animals,
+    inputs,
+    load_animal_inputs,
+)
+from animal_feed.optimize import optimize_sliders
+
+CONSTRAINTS = {"Pig Hours %": ("<=", 0.4), "Dairy Pop": (">=", 1.6e7)}
+
+
+def run_sliders(sliders):
+    return calculate_feed_and_animals(
+        *[sliders[name] for name in SLIDER_NAMES], load_animal_inputs()
+    )
+
+
+def test_optimizer_beats_baseline_within_constraints():
+    """
+    The optimum saves more feed than the baseline and meets every constraint
+    """
+    result = optimize_sliders(
+        months=12, constraints=CONSTRAINTS, population=500, iterations=15
+    )
+    assert result.feasible
+    df = run_sliders(result.sliders)
+    assert df["Pig Hours %"].max() <= 0.4
+    assert df["Dairy Pop"].min() >= 1.6e7
+    assert abs(df["Combined Saved Feed"].sum() - result.objective) < 1e-6
+    baseline = calculate_feed_and_animals(
+        0, 0, 100, 0, 0, 12, 100, 0, 0, load_animal_inputs()
+    )
+    assert result.objective > baseline["Combined Saved Feed"].sum()
+
+
+def test_impossible_constraints_are_reported_infeasible():
+    """
+    A constraint no slider setting can meet gives feasible=False
+    """
+    result = optimize_sliders(
+        months=6, constraints={"Dairy Pop": (">=", 1e12)}, population=200, iterations=3
+    )
+    assert not result.feasible
+
+
+def test_saved_scenario_is_available_to_the_dashboard(tmp_path, monkeypatch):
+    """
+    save_scenario writes a slider csv that load_slider_defaults can read back
+    """
+    monkeypatch.setattr(inputs, "DATA_PATH", tmp_path)
+    result = optimize_sliders(months=6, population=200, iterations=3)
+    path = result.save_scenario("optimised")
+    assert path == tmp_path.joinpath("optimised_slider_values.csv")
+    assert "optimised" in inputs.available_scenarios()
+    saved = inputs.load_slider_defaults("optimised")
+    assert [getattr(saved, name) for name in SLIDER_NAMES] == list(
+        result.sliders.values()
+    )
+    assert list(pd.read_csv(path)["Variable"]) == list(SLIDER_NAMES)
+    inputs.load_slider_defaults.cache_clear()
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from animal_feed import METRIC_NAMES, calculate_feed_and_animals, load_animal_inputs
+from animal_feed.regional import (
+    PARAMETER_SHARES,
+    load_state_shares,
+    neighbor_matrix,
+    simulate_states,
+)
+
+SLIDERS = [0, 0, 100, 0, 0, 24, 20, 0.4, 0]
+
+
+def test_shares_cover_fifty_states():
+    """
+    Every series is split between the 50 states and sums to one
+    """
+    shares = load_state_shares()
+    assert len(shares) == 50
+    np.testing.assert_allclose(shares.sum(), 1.0)
+    assert (shares >= 0).all().all()
+
+
+def test_identical_shares_aggregate_to_national_model():
+    """
+    States holding the same share of everything add up to the national run
+    """
+    states = pd.Index([f"STATE {index}" for index in range(5)], name="State")
+    weights = np.array([0.1, 0.2, 0.3, 0.15, 0.25])
+    shares = pd.DataFrame(
+        {column: weights for column in set(PARAMETER_SHARES.values())}, index=states
+    )
+    result = simulate_states(SLIDERS, shares=shares)
+    expected = calculate_feed_and_animals(*SLIDERS, load_animal_inputs())
+    pd.testing.assert_frame_equal(
+        result.national(), expected[list(METRIC_NAMES)], check_dtype=False, rtol=1e-9
+    )
+
+
+def test_capacity_sharing_only_moves_spare_capacity():
+    """
+    Neighbours lending spare capacity slaughter more cattle in total, and no
+    state slaughters more beef cattle than it has
+    """
+    alone = simulate_states(SLIDERS)
+    shared = simulate_states(SLIDERS, share_capacity=True)
+    assert shared.values.shape == (50, 24, len(METRIC_NAMES))
+    assert (
+        shared.national()["Beef Slaughtered"].sum()
+        > alone.national()["Beef Slaughtered"].sum()
+    )
+    beef = shared.metric("Beef Slaughtered") <= shared.metric("Beef Pop") + 1e-6
+    assert beef.all().all()
+
+
+def test_neighbor_matrix_is_symmetric():
+    """
+    The shipped border list gives a symmetric matrix, islands have no neighbours
+    """
+    states = load_state_shares().index
+    matrix = neighbor_matrix(states)
+    np.testing.assert_array_equal(matrix, matrix.T)
+    assert matrix[states.get_loc("HAWAII")].sum() == 0
+    assert matrix[states.get_loc("IOWA"), states.get_loc("NEBRASKA")] == 1
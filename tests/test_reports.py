@@ -0,0 +1,51 @@
+import datetime
+
+import numpy as np
+
+from animal_feed.reports import (
+    REPORT_COLUMNS,
+    load_weekly_slaughter,
+    parse_weekly_report,
+)
+
+REPORT = """SJ_LS713
+St. Joseph, MO Thu Dec 31, 2020 USDA Market News Service
+Week Ending 12/19/2020
+Standard Cattle Calves
+1 0.7 0.3 (D) - 0.1 (D) -
+U.S. 2/ 654.9 323.4 191.1 63.0 67.2 10.3 8.2
+Standard Hogs Sheep
+U.S. 2/ 2,799.9 2,723.8 (D) - 40.6 2.5 38.0
+"""
+
+
+def test_report_fields_are_found_by_label():
+    """
+    Totals come from the U.S. rows of each section, wherever they are
+    """
+    record = parse_weekly_report("\n\nextra header\n" + REPORT)
+    assert record["Date"] == datetime.datetime(2020, 12, 19)
+    assert record["Cattle"] == 654.9
+    assert record["Calves"] == 8.2
+    assert record["Hogs"] == 2799.9
+    assert np.isnan(record["Sows"])
+    assert record["Boars"] == 0.0
+
+
+def test_report_without_week_is_skipped():
+    """
+    Text that is not a weekly report gives None
+    """
+    assert parse_weekly_report("12") is None
+
+
+def test_shipped_runs_parse_to_weekly_series():
+    """
+    The 2019 and 2020 scrapes give one row per week, duplicates dropped
+    """
+    weekly = load_weekly_slaughter((2019, 2020))
+    assert list(weekly.columns) == list(REPORT_COLUMNS)
+    assert weekly.index.is_unique and weekly.index.is_monotonic_increasing
+    assert len(weekly) == 106
+    assert weekly.loc["2020-12-19", "Cattle"] == 654.9
+    assert weekly.loc["2018-12-15", "Hogs"] == 2609.4
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from animal_feed import METRIC_NAMES, calculate_feed_and_animals, load_animal_inputs
+from animal_feed.inputs import DATA_PATH
+from animal_feed.runner import main, read_result, read_slider_file, run_scenario_files
+
+SCENARIO_FILES = sorted(DATA_PATH.glob("*_slider_values.csv"))
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_runner_matches_scalar_model(tmp_path, workers):
+    """
+    Every written result should match the scalar model, serially or on a pool
+    """
+    summary = run_scenario_files(SCENARIO_FILES, tmp_path, workers, chunk_size=1)
+    assert list(summary["Scenario"]) == [path.stem for path in SCENARIO_FILES]
+    assert tmp_path.joinpath("summary.csv").exists()
+    animal_inputs = load_animal_inputs()
+    for path in SCENARIO_FILES:
+        sliders = list(read_slider_file(path))
+        sliders[5] = int(sliders[5])
+        expected = calculate_feed_and_animals(*sliders, animal_inputs)
+        actual = read_result(tmp_path.joinpath(path.stem + ".npz"))
+        pd.testing.assert_frame_equal(
+            actual, expected[list(METRIC_NAMES)], check_dtype=False, rtol=1e-12
+        )
+
+
+def test_runner_cli_does_not_import_ui_libraries(tmp_path):
+    """
+    The command line runner should run scenarios without Dash, plotly or
+    matplotlib
+    """
+    statement = (
+        "import sys; from animal_feed.runner import main;"
+        f"main([{str(DATA_PATH)!r} + '/default*.csv', '-o', {str(tmp_path)!r}]);"
+        "print(sorted({'dash', 'plotly', 'matplotlib'} & set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", statement],
+        cwd=DATA_PATH.parent.joinpath("src"),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.splitlines()[-1] == "[]"
+    assert tmp_path.joinpath("default_slider_values.npz").exists()
+    with pytest.raises(SystemExit):
+        main([str(tmp_path.joinpath("missing", "*.csv"))])
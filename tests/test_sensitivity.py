@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from animal_feed.sensitivity import (
+    morris_analysis,
+    morris_design,
+    sobol_analysis,
+)
+
+METRICS = ("Combined Saved Feed", "Pig Hours %")
+
+
+def test_morris_trajectories_change_one_parameter_per_step():
+    """
+    Every step of a Morris trajectory moves exactly one parameter by delta
+    """
+    design = morris_design(5, 4, 4, np.random.default_rng(0))
+    steps = np.diff(design.reshape(5, 5, 4), axis=1)
+    assert ((steps != 0).sum(axis=2) == 1).all()
+    assert np.allclose(np.abs(steps[steps != 0]), 4 / 6)
+    assert design.min() >= 0 and design.max() <= 1
+
+
+def test_sobol_ranks_slaughter_capacity_first():
+    """
+    The baseline slaughter slider drives most of the saved feed variance
+    """
+    result = sobol_analysis(512, months=12, metrics=METRICS, workers=0)
+    assert result.indices["S1"].shape == (8, 12, 2)
+    table = result.to_frame("Combined Saved Feed")
+    assert table["ST"].idxmax() == "change_to_baseline_slaughter"
+    assert (table["ST"] > -0.05).all()
+
+
+def test_morris_reports_effects_for_every_parameter():
+    """
+    Morris gives mu, mu_star and sigma with mu_star >= |mu|
+    """
+    result = morris_analysis(10, months=12, metrics=METRICS, workers=0)
+    table = result.to_frame("Combined Saved Feed")
+    assert list(table.columns) == ["mu", "mu_star", "sigma"]
+    assert (table["mu_star"] >= table["mu"].abs() - 1e-9).all()
+
+
+def test_sobol_resumes_from_checkpoint(tmp_path):
+    """
+    A rerun reuses finished chunks and gives identical indices
+    """
+    options = dict(months=6, metrics=METRICS, workers=0, chunk_size=300)
+    first = sobol_analysis(100, checkpoint_dir=tmp_path, **options)
+    chunks = sorted(tmp_path.glob("chunk_*.npy"))
+    assert len(chunks) == 4
+    chunks[-1].unlink()
+    resumed = sobol_analysis(100, checkpoint_dir=tmp_path, **options)
+    np.testing.assert_array_equal(first.indices["ST"], resumed.indices["ST"])
+    with pytest.raises(ValueError):
+        sobol_analysis(100, checkpoint_dir=tmp_path, seed=1, **options)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"base_sliders": [0, 0, 100, 0, 0, 6, 50, 0, 0]},
+        {"bounds": {"discount_rate": (0, 50)}},
+        {"chunk_size": 200},
+    ],
+)
+def test_checkpoints_of_another_design_are_rejected(change, tmp_path):
+    """
+    Resuming with a different base, bounds or chunk size fails instead of
+    reusing the stored design and chunks
+    """
+    options = dict(months=6, metrics=METRICS, workers=0, chunk_size=300)
+    sobol_analysis(100, checkpoint_dir=tmp_path, **options)
+    with pytest.raises(ValueError):
+        sobol_analysis(100, checkpoint_dir=tmp_path, **dict(options, **change))
@@ -0,0 +1,75 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import app
+from animal_feed import ModelAnimalInputs, load_animal_inputs, store
+from animal_feed.store import ResultStore, result_key
+
+SLIDERS = [0, 0, 100, 0, 0, 12, 20, 0, 0]
+
+
+def fill(path, start):
+    # stores ten results from another process
+    results = ResultStore(path)
+    for index in range(start, start + 10):
+        results.put(str(index), np.full((12, 29), float(index)))
+
+
+def test_keys_change_with_sliders_inputs_and_model_version(monkeypatch):
+    """
+    Equal slider values share a key, any change to the run gives a new one
+    """
+    animal_inputs = load_animal_inputs()
+    key = result_key(SLIDERS, animal_inputs)
+    assert result_key([float(value) for value in SLIDERS], animal_inputs) == key
+    assert result_key(SLIDERS[:-1] + [1], animal_inputs) != key
+    dataframe = animal_inputs.dataframe.copy()
+    dataframe.loc["TotalPigs", "Qty"] += 1
+    assert result_key(SLIDERS, ModelAnimalInputs(dataframe)) != key
+    monkeypatch.setattr(store, "MODEL_VERSION", store.MODEL_VERSION + 1)
+    assert result_key(SLIDERS, animal_inputs) != key
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    """
+    Beyond max_bytes the result used longest ago goes first, and results are
+    shared by processes and survive reopening the store
+    """
+    path = tmp_path.joinpath("results.sqlite")
+    size = 12 * 29 * 8
+    results = ResultStore(path, max_bytes=2 * size)
+    results.put("a", np.ones((12, 29)))
+    results.put("b", np.zeros((12, 29)))
+    np.testing.assert_array_equal(results.get("a"), np.ones((12, 29)))
+    results.put("c", np.zeros((12, 29)))
+    assert results.get("b") is None
+    assert results.stats()["evictions"] == 1
+    assert ResultStore(path, max_bytes=2 * size).get("a") is not None
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        list(executor.map(fill, [path, path], [0, 10]))
+    shared = ResultStore(path)
+    assert shared.stats()["entries"] == 22
+    np.testing.assert_array_equal(shared.get("15"), np.full((12, 29), 15.0))
+
+
+def test_dashboard_serves_stored_results_after_a_restart(tmp_path, monkeypatch):
+    """
+    A worker with an empty result cache should answer a stored scenario from
+    the store without running the model
+    """
+    monkeypatch.setattr(app, "STORE", str(tmp_path.joinpath("results.sqlite")))
+    app.result_store.cache_clear()
+    app.result_cache.clear()
+    try:
+        expected = app.model_results(SLIDERS)
+        app.result_cache.clear()
+        monkeypatch.setattr(app, "calculate_feed_and_animals", None)
+        actual = app.model_results(SLIDERS)
+        assert app.result_store().stats()["hits"] == 1
+    finally:
+        app.result_store.cache_clear()
+        app.result_cache.clear()
+    np.testing.assert_array_equal(actual.to_numpy(), expected.to_numpy())
+    assert actual["Month"].dtype == expected["Month"].dtype
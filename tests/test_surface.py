@@ -0,0 +1,57 @@
+import numpy as np
+
+from animal_feed import (
+    ModelAnimalInputs,
+    calculate_feed_and_animals,
+    load_animal_inputs,
+)
+from animal_feed.model import SLIDER_BOUNDS
+from animal_feed.surface import AXES, build_surface, load_surface
+
+GRID_POINTS = dict({name: 2 for name in AXES}, change_to_baseline_slaughter=3)
+
+
+def build(tmp_path):
+    return build_surface(tmp_path, points=GRID_POINTS, months=12, samples=0)
+
+
+def test_grid_points_match_the_model(tmp_path):
+    """
+    A state on a grid point is answered from the table, and shorter runs are
+    the first months of it
+    """
+    build(tmp_path)
+    surface = load_surface(tmp_path)
+    sliders = [100, 0, 300, 0, 100, 7, 0, 100, 1]
+    expected = calculate_feed_and_animals(*sliders, load_animal_inputs())
+    results = surface.lookup(sliders, interpolate=False)
+    np.testing.assert_allclose(results, expected.to_numpy(), rtol=1e-6)
+    assert surface.lookup([50] + sliders[1:], interpolate=False) is None
+    assert surface.lookup([100, 0, 300, 0, 100, 13, 0, 100, 1]) is None
+    assert surface.stats() == {"hits": 1, "interpolated": 0, "misses": 2, "points": 384}
+
+
+def test_states_between_grid_points_are_interpolated(tmp_path):
+    """
+    Halfway along one axis the answer is the mean of the two grid points
+    """
+    build(tmp_path)
+    surface = load_surface(tmp_path)
+    low = [0, 0, 300, 0, 0, 12, 0, 0, 0]
+    high = [0, 0, 600, 0, 0, 12, 0, 0, 0]
+    middle = [0, 0, 450, 0, 0, 12, 0, 0, 0]
+    expected = (surface.lookup(low) + surface.lookup(high)) / 2
+    np.testing.assert_allclose(surface.lookup(middle), expected)
+    outside = SLIDER_BOUNDS["change_to_baseline_slaughter"][1] + 1
+    assert surface.lookup([0, 0, outside] + middle[3:]) is None
+
+
+def test_tables_of_other_inputs_are_not_loaded(tmp_path):
+    """
+    A table built from different input data is ignored
+    """
+    build(tmp_path)
+    dataframe = load_animal_inputs().dataframe.copy()
+    dataframe.loc["TotalPigs", "Qty"] *= 2
+    assert load_surface(tmp_path, ModelAnimalInputs(dataframe)) is None
+    assert load_surface(tmp_path.joinpath("missing")) is None